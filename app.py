@@ -8,7 +8,9 @@ from contextlib import suppress
 sys.dont_write_bytecode = True
 
 # First party
+from bot.config import Config  # noqa
 from bot.main import main  # noqa
+from bot.supervisor import supervise  # noqa
 
 
 if __name__ == '__main__':
@@ -21,5 +23,6 @@ if __name__ == '__main__':
 
             asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
 
-        asyncio.run(main())
+        # При WORKERS > 1 обновления обрабатываются несколькими процессами
+        asyncio.run(supervise() if Config.WORKERS > 1 else main())
 
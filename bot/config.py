@@ -17,12 +17,69 @@ class Config:
 	DB_PASS = os.getenv("DB_PASS")
 	DB_HOST = os.getenv("DB_HOST")
 	DB_PORT = int(os.getenv("DB_PORT"))
+	DB_COMMAND_TIMEOUT = 60  # Таймаут выполнения запроса (секунды)
+	SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", 500))  # Запросы дольше попадают в журнал медленных
 	
+	# Получение обновлений: polling или webhook
+	BOT_MODE = os.getenv("BOT_MODE", "polling")
+	WEBHOOK_URL = os.getenv("WEBHOOK_URL", "")  # Публичный адрес (https://example.com), пусто - не регистрировать
+	WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/webhook")
+	WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+	WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", 8080))
+	WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+	WEBHOOK_CONCURRENCY = int(os.getenv("WEBHOOK_CONCURRENCY", 100))  # Одновременно обрабатываемых обновлений
+
+	# Несколько процессов-воркеров (обновления распределяются по user_id % WORKERS)
+	WORKERS = int(os.getenv("WORKERS", 1))
+	WORKER_ID = 0  # Номер текущего воркера, задается супервизором
+
 	TZ = timezone(timedelta(hours=int(os.getenv("TIME_ZONE"))))
 
 	# Channels
 	# MAIN_CHANNEL_ID = int(os.getenv("MAIN_CHANNEL_ID"))
 	# BACKUP_CHANNEL_ID = int(os.getenv("BACKUP_CHANNEL_ID"))
 
+	# FSM
+	FSM_CACHE_SIZE = 10_000  # Горячих ключей в памяти
+	FSM_CACHE_TTL = 30  # Сколько секунд ключ живет в кэше без подтверждения из БД
+	FSM_TTL_DAYS = 7  # Через сколько дней без изменений состояние удаляется
+
 	# Captcha
 	CAPTCHA_LENGTH = 6
+	CAPTCHA_POOL_SIZE = int(os.getenv("CAPTCHA_POOL_SIZE", 50))  # Заранее отрисованных капч
+	CAPTCHA_WORKERS = int(os.getenv("CAPTCHA_WORKERS", 2))  # Капч, отрисовываемых одновременно
+	CAPTCHA_STORE = os.getenv("CAPTCHA_STORE", "memory")  # memory или redis
+	CAPTCHA_TTL = 600  # Время жизни неразгаданной капчи (секунды)
+	CAPTCHA_MAX_ATTEMPTS = 3
+	REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+	# Broadcast
+	BROADCAST_WORKERS = int(os.getenv("BROADCAST_WORKERS", 20))  # Параллельных отправок
+	BROADCAST_RATE = float(os.getenv("BROADCAST_RATE", 28))  # Сообщений в секунду (лимит Telegram ~30)
+	BROADCAST_CHAT_INTERVAL = 1.0  # Минимальный интервал между сообщениями в один чат (секунды)
+	BROADCAST_MAX_RETRIES = 3
+	FAILURE_FLUSH_SIZE = 100  # Неудачных отправок в одной пачке записи в БД
+	FAILURE_FLUSH_INTERVAL = 5.0  # Максимальный интервал между записями (секунды)
+
+	# Cache
+	CACHE_SIZE = int(os.getenv("CACHE_SIZE", 50_000))  # Записей в кэше пользователей
+	CACHE_TTL = float(os.getenv("CACHE_TTL", 300))  # Время жизни записи (секунды)
+	SUBSCRIPTION_TTL = 300  # Подписка на резервный канал подтверждена (секунды)
+	SUBSCRIPTION_NEGATIVE_TTL = 30  # Подписки нет (секунды)
+
+	# Stats
+	STATS_REFRESH_INTERVAL = 60  # Как часто пересчитывать дневные агрегаты за сегодня и вчера (секунды)
+	STATS_RECONCILE_INTERVAL = 300  # Как часто сверять счетчики в памяти с БД (секунды)
+
+	# Executor
+	EXECUTOR_THREADS = int(os.getenv("EXECUTOR_THREADS", 4))  # Потоков для PIL, NumPy, сжатия
+	EXECUTOR_PROCESSES = int(os.getenv("EXECUTOR_PROCESSES", 2))  # Процессов для форматирования и отрисовки капч
+	EXECUTOR_SLOW_MS = 1000  # Задачи дольше попадают в лог
+
+	# Search
+	SEARCH_INDEX = os.getenv("SEARCH_INDEX", "false").lower() in ("1", "true")  # Поиск пользователей из памяти
+	SEARCH_INDEX_REFRESH_INTERVAL = 30  # Как часто подгружать новых пользователей других воркеров (секунды)
+
+	# Export
+	EXPORT_BATCH_SIZE = 1000  # Пользователей на одну страницу при выгрузке
+	EXPORT_GZIP_MIN_USERS = int(os.getenv("EXPORT_GZIP_MIN_USERS", 50_000))  # С какого числа пользователей выгрузка сжимается
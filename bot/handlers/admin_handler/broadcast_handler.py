@@ -27,7 +27,7 @@ async def broadcast_menu(callback: types.CallbackQuery | types.Message, state: F
 	state_data = await state.get_data()
 	if delete_message := state_data.get("delete_message"):
 		try:
-			await delete_message.delete()
+			await callback.bot.delete_message(chat_id=callback.from_user.id, message_id=delete_message)
 		except:
 			pass
 		await state.clear()
@@ -308,10 +308,6 @@ async def start_broadcast(
 	content = data.get('content', {})
 	buttons = data.get('buttons', [])
 	
-	# Получаем список активных пользователей
-	users = await services.user.get_users_for_notification()
-	total_users = len(users)
-	
 	# Сохраняем в историю
 	broadcast_id = await services.broadcast.save_broadcast(
 		text=content.get('text', ''),
@@ -319,79 +315,14 @@ async def start_broadcast(
 		media_id=content.get('media_id'),
 		buttons=buttons,
 		sent_by=callback.from_user.id,
-		total_users=total_users
+		total_users=0
 	)
 	
-	# Отправляем сообщение
-	success = 0
-	errors = 0
-	
-	for user in users:
-		try:
-			keyboard = None
-			# Формируем клавиатуру
-			if buttons:
-				builder = InlineKeyboardBuilder()
-				for btn in buttons:
-					if btn.button_type == 'url':
-						builder.button(text=btn.text, url=btn.value)
-					else:
-						builder.button(text=btn.text, callback_data=f"broadcast_textbtn:{broadcast_id}:{btn.id}")
-				builder.adjust(1)  # 1 кнопка в ряд
-				keyboard = builder.as_markup()
-			
-			if content['media_type'] == 'photo':
-				await callback.bot.send_photo(
-					chat_id=user.user_id,
-					photo=content['media_id'],
-					caption=content['text'],
-					reply_markup=keyboard
-				)
-			elif content['media_type'] == 'video':
-				await callback.bot.send_video(
-					chat_id=user.user_id,
-					video=content['media_id'],
-					caption=content['text'],
-					reply_markup=keyboard
-				)
-			elif content['media_type'] == 'document':
-				await callback.bot.send_document(
-					chat_id=user.user_id,
-					document=content['media_id'],
-					caption=content['text'],
-					reply_markup=keyboard
-				)
-			else:
-				await callback.bot.send_message(
-					chat_id=user.user_id,
-					text=content['text'],
-					reply_markup=keyboard
-				)
-			success += 1
-		except Exception as e:
-			logger.error(f"Ошибка отправки пользователю {user.user_id}: {e}")
-			await services.user.set_notification_status(user.user_id, False)
-			await services.user.ban_user(user.user_id)
-			errors += 1
-	
-	# Обновляем статистику
-	await services.broadcast.update_broadcast_stats(broadcast_id, success, errors)
-	
-	# Форматируем результат
-	result_text = (
-		f"✅ Рассылка завершена!\n\n"
-		f"• Успешно: {success}\n"
-		f"• Ошибок: {errors}\n"
-		f"• Всего получателей: {total_users}"
-	)
-	
-	await callback.message.answer(
-		result_text,
-		reply_markup=BroadCastKeyboards.back_to_broadcast()
-	)
+	# Ставим получателей в очередь и запускаем рассылку в фоне
+	await services.broadcast.start(broadcast_id, chat_id=callback.from_user.id)
 	
 	await state.clear()
-	await callback.answer()
+	await callback.answer("🚀 Рассылка запущена")
 
 
 # Обработчик нажатий на текстовые кнопки
@@ -516,86 +447,48 @@ async def repeat_broadcast(
 	
 	
 	
-	# Получаем список активных пользователей
-	users = await services.user.get_users_for_notification()
-	total_users = len(users)
-	
 	broadcast_id = await services.broadcast.save_broadcast(
 		text=broadcast.text,
 		media_type=broadcast.media_type,
 		media_id=broadcast.media_id,
 		buttons=broadcast.buttons,
 		sent_by=callback.from_user.id,
-		total_users=total_users
+		total_users=0
 	)
 	
-	# Отправляем сообщение
-	success = 0
-	errors = 0
-	
-	for user in users:
-		try:
-			buttons = broadcast.buttons
-			keyboard = None
-			# Формируем клавиатуру
-			if buttons:
-				builder = InlineKeyboardBuilder()
-				for btn in buttons:
-					if btn.button_type == 'url':
-						builder.button(text=btn.text, url=btn.value)
-					else:
-						builder.button(text=btn.text, callback_data=f"broadcast_textbtn:{broadcast_id}:{btn.id}")
-				builder.adjust(1)  # 1 кнопка в ряд
-				keyboard = builder.as_markup()
-			
-			if broadcast.media_type == 'photo':
-				await callback.bot.send_photo(
-					chat_id=user.user_id,
-					photo=broadcast.media_id,
-					caption=broadcast.text,
-					reply_markup=keyboard
-				)
-			elif broadcast.media_type == 'video':
-				await callback.bot.send_video(
-					chat_id=user.user_id,
-					video=broadcast.media_id,
-					caption=broadcast.text,
-					reply_markup=keyboard
-				)
-			elif broadcast.media_type == 'document':
-				await callback.bot.send_document(
-					chat_id=user.user_id,
-					document=broadcast.media_id,
-					caption=broadcast.text,
-					reply_markup=keyboard
-				)
-			else:
-				await callback.bot.send_message(
-					chat_id=user.user_id,
-					text=broadcast.text,
-					reply_markup=keyboard
-				)
-			success += 1
-		except Exception as e:
-			logger.error(f"Ошибка отправки пользователю {user.user_id}: {e}")
-			await services.user.set_notification_status(user.user_id, False)
-			await services.user.ban_user(user.user_id)
-			errors += 1
-	
-	# Обновляем статистику
-	await services.broadcast.update_broadcast_stats(broadcast_id, success, errors)
-	
-	await callback.message.answer(
-		f"✅ Повторная рассылка завершена!\n\n"
-		f"• Успешно: {success}\n"
-		f"• Ошибок: {errors}\n"
-		f"• Всего получателей: {total_users}",
-		reply_markup=BroadCastKeyboards.back_to_broadcast()
-	)
-	await callback.answer()
+	# Ставим получателей в очередь и запускаем рассылку в фоне
+	await services.broadcast.start(broadcast_id, chat_id=callback.from_user.id)
+	await callback.answer("🚀 Повторная рассылка запущена")
+
+
+@router.callback_query(F.data.regexp(r"^broadcast_(pause|resume|cancel):\d+$"))
+async def control_broadcast(
+		callback: types.CallbackQuery,
+		services: Services
+):
+	"""Пауза, продолжение и отмена активной рассылки"""
+	action, broadcast_id = callback.data.split(":")
+	status = {"broadcast_pause": "paused", "broadcast_resume": "running", "broadcast_cancel": "cancelled"}[action]
 	
+	if not await services.broadcast.set_status(int(broadcast_id), status):
+		await callback.answer("ℹ Рассылка уже завершена", show_alert=True)
+		return
 	
+	job = services.broadcast.get_job(int(broadcast_id))
+	if not job:
+		# Рассылку отправляет другой процесс: статус применится при ближайшем обновлении прогресса
+		await callback.answer("✅ Команда принята")
+		return
 	
+	try:
+		await callback.message.edit_text(
+			services.broadcast.format_progress(job),
+			reply_markup=BroadCastKeyboards.broadcast_progress(job.id, paused=job.status == 'paused')
+		)
+	except Exception:
+		pass
+	await callback.answer()
+
 
 # Просмотр детально рассылки
 @router.callback_query(F.data.startswith('broadcast_send'))
@@ -262,6 +262,12 @@ async def handle_bot_added_to_channel(update: ChatMemberUpdated, state: FSMConte
 			continue
 
 
+@router.chat_member()
+async def member_update(update: ChatMemberUpdated, services: Services):
+	"""Подписка/отписка пользователя в канале: обновляем кэш проверки подписки"""
+	await services.channel.on_member_update(update)
+
+
 @router.my_chat_member(ChatMemberUpdatedFilter(LEAVE_TRANSITION))
 async def leave_channel(update: ChatMemberUpdated, services: Services):
 	"""Обработчик изменения статуса бота в чате/канале"""
@@ -278,15 +284,19 @@ async def leave_channel(update: ChatMemberUpdated, services: Services):
 			return
 
 		_, super_admins = await services.admin.list_admins()
+		promoted = False
 		# Если это был основной канал
 		if channel.is_main:
 			backup_channel = await services.channel.get_backup_channel()
 			if backup_channel:
-				# Автоматически делаем резервный канал основным
-				await services.channel.set_main_channel(backup_channel.channel_id)
+				# Резервный канал становится основным, старый удаляется в той же транзакции
+				promoted = await services.channel.promote_backup_channel(channel, backup_channel)
 
-				# Отправляем уведомления пользователям
-				data = await services.notification.notify_channel_change(channel=backup_channel)
+				# Уведомления уходят в фоне, отчет придет супер-админам по завершении
+				await services.notification.notify_channel_change(
+					channel=backup_channel,
+					report_to=[admin.user_id for admin in super_admins]
+				)
 
 				for admin in super_admins:
 					try:
@@ -294,8 +304,7 @@ async def leave_channel(update: ChatMemberUpdated, services: Services):
 							admin.user_id,
 							f"⚠️ Основной канал <b>{channel.title}</b> был удален!\n"
 							f"Автоматически назначен новый основной канал: <a href='{backup_channel.link}'>{backup_channel.title}</a>\n"
-							f"Уведомления отправлены <b>{data['success']}</b> пользователям\n"
-							f"Пользователи которым не удалось отправить уведомления: {data['failures']}"
+							f"Пользователи получают уведомления, отчет придет по завершении"
 						)
 					except Exception:
 						continue
@@ -314,4 +323,5 @@ async def leave_channel(update: ChatMemberUpdated, services: Services):
 						continue
 
 		# Удаляем информацию о канале из БД
-		await services.channel.delete_channel(channel)
+		if not promoted:
+			await services.channel.delete_channel(channel)
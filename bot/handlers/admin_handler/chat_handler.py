@@ -146,7 +146,7 @@ async def select_direct_user(message: types.Message, state: FSMContext, services
 	else:
 		username = query.lower().lstrip('@')
 		if username:
-			candidates = await services.user.search_users('username', username)
+			candidates, _ = await services.user.search_users('username', username)
 			for candidate in candidates:
 				if candidate and candidate.username and candidate.username.lower() == username:
 					user = candidate
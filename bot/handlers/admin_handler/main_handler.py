@@ -1,9 +1,14 @@
+import html
+from datetime import datetime
+
 from aiogram import Router, types, F
 from aiogram.filters import Command
 from aiogram.types import FSInputFile
 
+from ...config import Config
 from ...keyboards.admin_keyboard import AdminKeyboards
 from ...models import Admin
+from ...repositories.base_repository import statements
 from ...services import Services
 
 
@@ -68,6 +73,41 @@ async def get_logs(callback: types.CallbackQuery | types.Message, services: Serv
 
 
 
+@router.message(Command('metrics'))
+async def metrics(message: types.Message, services: Services):
+	"""Внутренние метрики бота (для разработчиков)"""
+	captcha = services.captcha.pool.metrics()
+	await message.answer(
+		"📈 <b>Метрики</b>\n\n"
+		"🔐 <b>Пул капч</b>\n"
+		f"Готово: <code>{captcha['depth']}/{captcha['size']}</code>\n"
+		f"Время отрисовки: <code>{captcha['refill_latency_ms']} мс</code>\n"
+		f"Выдано: <code>{captcha['served']}</code> (мимо пула: <code>{captcha['misses']}</code>)"
+	)
+
+	lines = ["🗄 <b>Запросы к БД</b> (вызовов / среднее / p95 / максимум)"]
+	for statement in statements.top():
+		lines.append(
+			f"<code>{html.escape(statement.label)}</code>: {statement.calls} / "
+			f"{statement.total / max(statement.calls, 1) * 1000:.1f} / "
+			f"≤{statement.percentile(0.95):g} / {statement.max * 1000:.0f} мс"
+		)
+	if statements.slow_log:
+		lines.append(f"\n🐢 <b>Медленные</b> (порог {statements.slow_ms:g} мс из {Config.DB_COMMAND_TIMEOUT} с)")
+		for at, label, elapsed_ms in list(statements.slow_log)[-10:]:
+			lines.append(f"{datetime.fromtimestamp(at):%d.%m %H:%M:%S} <code>{html.escape(label)}</code>: {elapsed_ms:.0f} мс")
+
+	tasks = services.executor.top()
+	if tasks:
+		lines.append("\n⚙️ <b>Пул задач</b> (вызовов / среднее / максимум)")
+		for task in tasks:
+			lines.append(
+				f"<code>{task.name}</code>: {task.calls} / "
+				f"{task.total / task.calls * 1000:.1f} / {task.max * 1000:.0f} мс"
+			)
+	await message.answer("\n".join(lines))
+
+
 @router.callback_query(F.data.startswith("logs-"))
 async def send_log(callback: types.CallbackQuery):
 	log_file = callback.data.split('-')[1]
@@ -20,7 +20,7 @@ async def notification_menu(callback: types.CallbackQuery | types.Message, state
 	state_data = await state.get_data()
 	if delete_message := state_data.get("delete_message"):
 		try:
-			await delete_message.delete()
+			await callback.bot.delete_message(chat_id=callback.from_user.id, message_id=delete_message)
 		except Exception as e:
 			pass
 		await state.clear()
@@ -314,7 +314,7 @@ async def preview_notification(callback: types.CallbackQuery, state: FSMContext,
 		user_id = callback.message.chat.id
 		msg = await services.notification.send_message(user_id, text, media_type, media_id, keyboard)
 		if msg:
-			await state.update_data(delete_message=msg)
+			await state.update_data(delete_message=msg.message_id)
 		await callback.answer()
 	except Exception as e:
 		await callback.answer(f"❌ Ошибка при показе: {str(e)}", show_alert=True)
@@ -23,13 +23,14 @@ async def redirect_admin_stats(message: types.Message, services: Services):
 @router.callback_query(F.data == "admin_stats")
 async def admin_stats(callback: types.CallbackQuery | types.Message, services: Services):
 	"""Статистика бота"""
-	stats = await services.admin.get_stats()
+	stats = await services.stats.get_stats()
 
 	text = (
 		"📊 <b>Статистика бота</b>\n\n"
 		f"👤 Всего пользователей: <code>{stats['total_users']}</code>\n"
 		f"🟢 Активных: <code>{stats['active_users']}</code>\n"
-		f"🔴 Заблокированных: <code>{stats['banned_users']}</code>\n\n"
+		f"🔴 Заблокированных: <code>{stats['banned_users']}</code>\n"
+		f"🔔 Получают уведомления: <code>{stats['notifiable_users']}</code>\n\n"
 		f"📢 Каналов: <code>{stats['channels_count']}</code>\n"
 		f"🔷 Основной: {stats['main_channel']}\n"
 		f"🔶 Резервный: {stats['backup_channel']}"
@@ -84,16 +85,14 @@ async def process_end_date(message: types.Message, state: FSMContext, services:
 		data = await state.get_data()
 		start_date = data['start_date']
 
-		stats = await services.admin.get_period_stats(start_date, end_date)
+		stats = await services.stats.get_period_stats(start_date, end_date)
 
 		text = (
 			f"📊 <b>Статистика за период</b>\n"
 			f"📅 {start_date.strftime('%Y-%m-%d')} - {end_date.strftime('%Y-%m-%d')}\n\n"
 			f"👤 Новых пользователей: <code>{stats['new_users']}</code>\n"
 			f"🟢 Активных пользователей: <code>{stats['active_users']}</code>\n"
-			f"🔴 Заблокированных: <code>{stats['banned_users']}</code>\n"
-			f"📢 Изменений каналов: <code>{stats['channel_changes']}</code>\n"
-			f"✉️ Уведомлений отправлено: <code>{stats['notifications_sent']}</code>"
+			f"🔴 Заблокированных: <code>{stats['banned_users']}</code>"
 		)
 
 		await message.answer(text, parse_mode=ParseMode.HTML)
@@ -1,4 +1,4 @@
-import os
+from typing import List
 
 from aiogram import Router, types, F, Bot
 from aiogram.enums import ParseMode
@@ -6,10 +6,11 @@ from aiogram.filters import Command, CommandObject
 from aiogram.fsm.context import FSMContext
 
 from ...keyboards.admin_keyboard import AdminKeyboards
-from ...models import Admin
+from ...models import Admin, User
 from ...services import Services
 from ...states.admin_states import UserStates
 from ...utils.commands import set_commands_to_user
+from ...utils.search_index import SearchHit
 from ...utils.loggers import handlers as logger
 
 
@@ -142,6 +143,23 @@ async def search_by_id_start(callback: types.CallbackQuery, state: FSMContext):
 	await callback.answer()
 
 
+SEARCH_PAGE_SIZE = 10
+
+
+def _format_search_page(users: List[User | SearchHit], shown: int, has_more: bool) -> str:
+	users_list = "\n".join(
+		f"{i}. @{u.username} - {u.full_name} (ID: <code>{u.user_id}</code>)"
+		for i, u in enumerate(users, shown + 1)
+	)
+	more = "Есть ещё результаты.\n" if has_more else ""
+	return (
+		f"🔍 Результаты поиска {shown + 1}–{shown + len(users)}:\n\n"
+		f"{users_list}\n\n"
+		f"{more}"
+		"Для просмотра подробностей отправьте ID пользователя."
+	)
+
+
 @router.message(UserStates.WAITING_QUERY)
 async def handle_search_query(message: types.Message, state: FSMContext, services: Services):
 	"""Обработка поискового запроса"""
@@ -154,7 +172,7 @@ async def handle_search_query(message: types.Message, state: FSMContext, service
 		return
 
 	# Выполняем поиск
-	users = await services.user.search_users(search_type, query)
+	users, cursor = await services.user.search_users(search_type, query, SEARCH_PAGE_SIZE)
 
 	if not users:
 		await message.answer("🔍 Пользователи не найдены")
@@ -162,32 +180,56 @@ async def handle_search_query(message: types.Message, state: FSMContext, service
 		return
 
 	# Отправляем результаты
-	if len(users) == 1:
+	if len(users) == 1 and cursor is None:
 		admin = await services.admin.get_admin(message.from_user.id)
 		access_level = admin.level if admin else 0
 
 		# Если найден один пользователь - показываем подробную информацию
-		user_info, is_admin, level = await services.user.format_user_info(users[0])
+		# (поиск по индексу в памяти возвращает только ID и имена)
+		user = await services.user.get_user_by_id(users[0].user_id)
+		if not user:
+			await message.answer("❌ Пользователь не найден")
+			return
+		user_info, is_admin, level = await services.user.format_user_info(user)
 		await message.answer(
 			user_info,
-			reply_markup=AdminKeyboards.profile_menu(users[0], is_admin, level, access_level=access_level)
+			reply_markup=AdminKeyboards.profile_menu(user, is_admin, level, access_level=access_level)
 		)
 
 	else:
-		# Если несколько пользователей - показываем список
-		users_list = "\n".join(
-			f"{i + 1}. @{u.username} - {u.full_name} (ID: <code>{u.user_id}</code>)"
-			for i, u in enumerate(users[:10])  # Ограничиваем 10 результатами
-		)
+		# Если несколько пользователей - показываем первую страницу, следующие - по кнопке
 		await message.answer(
-			f"🔍 Найдено пользователей: {len(users)}\n\n"
-			f"{users_list}\n\n"
-			"Для просмотра подробностей отправьте ID пользователя.",
-			reply_markup=AdminKeyboards.back_to_search()
+			_format_search_page(users, 0, cursor is not None),
+			reply_markup=AdminKeyboards.back_to_search(has_more=cursor is not None)
 		)
+	await state.update_data(search_query=query, search_cursor=cursor, search_shown=len(users))
 	await state.set_state(UserStates.WAITING_ID)
 
 
+@router.callback_query(F.data == "admin_search_more", UserStates.WAITING_ID)
+async def search_more(callback: types.CallbackQuery, state: FSMContext, services: Services):
+	"""Следующая страница результатов поиска"""
+	data = await state.get_data()
+	cursor = data.get("search_cursor")
+	if not cursor:
+		await callback.answer("Больше результатов нет")
+		return
+
+	# Курсор хранится в состоянии FSM как список
+	users, cursor = await services.user.search_users(
+		data.get("search_type"), data.get("search_query", ""), SEARCH_PAGE_SIZE, tuple(cursor)
+	)
+	shown = data.get("search_shown", 0)
+	if users:
+		await callback.message.edit_reply_markup(reply_markup=None)
+		await callback.message.answer(
+			_format_search_page(users, shown, cursor is not None),
+			reply_markup=AdminKeyboards.back_to_search(has_more=cursor is not None)
+		)
+	await state.update_data(search_cursor=cursor, search_shown=shown + len(users))
+	await callback.answer()
+
+
 @router.message(F.text.regexp(r'^\d+$'), UserStates.WAITING_ID)
 async def handle_user_id_input(message: types.Message, services: Services):
 	"""Обработка ввода ID пользователя"""
@@ -242,34 +284,19 @@ async def process_users_format(
 		services: Services
 ):
 	"""Обработка выбора формата и отправка файла"""
-	format_type = callback.data.split("_")[2]  # txt или csv
+	format_type = callback.data.split("_")[2]  # txt, csv, jsonl или npz
 	
 	# Уведомление о начале формирования
 	notification = await callback.message.answer("⏳ Формируем файл...")
 	
-	# Получаем данные
-	content, filename, caption = await services.user.get_users_file(format_type)
-	
-	# Создаем временный файл
-	with open(filename, 'w', encoding='utf-8') as f:
-		f.write(content)
-	
-	# Отправляем файл
+	# Файл формируется из БД по частям прямо во время загрузки
 	try:
-		await callback.message.answer_document(
-			types.FSInputFile(filename),
-			caption=caption
-		)
+		document, caption = services.export.users_file(format_type)
+		await callback.message.answer_document(document, caption=caption)
 	except Exception as e:
 		logger.error(f"Ошибка отправки файла: {e}")
 		await callback.message.answer("❌ Не удалось отправить файл")
 	
-	# Удаляем временный файл
-	try:
-		os.remove(filename)
-	except:
-		pass
-	
 	# Удаляем уведомление
 	await notification.delete()
 	await callback.answer()
@@ -25,7 +25,7 @@ async def welcome_menu(
 	state_data = await state.get_data()
 	if delete_message := state_data.get("delete_message"):
 		try:
-			await delete_message.delete()
+			await callback.bot.delete_message(chat_id=callback.from_user.id, message_id=delete_message)
 		except:
 			pass
 		await state.clear()
@@ -374,7 +374,7 @@ async def preview_welcome(
 		
 		# Сохраняем сообщение для последующего удаления
 		if msg:
-			await state.update_data(delete_message=msg)
+			await state.update_data(delete_message=msg.message_id)
 		await callback.answer()
 	
 	except Exception as e:
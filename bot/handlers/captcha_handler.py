@@ -3,7 +3,7 @@ from datetime import datetime, timedelta
 
 from aiogram import Router, types, F
 from aiogram.fsm.context import FSMContext
-from aiogram.types import Message, FSInputFile, InputMediaPhoto
+from aiogram.types import Message, InputMediaPhoto
 
 from ..keyboards.user_keyboard import UserKeyboards
 from ..services import Services
@@ -31,18 +31,14 @@ async def send_captcha(message: Message, state: FSMContext, services: Services):
 			return
 	user_id = message.from_user.id
 	# Генерируем и отправляем капчу
-	captcha_text, image_path = await services.captcha.generate_captcha(user_id)
+	captcha_text, image = await services.captcha.generate_captcha(user_id)
 
-
-	# Отправляем капчу как файл
 	captcha_message = await message.answer_photo(
-		photo=FSInputFile(image_path),
+		photo=image.as_input(),
 		caption="🔐 Для доступа к боту решите капчу. Введите текст с изображения:",
 		reply_markup=UserKeyboards.captcha_refresh()
 	)
-	# Удаляем файл после отправки
-	await services.captcha.cleanup(image_path)
-	await state.update_data(captcha_message=captcha_message, attemps=attemps, refreshes=refreshes)
+	await state.update_data(captcha_message_id=captcha_message.message_id, attemps=attemps, refreshes=refreshes)
 	await state.set_state(CaptchaStates.WAITING_CAPTCHA)
 
 
@@ -59,9 +55,9 @@ async def check_captcha(message: types.Message, services: Services, state: FSMCo
 	# Проверяем капчу
 	success, response, attemps = await services.captcha.verify_captcha(user_id, user_input)
 
-	# Очищаем временный файл капчи
+	# Сообщение с капчей
 	state_data = await state.get_data()
-	captcha_message: Message = state_data["captcha_message"]
+	captcha_message_id: int = state_data["captcha_message_id"]
 
 	if success:
 		# Обновляем статус пользователя
@@ -73,7 +69,7 @@ async def check_captcha(message: types.Message, services: Services, state: FSMCo
 		if is_subscribed:
 			# # Получаем основной канал
 			channel = await services.channel.get_main_channel()
-			await captcha_message.delete()
+			await message.bot.delete_message(chat_id=message.chat.id, message_id=captcha_message_id)
 			if channel:
 				await services.welcome.send_welcome(user_id, channel)
 
@@ -94,17 +90,17 @@ async def check_captcha(message: types.Message, services: Services, state: FSMCo
 	else:
 		# Если остались попытки, показываем новую капчу
 		if attemps < 3:
-			captcha_text, image_path = await services.captcha.generate_captcha(user_id, attemps=attemps)
-			captcha_message = await captcha_message.edit_media(
-				media=InputMediaPhoto(media=FSInputFile(image_path), caption=f"{response}\n\n🔐 Пожалуйста, попробуйте еще раз. Введите текст с изображения:"),
+			captcha_text, image = await services.captcha.generate_captcha(user_id, attemps=attemps)
+			await message.bot.edit_message_media(
+				chat_id=message.chat.id,
+				message_id=captcha_message_id,
+				media=InputMediaPhoto(media=image.as_input(), caption=f"{response}\n\n🔐 Пожалуйста, попробуйте еще раз. Введите текст с изображения:"),
 				reply_markup=UserKeyboards.captcha_refresh()
 			)
-			# Удаляем файл после отправки
-			await services.captcha.cleanup(image_path)
-			await state.update_data(attemps=attemps, captcha_message=captcha_message)
+			await state.update_data(attemps=attemps)
 		else:
 			await services.user.ban_user(user_id)
-			await captcha_message.delete()
+			await message.bot.delete_message(chat_id=message.chat.id, message_id=captcha_message_id)
 			await message.answer(response)
 
 
@@ -124,14 +120,12 @@ async def refresh_captcha_handler(callback: types.CallbackQuery, services: Servi
 		await state.update_data(ban=get_datetime_now() + timedelta(minutes=1))
 
 	# Генерируем новую капчу
-	captcha_text, image_path = await services.captcha.generate_captcha(user_id, attemps=state_data['attemps'])
+	captcha_text, image = await services.captcha.generate_captcha(user_id, attemps=state_data['attemps'])
 
 	# Отправляем новую капчу
 	await callback.message.edit_media(
-		media=InputMediaPhoto(media=FSInputFile(image_path), caption=caption),
+		media=InputMediaPhoto(media=image.as_input(), caption=caption),
 		reply_markup=markup
 	)
-	# Удаляем файл после отправки
-	await services.captcha.cleanup(image_path)
 	await state.update_data(refreshes=refreshes)
 	await callback.answer()
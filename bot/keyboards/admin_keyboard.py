@@ -115,6 +115,8 @@ class AdminKeyboards:
 		kb = InlineKeyboardBuilder()
 		kb.button(text="📝 Красивый TXT", callback_data="users_format_txt")
 		kb.button(text="📊 Формальный CSV", callback_data="users_format_csv")
+		kb.button(text="🧾 JSON Lines", callback_data="users_format_jsonl")
+		kb.button(text="🧮 Колонки NumPy (.npz)", callback_data="users_format_npz")
 		kb.adjust(1)
 		return kb.as_markup()
 	
@@ -162,10 +164,15 @@ class AdminKeyboards:
 		return builder.as_markup()
 	
 	@staticmethod
-	def back_to_search():
-		"""Кнопка возврата к поиску"""
+	def back_to_search(has_more: bool = False):
+		"""Кнопка возврата к поиску (и следующей страницы результатов)"""
 		builder = InlineKeyboardBuilder()
-		builder.add(InlineKeyboardButton(
+		if has_more:
+			builder.row(InlineKeyboardButton(
+				text="▶ Показать ещё",
+				callback_data="admin_search_more"
+			))
+		builder.row(InlineKeyboardButton(
 			text="🔙 Вернуться к поиску",
 			callback_data="admin_search_menu"
 		))
@@ -496,6 +503,17 @@ class BroadCastKeyboards:
 		kb.adjust(1)
 		return kb.as_markup()
 	
+	@staticmethod
+	def broadcast_progress(broadcast_id: int, paused: bool):
+		kb = InlineKeyboardBuilder()
+		if paused:
+			kb.button(text="▶️ Продолжить", callback_data=f"broadcast_resume:{broadcast_id}")
+		else:
+			kb.button(text="⏸ Пауза", callback_data=f"broadcast_pause:{broadcast_id}")
+		kb.button(text="⛔ Отменить", callback_data=f"broadcast_cancel:{broadcast_id}")
+		kb.adjust(2)
+		return kb.as_markup()
+	
 	@staticmethod
 	def back_to_broadcast():
 		builder = InlineKeyboardBuilder()
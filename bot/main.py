@@ -1,34 +1,37 @@
 from functools import partial
+from typing import Tuple
 
 import asyncpg
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
 from aiogram.exceptions import TelegramNotFound, TelegramBadRequest
-from aiogram.fsm.storage.memory import MemoryStorage
 
 from .config import Config
 from .handlers import register_handlers
 from .middlewares import setup_middlewares
-from .repositories import setup_repositories
+from .repositories import Repositories, setup_repositories
 from .services import setup_services, Services
+from .storages import PostgresStorage
 from .utils.commands import setup_commands, delete_commands
 from .utils.loggers import main_bot as logger
+from .webhook import run_webhook
 
 
-async def start_bot(bot: Bot, dp: Dispatcher):
+async def start_bot(bot: Bot, dp: Dispatcher, repos: Repositories):
 	try:
 		# Создаём зависимости
-		pool = await create_pool()
-		repos = await setup_repositories(pool)
 		services = setup_services(bot, repos)
+		await repos.events.start()
+		dp.storage.start()
 
 		# Сохраняем в bot.data для глобального доступа
 		dp['repos'] = repos
 		dp['services'] = services
 
-		# Ставим команды
-		await setup_commands(bot, services)
+		# Ставим команды (при нескольких воркерах - только в первом)
+		if Config.WORKER_ID == 0:
+			await setup_commands(bot, services)
 
 		# # Настройка middleware
 		setup_middlewares(dp)
@@ -36,6 +39,21 @@ async def start_bot(bot: Bot, dp: Dispatcher):
 		# Регистрация обработчиков
 		register_handlers(dp)
 
+		# Фоновая отрисовка капч и очистка просроченных
+		await services.captcha.start()
+
+		# Счетчики пользователей нужны каждому воркеру, дневные агрегаты пересчитывает один
+		await services.stats.start(rollups=Config.WORKER_ID == 0)
+
+		# Поисковый индекс пользователей (если включен) загружается в фоне
+		await services.user.start()
+
+		if Config.WORKER_ID != 0:
+			return
+
+		# Рассылки отправляет этот воркер: продолжаем прерванные и подхватываем новые от других воркеров
+		await services.broadcast.start_delivery()
+
 		_, super_admins = await services.admin.list_admins()
 
 		for admin in super_admins:
@@ -56,6 +74,15 @@ async def start_bot(bot: Bot, dp: Dispatcher):
 
 async def shutdown_bot(bot: Bot, dp: Dispatcher):
 	services: Services = dp["services"]
+	await services.broadcast.stop()
+	await services.captcha.stop()
+	await services.stats.stop()
+	await services.user.stop()
+	await services.executor.stop()
+	await dp.storage.close()
+	await dp['repos'].events.stop()
+	if Config.WORKER_ID != 0:
+		return
 
 	_, super_admins = await services.admin.list_admins()
 
@@ -75,32 +102,55 @@ async def shutdown_bot(bot: Bot, dp: Dispatcher):
 
 
 async def create_pool():
+	# Воркеры делят между собой лимит подключений к БД
+	pool_size = max(20 // Config.WORKERS, 5)
 	return await asyncpg.create_pool(
 		dsn=f"postgresql://{Config.DB_USER}:{Config.DB_PASS}@{Config.DB_HOST}:{Config.DB_PORT}/{Config.DB_NAME}",
 		# или полный URL
-		min_size=5,  # Минимальное число подключений
-		max_size=20,  # Максимальное число подключений
+		min_size=min(5, pool_size),  # Минимальное число подключений
+		max_size=pool_size,  # Максимальное число подключений
 		timeout=30,  # Таймаут подключения (секунды)
-		command_timeout=60,  # Таймаут выполнения запроса
+		command_timeout=Config.DB_COMMAND_TIMEOUT,  # Таймаут выполнения запроса
 		max_inactive_connection_lifetime=300,  # Закрывать неиспользуемые подключения
 	)
 
 
-async def main():
-	# Инициализация
-	bot = Bot(token=Config.BOT_TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
-	dp = Dispatcher(storage=MemoryStorage())
+def create_bot() -> Bot:
+	return Bot(token=Config.BOT_TOKEN, default=DefaultBotProperties(parse_mode=ParseMode.HTML))
+
+
+async def create_dispatcher(bot: Bot) -> Tuple[Dispatcher, asyncpg.Pool]:
+	"""Dispatcher с хранилищем FSM в БД (пул нужен до Dispatcher)"""
+	pool = await create_pool()
+	repos = await setup_repositories(pool)
+
+	storage = PostgresStorage(repos.fsm)
+	repos.events.share('fsm', storage.cache)
+	dp = Dispatcher(storage=storage)
 
 	# Создаем функции запуска и окончания сеанса с параметрами
-	start = partial(start_bot, bot, dp)
+	start = partial(start_bot, bot, dp, repos)
 	end = partial(shutdown_bot, bot, dp)
 
 	# Регистрируем их
 	dp.startup.register(start)
 	dp.shutdown.register(end)
+	return dp, pool
+
+
+async def main():
+	# Инициализация
+	bot = create_bot()
+	dp, pool = await create_dispatcher(bot)
 
 	try:
 		logger.info("Bot started")
-		await dp.start_polling(bot)
+		if Config.BOT_MODE == 'webhook':
+			await run_webhook(bot, dp)
+		else:
+			# Polling не работает, пока у бота установлен webhook
+			await bot.delete_webhook()
+			await dp.start_polling(bot)
 	finally:
 		await bot.session.close()
+		await pool.close()
@@ -23,7 +23,8 @@ access_map = {
 	'/edit_channels': 2,
 	'/broadcast': 2,
 	'/logs': 3,
-	'/backup': 3
+	'/backup': 3,
+	'/metrics': 3
 }
 
 
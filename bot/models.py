@@ -1,12 +1,12 @@
 # Модели данных
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
 from typing import Optional, List, Tuple
 from .utils.work_with_date import get_datetime_now
 
 
-@dataclass
+@dataclass(slots=True)
 class User:
 	user_id: int
 	username: Optional[str]
@@ -15,11 +15,11 @@ class User:
 	is_banned: bool = False
 	captcha_passed: bool = False
 	should_notify: bool = True  # Получать уведомления о смене канала
-	join_date: datetime = get_datetime_now()
+	join_date: datetime = field(default_factory=get_datetime_now)
 	banned_when: datetime = None
 
 
-@dataclass
+@dataclass(slots=True)
 class Channel:
 	channel_id: int
 	title: str
@@ -29,7 +29,7 @@ class Channel:
 	is_backup: bool = False
 
 
-@dataclass
+@dataclass(slots=True)
 class Admin:
 	user_id: int
 	username: Optional[str]
@@ -37,15 +37,15 @@ class Admin:
 	level: int = 1  # Уровень доступа (1 - базовый, 2 - полный)
 
 
-@dataclass
+@dataclass(slots=True)
 class Captcha:
 	user_id: int
 	text: str
 	attempts: int = 0  # При трех не правильных попытках банить вход на 5 мин
-	created_at: datetime = get_datetime_now()
+	created_at: datetime = field(default_factory=get_datetime_now)
 
 
-@dataclass
+@dataclass(slots=True)
 class Button:
 	id: str
 	text: str
@@ -53,7 +53,7 @@ class Button:
 	value: str
 
 
-@dataclass
+@dataclass(slots=True)
 class MessageTemplate:
 	"""Модель шаблона уведомления о смене канала"""
 	text: str
@@ -65,7 +65,7 @@ class MessageTemplate:
 		return len(self.buttons) > 0
 
 
-@dataclass
+@dataclass(slots=True)
 class BroadcastMessage:
 	text: str
 	media_type: str | None
@@ -76,21 +76,22 @@ class BroadcastMessage:
 	success_count: int = 0
 	error_count: int = 0
 	total_users: int = 0
+	status: str = 'running'  # running, paused, cancelled, done
 	id: int = None
 
 
-@dataclass
+@dataclass(slots=True)
 class ChatMessage:
 	id: int | None
 	user_id: int
 	sender: str
 	message: str
-	created_at: datetime = get_datetime_now()
+	created_at: datetime = field(default_factory=get_datetime_now)
 	is_read: bool = False
 	admin_id: Optional[int] = None
 
 
-@dataclass
+@dataclass(slots=True)
 class ChatDialog:
 	user_id: int
 	full_name: str
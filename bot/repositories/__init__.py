@@ -1,10 +1,15 @@
+from typing import AsyncContextManager
+
 import asyncpg
 
 from .admin_repository import AdminRepository
+from .base_repository import Transaction, transaction
 from .broadcast_repository import BroadcastRepository
-from .captcha_repository import CaptchaRepository
 from .channel_repository import ChannelRepository
 from .chat_repository import ChatRepository
+from .event_bus import EventBus
+from .fsm_repository import FSMRepository
+from .stats_repository import StatsRepository
 from .user_repository import UserRepository
 
 
@@ -12,21 +17,33 @@ class Repositories:
 	"""Контейнер для всех репозиториев"""
 
 	def __init__(self, pool: asyncpg.Pool):
+		self.pool = pool
 		self.user = UserRepository(pool)
 		self.channel = ChannelRepository(pool)
 		self.admin = AdminRepository(pool)
-		self.captcha = CaptchaRepository(pool)
 		self.broadcast = BroadcastRepository(pool)
 		self.chat = ChatRepository(pool)
+		self.fsm = FSMRepository(pool)
+		self.stats = StatsRepository(pool)
+		# Кэши общие для всех воркеров и инстансов: изменение в одном сбрасывает кэш у всех
+		self.events = EventBus(pool)
+		self.events.share('users', self.user.cache)
+		self.events.share('admins', self.admin.cache)
+		self.events.share('channels', self.channel.cache)
+
+	def transaction(self) -> AsyncContextManager[Transaction]:
+		"""Единица работы для нескольких репозиториев: `async with repos.transaction():`"""
+		return transaction(self.pool)
 
 	async def create_tables(self) -> None:
 		"""Создание всех таблиц в БД"""
 		await self.user.create_table()
 		await self.channel.create_table()
 		await self.admin.create_table()
-		await self.captcha.create_table()
 		await self.broadcast.create_table()
 		await self.chat.create_table()
+		await self.fsm.create_table()
+		await self.stats.create_table()
 
 
 async def setup_repositories(pool: asyncpg.Pool) -> Repositories:
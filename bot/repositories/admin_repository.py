@@ -3,13 +3,16 @@ from typing import Optional, List
 import asyncpg
 
 from .base_repository import BaseRepository
+from ..config import Config
 from ..models import Admin
+from ..utils.cache import TTLCache
 
 
 class AdminRepository(BaseRepository[Admin]):
 
 	def __init__(self, pool: asyncpg.Pool):
 		super().__init__(pool, 'admins', Admin)
+		self.cache: TTLCache[Optional[Admin]] = TTLCache(1000, Config.CACHE_TTL)
 
 	async def create_table(self) -> None:
 		"""Создание таблицы администраторов"""
@@ -25,7 +28,10 @@ class AdminRepository(BaseRepository[Admin]):
 		await self._execute(query)
 
 	async def get(self, user_id: int) -> Optional[Admin]:
-		"""Получение администратора по ID"""
+		"""Получение администратора по ID (через кэш)"""
+		return await self.cache.get_or_load(user_id, lambda: self._load(user_id))
+
+	async def _load(self, user_id: int) -> Optional[Admin]:
 		query = f"SELECT * FROM {self.table_name} WHERE user_id = $1"
 		record = await self._fetch(query, user_id)
 		return await self._record_to_model(record)
@@ -42,6 +48,7 @@ class AdminRepository(BaseRepository[Admin]):
 			admin.user_id, admin.username, admin.full_name,
 			admin.level
 		)
+		self.cache.pop(admin.user_id)
 
 	async def update(self, admin: Admin) -> None:
 		"""Обновление данных администратора"""
@@ -56,11 +63,13 @@ class AdminRepository(BaseRepository[Admin]):
 			query,
 			admin.user_id, admin.username, admin.full_name, admin.level
 		)
+		self.cache.pop(admin.user_id)
 
 	async def delete(self, user_id: int) -> None:
 		"""Удаление администратора"""
 		query = f"DELETE FROM {self.table_name} WHERE user_id = $1"
 		await self._execute(query, user_id)
+		self.cache.pop(user_id)
 
 	async def get_all(self) -> List[Admin]:
 		"""Получение всех администраторов"""
@@ -71,8 +80,7 @@ class AdminRepository(BaseRepository[Admin]):
 	async def is_admin(self, user_id: int) -> bool:
 		"""Проверка, является ли пользователь администратором"""
 		query = f"SELECT EXISTS(SELECT 1 FROM {self.table_name} WHERE user_id = $1)"
-		async with self.pool.acquire() as conn:
-			return await conn.fetchval(query, user_id)
+		return await self._fetchval(query, user_id)
 
 	async def get_admins_with_level(self, min_level: int) -> List[Admin]:
 		"""Получение администраторов с минимальным уровнем доступа"""
@@ -84,3 +92,4 @@ class AdminRepository(BaseRepository[Admin]):
 		query = f"""UPDATE {self.table_name} SET level = $1
 					WHERE user_id = $2"""
 		await self._execute(query, level, user_id)
+		self.cache.pop(user_id)
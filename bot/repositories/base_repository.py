@@ -1,11 +1,139 @@
-from typing import TypeVar, Generic, Optional, List, Union
+import asyncio
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncContextManager, AsyncIterator, Callable, Deque, Dict, Generic, List, Optional, Tuple, TypeVar, Union
 
 import asyncpg
 from asyncpg.pool import Pool
 
+from ..config import Config
+from ..utils.loggers import main_bot as logger
+
 
 T = TypeVar('T')
 
+# Границы корзин гистограммы задержек (мс)
+LATENCY_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000, 10000, 30000, 60000)
+
+
+class Statement:
+	"""SQL-запрос с подписью и статистикой выполнения"""
+
+	__slots__ = ('label', 'sql', 'calls', 'total', 'max', 'buckets')
+
+	def __init__(self, label: str, sql: str):
+		self.label = label
+		self.sql = sql
+		self.calls = 0
+		self.total = 0.0  # Секунды
+		self.max = 0.0
+		self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+
+	def record(self, elapsed: float) -> None:
+		self.calls += 1
+		self.total += elapsed
+		self.max = max(self.max, elapsed)
+		self.buckets[bisect_left(LATENCY_BUCKETS, elapsed * 1000)] += 1
+
+	def percentile(self, fraction: float) -> float:
+		"""Оценка перцентиля по гистограмме (верхняя граница корзины, мс)"""
+		threshold = self.calls * fraction
+		seen = 0
+		for bound, count in zip(LATENCY_BUCKETS + (float('inf'),), self.buckets):
+			seen += count
+			if seen >= threshold:
+				return bound
+		return float('inf')
+
+
+class StatementRegistry:
+	"""Реестр запросов: задержки по тексту запроса и журнал медленных запросов.
+
+	Запросы выполняются через обычные conn.fetch/fetchrow/execute: подготовленные выражения
+	кэширует сам asyncpg (на каждом соединении) и сам готовит их заново после смены схемы.
+	"""
+
+	def __init__(self, slow_ms: float = Config.SLOW_QUERY_MS):
+		self.slow_ms = slow_ms
+		self.statements: Dict[str, Statement] = {}
+		self.slow_log: Deque[Tuple[float, str, float]] = deque(maxlen=50)  # (время, запрос, мс)
+
+	def get(self, sql: str, owner: str) -> Statement:
+		"""Выражение по тексту запроса (owner - имя репозитория, для подписи в статистике)"""
+		statement = self.statements.get(sql)
+		if statement is None:
+			text = " ".join(sql.split())
+			label = f"{owner}: {text if len(text) <= 60 else text[:57] + '...'}"
+			statement = self.statements[sql] = Statement(label, sql)
+		return statement
+
+	async def run(self, conn: asyncpg.Connection, statement: Statement, method: str, args: tuple) -> Any:
+		started = time.perf_counter()
+		try:
+			# execute без параметров идет простым протоколом: так можно передать DDL из нескольких команд
+			return await getattr(conn, method)(statement.sql, *args)
+		finally:
+			self._record(statement, time.perf_counter() - started)
+
+	def _record(self, statement: Statement, elapsed: float) -> None:
+		statement.record(elapsed)
+		elapsed_ms = elapsed * 1000
+		if elapsed_ms >= self.slow_ms:
+			self.slow_log.append((time.time(), statement.label, elapsed_ms))
+			logger.warning(
+				f"Медленный запрос {statement.label}: {elapsed_ms:.0f} мс "
+				f"({elapsed / Config.DB_COMMAND_TIMEOUT:.0%} от command_timeout)"
+			)
+
+	def top(self, limit: int = 10) -> List[Statement]:
+		"""Запросы с наибольшим суммарным временем"""
+		return sorted(self.statements.values(), key=lambda s: s.total, reverse=True)[:limit]
+
+
+statements = StatementRegistry()
+
+
+class Transaction:
+	"""Открытая транзакция: закрепленное соединение и действия после ее завершения"""
+
+	__slots__ = ('conn', 'on_close')
+
+	def __init__(self, conn: asyncpg.Connection):
+		self.conn = conn
+		self.on_close: List[Callable[[], Any]] = []
+
+
+_transaction: ContextVar[Optional[Transaction]] = ContextVar('transaction', default=None)
+
+
+@asynccontextmanager
+async def transaction(pool: Pool) -> AsyncIterator[Transaction]:
+	"""Единица работы: запросы репозиториев внутри блока идут через одно соединение в одной транзакции.
+
+	Вложенный блок становится точкой сохранения. Задачи, созданные внутри блока, тоже видят
+	закрепленное соединение, поэтому запускать запросы параллельно внутри транзакции нельзя.
+	"""
+	current = _transaction.get()
+	if current is not None:
+		async with current.conn.transaction():
+			yield current
+		return
+
+	async with pool.acquire() as conn:
+		tx = Transaction(conn)
+		token = _transaction.set(tx)
+		try:
+			async with conn.transaction():
+				yield tx
+		finally:
+			_transaction.reset(token)
+			# И после фиксации, и после отката: кэш мог увидеть незафиксированные данные
+			for callback in tx.on_close:
+				callback()
+
 
 class BaseRepository(Generic[T]):
 	"""Базовый класс репозитория с общими методами"""
@@ -15,25 +143,79 @@ class BaseRepository(Generic[T]):
 		self.table_name = table_name
 		self.model_class = model_class
 
-	async def _execute(self, query: str, *args) -> None:
-		"""Выполнение запроса без возврата результата"""
+	def transaction(self) -> AsyncContextManager[Transaction]:
+		"""Транзакция на пуле репозитория (см. transaction)"""
+		return transaction(self.pool)
+
+	@asynccontextmanager
+	async def _connection(self) -> AsyncIterator[asyncpg.Connection]:
+		tx = _transaction.get()
+		if tx is not None:
+			yield tx.conn
+			return
 		async with self.pool.acquire() as conn:
-			await conn.execute(query, *args)
+			yield conn
+
+	@staticmethod
+	def _invalidate(callback: Callable[[], Any]) -> None:
+		"""Сброс кэша после записи: сразу и, внутри транзакции, еще раз после ее завершения
+		(иначе параллельный запрос успеет закэшировать старые данные до фиксации)"""
+		callback()
+		tx = _transaction.get()
+		if tx is not None:
+			tx.on_close.append(callback)
+
+	async def _run(self, method: str, query: str, args: tuple) -> Any:
+		statement = statements.get(query, self.__class__.__name__)
+		async with self._connection() as conn:
+			return await statements.run(conn, statement, method, args)
+
+	async def _execute(self, query: str, *args) -> str:
+		"""Выполнение запроса без возврата результата (возвращает статус, например 'DELETE 3')"""
+		return await self._run('execute', query, args)
 
 	async def _fetch(self, query: str, *args) -> Optional[asyncpg.Record]:
 		"""Получение одной записи"""
-		async with self.pool.acquire() as conn:
-			return await conn.fetchrow(query, *args)
+		return await self._run('fetchrow', query, args)
 
 	async def _fetch_all(self, query: str, *args) -> List[asyncpg.Record]:
 		"""Получение всех записей"""
-		async with self.pool.acquire() as conn:
-			return await conn.fetch(query, *args)
+		return await self._run('fetch', query, args)
+
+	async def _fetchval(self, query: str, *args) -> Any:
+		"""Получение одного значения"""
+		return await self._run('fetchval', query, args)
+
+	async def _copy_out(self, query: str, **options) -> AsyncIterator[bytes]:
+		"""COPY (query) TO STDOUT: данные отдаются частями по мере получения от сервера"""
+		# Очередь ограничена: пока потребитель не забрал данные, COPY ждет
+		chunks: asyncio.Queue = asyncio.Queue(maxsize=16)
+
+		async def copy() -> None:
+			try:
+				async with self._connection() as conn:
+					await conn.copy_from_query(query, output=chunks.put, **options)
+			finally:
+				await chunks.put(None)
+
+		started = time.perf_counter()
+		task = asyncio.create_task(copy())
+		try:
+			while (chunk := await chunks.get()) is not None:
+				yield chunk
+			await task  # Ошибка COPY пробрасывается потребителю
+			logger.info(f"{self.__class__.__name__}: COPY за {time.perf_counter() - started:.2f} с")
+		finally:
+			if not task.done():
+				task.cancel()
+				await asyncio.gather(task, return_exceptions=True)
 
 	async def _record_to_model(self, record: Optional[asyncpg.Record]) -> Optional[T]:
 		"""Преобразование записи БД в модель"""
-		return self.model_class(**dict(record)) if record else None
+		return self.model_class(**record) if record else None
 
 	async def _records_to_models(self, records: List[asyncpg.Record]) -> List[T]:
 		"""Преобразование списка записей в список моделей"""
-		return [self.model_class(**dict(record)) for record in records]
+		# Record поддерживает распаковку как словарь - промежуточный dict не нужен
+		model_class = self.model_class
+		return [model_class(**record) for record in records]
@@ -1,5 +1,6 @@
 import asyncpg
 import json
+from dataclasses import asdict
 from datetime import datetime
 from typing import List, Optional, Dict, Tuple
 
@@ -28,6 +29,24 @@ class BroadcastRepository(BaseRepository[BroadcastMessage]):
         );
         CREATE INDEX IF NOT EXISTS idx_broadcasts_sent_at ON broadcasts(sent_at);
         CREATE INDEX IF NOT EXISTS idx_broadcasts_sent_by ON broadcasts(sent_by);
+        -- Состояние рассылки и владелец (процесс, который ее отправляет) с отметкой жизни
+        ALTER TABLE broadcasts ADD COLUMN IF NOT EXISTS status TEXT NOT NULL DEFAULT 'running';
+        ALTER TABLE broadcasts ADD COLUMN IF NOT EXISTS owner TEXT;
+        ALTER TABLE broadcasts ADD COLUMN IF NOT EXISTS heartbeat_at TIMESTAMP;
+
+        CREATE TABLE IF NOT EXISTS broadcast_deliveries (
+            broadcast_id INTEGER NOT NULL REFERENCES broadcasts(id) ON DELETE CASCADE,
+            user_id BIGINT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            last_error TEXT,
+            claimed_at TIMESTAMP,
+            PRIMARY KEY (broadcast_id, user_id)
+        );
+        CREATE INDEX IF NOT EXISTS idx_broadcast_deliveries_pending
+            ON broadcast_deliveries(broadcast_id, user_id) WHERE status = 'pending';
+        CREATE INDEX IF NOT EXISTS idx_broadcast_deliveries_sending
+            ON broadcast_deliveries(claimed_at) WHERE status = 'sending';
         """
 		await self._execute(query)
 	
@@ -41,23 +60,22 @@ class BroadcastRepository(BaseRepository[BroadcastMessage]):
         RETURNING id
         """
 		buttons_json = json.dumps([
-			btn.__dict__
+			asdict(btn)
 			for btn in broadcast.buttons
 		])
 		
-		async with self.pool.acquire() as conn:
-			record = await conn.fetchrow(
-				query,
-				broadcast.text,
-				broadcast.media_type,
-				broadcast.media_id,
-				buttons_json,
-				broadcast.sent_at,
-				broadcast.sent_by,
-				broadcast.success_count,
-				broadcast.error_count,
-				broadcast.total_users
-			)
+		record = await self._fetch(
+			query,
+			broadcast.text,
+			broadcast.media_type,
+			broadcast.media_id,
+			buttons_json,
+			broadcast.sent_at,
+			broadcast.sent_by,
+			broadcast.success_count,
+			broadcast.error_count,
+			broadcast.total_users
+		)
 		return record['id'] if record else None
 	
 	async def update_stats(self, broadcast_id: int, success: int, errors: int) -> None:
@@ -70,6 +88,157 @@ class BroadcastRepository(BaseRepository[BroadcastMessage]):
         """
 		await self._execute(query, broadcast_id, success, errors)
 	
+	async def enqueue_recipients(self, broadcast_id: int) -> int:
+		"""Заполнение очереди доставки получателями рассылки"""
+		query = f"""
+        WITH inserted AS (
+            INSERT INTO broadcast_deliveries (broadcast_id, user_id)
+            SELECT $1, user_id FROM users
+            WHERE is_active = TRUE AND is_banned = FALSE AND should_notify = TRUE AND captcha_passed = TRUE
+            ON CONFLICT DO NOTHING
+            RETURNING 1
+        )
+        UPDATE {self.table_name} SET total_users = (SELECT COUNT(*) FROM inserted)
+        WHERE id = $1
+        RETURNING total_users
+        """
+		return await self._fetchval(query, broadcast_id) or 0
+
+	async def claim_batch(self, broadcast_id: int, limit: int) -> List[int]:
+		"""Захват пачки получателей (другие экземпляры бота пропускают захваченные строки)"""
+		query = """
+        UPDATE broadcast_deliveries d
+        SET status = 'sending', attempts = d.attempts + 1, claimed_at = NOW()
+        FROM (
+            SELECT user_id FROM broadcast_deliveries
+            WHERE broadcast_id = $1 AND status = 'pending'
+            ORDER BY user_id
+            LIMIT $2
+            FOR UPDATE SKIP LOCKED
+        ) claimed
+        WHERE d.broadcast_id = $1 AND d.user_id = claimed.user_id
+        RETURNING d.user_id
+        """
+		records = await self._fetch_all(query, broadcast_id, limit)
+		return [record['user_id'] for record in records]
+
+	async def mark_sent(self, broadcast_id: int, user_ids: List[int]) -> None:
+		"""Отметка успешной доставки"""
+		query = """
+        UPDATE broadcast_deliveries SET status = 'sent'
+        WHERE broadcast_id = $1 AND user_id = ANY($2::bigint[])
+        """
+		await self._execute(query, broadcast_id, user_ids)
+
+	async def mark_failed(self, broadcast_id: int, user_ids: List[int], errors: List[str]) -> None:
+		"""Отметка неудачных доставок"""
+		query = """
+        UPDATE broadcast_deliveries d SET status = 'failed', last_error = f.error
+        FROM unnest($2::bigint[], $3::text[]) AS f(user_id, error)
+        WHERE d.broadcast_id = $1 AND d.user_id = f.user_id
+        """
+		await self._execute(query, broadcast_id, user_ids, errors)
+
+	async def cancel_pending(self, broadcast_id: int) -> None:
+		"""Отмена недоставленных сообщений рассылки"""
+		query = """
+        UPDATE broadcast_deliveries SET status = 'cancelled'
+        WHERE broadcast_id = $1 AND status IN ('pending', 'sending')
+        """
+		await self._execute(query, broadcast_id)
+
+	async def acquire(self, broadcast_id: int, owner: str, timeout: float) -> Optional[str]:
+		"""Захват рассылки процессом owner, если у нее нет живого владельца.
+		Возвращает статус рассылки или None, если захватить не удалось"""
+		query = f"""
+        UPDATE {self.table_name} SET owner = $2, heartbeat_at = NOW()
+        WHERE id = $1 AND status IN ('running', 'paused')
+            AND (owner IS NULL OR owner = $2 OR heartbeat_at < NOW() - make_interval(secs => $3))
+        RETURNING status
+        """
+		return await self._fetchval(query, broadcast_id, owner, timeout)
+
+	async def release_claims(self, broadcast_id: int) -> None:
+		"""Возврат в очередь строк, захваченных прошлым владельцем рассылки (вызывается после acquire).
+		Доставки пишутся сразу после отправки, поэтому повторно уйдут только прерванные падением"""
+		query = """
+        UPDATE broadcast_deliveries SET status = 'pending'
+        WHERE broadcast_id = $1 AND status = 'sending'
+        """
+		await self._execute(query, broadcast_id)
+
+	async def heartbeat(self, broadcast_id: int, owner: str) -> Optional[str]:
+		"""Отметка жизни владельца. Возвращает статус рассылки или None, если владелец сменился"""
+		query = f"""
+        UPDATE {self.table_name} SET heartbeat_at = NOW()
+        WHERE id = $1 AND owner = $2
+        RETURNING status
+        """
+		return await self._fetchval(query, broadcast_id, owner)
+
+	async def set_status(self, broadcast_id: int, status: str) -> bool:
+		"""Пауза, продолжение или отмена незавершенной рассылки"""
+		query = f"""
+        UPDATE {self.table_name} SET status = $2
+        WHERE id = $1 AND status IN ('running', 'paused')
+        RETURNING id
+        """
+		return await self._fetchval(query, broadcast_id, status) is not None
+
+	async def finish(self, broadcast_id: int, owner: str, cancelled: bool) -> Optional[str]:
+		"""Освобождение рассылки владельцем. Она завершается, если отменена или очередь пуста,
+		иначе остается в прежнем статусе для возобновления. Возвращает итоговый статус"""
+		query = f"""
+        UPDATE {self.table_name} b SET
+            owner = NULL,
+            status = CASE
+                WHEN $3 THEN 'cancelled'
+                WHEN b.status = 'cancelled' THEN b.status
+                WHEN NOT EXISTS (
+                    SELECT 1 FROM broadcast_deliveries d
+                    WHERE d.broadcast_id = b.id AND d.status IN ('pending', 'sending')
+                ) THEN 'done'
+                ELSE b.status
+            END
+        WHERE id = $1 AND owner = $2
+        RETURNING status
+        """
+		return await self._fetchval(query, broadcast_id, owner, cancelled)
+
+	async def get_unfinished(self, timeout: float) -> List[BroadcastMessage]:
+		"""Незавершенные рассылки без живого владельца, у которых остались недоставленные сообщения"""
+		query = f"""
+        SELECT * FROM {self.table_name} b
+        WHERE status IN ('running', 'paused')
+            AND (owner IS NULL OR heartbeat_at < NOW() - make_interval(secs => $1))
+            AND EXISTS (
+                SELECT 1 FROM broadcast_deliveries d
+                WHERE d.broadcast_id = b.id AND d.status IN ('pending', 'sending')
+            )
+        ORDER BY b.sent_at
+        """
+		records = await self._fetch_all(query, timeout)
+		return await self._records_to_models(records)
+
+	async def sync_stats(self, broadcast_id: int) -> Tuple[int, int]:
+		"""Пересчет статистики рассылки по очереди доставки"""
+		query = f"""
+        UPDATE {self.table_name} b SET
+            success_count = s.sent,
+            error_count = s.failed
+        FROM (
+            SELECT
+                COUNT(*) FILTER (WHERE status = 'sent') AS sent,
+                COUNT(*) FILTER (WHERE status = 'failed') AS failed
+            FROM broadcast_deliveries
+            WHERE broadcast_id = $1
+        ) s
+        WHERE b.id = $1
+        RETURNING b.success_count, b.error_count
+        """
+		record = await self._fetch(query, broadcast_id)
+		return (record['success_count'], record['error_count']) if record else (0, 0)
+
 	async def get_by_id(self, broadcast_id: int) -> Optional[BroadcastMessage]:
 		"""Получение рассылки по ID"""
 		query = f"SELECT * FROM {self.table_name} WHERE id = $1"
@@ -105,7 +274,8 @@ class BroadcastRepository(BaseRepository[BroadcastMessage]):
 			sent_by=record['sent_by'],
 			success_count=record['success_count'],
 			error_count=record['error_count'],
-			total_users=record['total_users']
+			total_users=record['total_users'],
+			status=record['status']
 		)
 	
 	async def _records_to_models(self, records: List[asyncpg.Record]) -> List[BroadcastMessage]:
@@ -3,12 +3,16 @@ from typing import Optional, List
 import asyncpg
 
 from .base_repository import BaseRepository
+from ..config import Config
 from ..models import Channel
+from ..utils.cache import TTLCache
 
 
 class ChannelRepository(BaseRepository[Channel]):
 	def __init__(self, pool: asyncpg.Pool):
 		super().__init__(pool, 'channels', Channel)
+		# Основной и резервный канал: сбрасывается целиком при любом изменении каналов
+		self.cache: TTLCache[Optional[Channel]] = TTLCache(2, Config.CACHE_TTL)
 
 	async def create_table(self) -> None:
 		"""Создание таблицы каналов"""
@@ -39,13 +43,19 @@ class ChannelRepository(BaseRepository[Channel]):
 		return await self._record_to_model(record)
 
 	async def get_main_channel(self) -> Optional[Channel]:
-		"""Получение основного канала"""
+		"""Получение основного канала (через кэш)"""
+		return await self.cache.get_or_load('main', self._load_main_channel)
+
+	async def _load_main_channel(self) -> Optional[Channel]:
 		query = f"SELECT * FROM {self.table_name} WHERE is_main = TRUE LIMIT 1"
 		record = await self._fetch(query)
 		return await self._record_to_model(record)
 
 	async def get_backup_channel(self) -> Optional[Channel]:
-		"""Получение резервного канала"""
+		"""Получение резервного канала (через кэш)"""
+		return await self.cache.get_or_load('backup', self._load_backup_channel)
+
+	async def _load_backup_channel(self) -> Optional[Channel]:
 		query = f"SELECT * FROM {self.table_name} WHERE is_backup = TRUE LIMIT 1"
 		record = await self._fetch(query)
 		return await self._record_to_model(record)
@@ -62,6 +72,7 @@ class ChannelRepository(BaseRepository[Channel]):
 			channel.channel_id, channel.title, channel.username,
 			channel.link, channel.is_main, channel.is_backup
 		)
+		self._invalidate(self.cache.clear)
 
 	async def update(self, channel: Channel) -> None:
 		"""Обновление данных канала"""
@@ -79,32 +90,27 @@ class ChannelRepository(BaseRepository[Channel]):
 			channel.channel_id, channel.title, channel.username,
 			channel.link, channel.is_main, channel.is_backup
 		)
+		self._invalidate(self.cache.clear)
 
 	async def set_main_channel(self, channel_id: int) -> None:
-		"""Установка канала как основного"""
-		# Сначала сбрасываем все main каналы
-		await self._execute(f"UPDATE {self.table_name} SET is_main = FALSE")
-
-		# Затем устанавливаем новый main канал
+		"""Установка канала как основного (одним запросом, без промежуточного состояния без основного канала)"""
 		query = f"""
-        UPDATE {self.table_name} 
-        SET is_main = TRUE, is_backup = FALSE
-        WHERE channel_id = $1
+        UPDATE {self.table_name} SET
+            is_main = (channel_id = $1),
+            is_backup = CASE WHEN channel_id = $1 THEN FALSE ELSE is_backup END
+        WHERE is_main = TRUE OR channel_id = $1
         """
 		await self._execute(query, channel_id)
+		self._invalidate(self.cache.clear)
 
 	async def set_backup_channel(self, channel_id: int) -> None:
-		"""Установка канала как резервного"""
-		# Сначала сбрасываем все backup каналы
-		await self._execute(f"UPDATE {self.table_name} SET is_backup = FALSE")
-
-		# Затем устанавливаем новый backup канал
+		"""Установка канала как резервного (одним запросом)"""
 		query = f"""
-        UPDATE {self.table_name} 
-        SET is_backup = TRUE 
-        WHERE channel_id = $1
+        UPDATE {self.table_name} SET is_backup = (channel_id = $1)
+        WHERE is_backup = TRUE OR channel_id = $1
         """
 		await self._execute(query, channel_id)
+		self._invalidate(self.cache.clear)
 
 	async def get_all(self) -> List[Channel]:
 		"""Получение всех каналов"""
@@ -116,9 +122,4 @@ class ChannelRepository(BaseRepository[Channel]):
 		"""Удаление канала"""
 		query = f"DELETE FROM {self.table_name} WHERE channel_id = $1"
 		await self._execute(query, channel_id)
-
-	async def count_channels(self) -> int:
-		async with self.pool.acquire() as conn:
-			return await conn.fetchval(
-				f"SELECT COUNT(*) FROM {self.table_name}"
-			)
+		self._invalidate(self.cache.clear)
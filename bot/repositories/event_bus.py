@@ -0,0 +1,138 @@
+import asyncio
+import contextvars
+import inspect
+import json
+import uuid
+from functools import partial
+from typing import Any, Callable, Dict, Hashable, List, Optional, Set
+
+import asyncpg
+
+from .base_repository import BaseRepository
+from ..utils.cache import TTLCache
+from ..utils.loggers import main_bot as logger
+
+
+class EventBus(BaseRepository[dict]):
+	"""События между процессами бота (воркерами и инстансами) через LISTEN/NOTIFY.
+
+	Используется для инвалидации кэшей и управления рассылками. Каждый процесс держит одно
+	соединение пула для LISTEN; свои события процесс пропускает.
+	"""
+
+	CHANNEL = 'bot_events'
+	MAX_KEYS = 500  # Больше ключей - сбрасывается весь кэш (лимит NOTIFY - 8000 байт)
+	RECONNECT_DELAY = 5  # Секунды
+
+	def __init__(self, pool: asyncpg.Pool):
+		super().__init__(pool, 'pg_notify', dict)
+		self.instance = uuid.uuid4().hex
+		self._caches: Dict[str, TTLCache] = {}
+		self._handlers: Dict[str, List[Callable[[dict], Any]]] = {}
+		self._task: Optional[asyncio.Task] = None
+		self._pending: Set[asyncio.Task] = set()
+
+	def share(self, name: str, cache: TTLCache) -> None:
+		"""Инвалидации кэша расходятся по всем процессам"""
+		self._caches[name] = cache
+		cache.on_invalidate = partial(self._cache_invalidated, name)
+
+	def subscribe(self, kind: str, handler: Callable[[dict], Any]) -> None:
+		"""Обработчик событий другого процесса (может быть корутиной)"""
+		self._handlers.setdefault(kind, []).append(handler)
+
+	async def publish(self, kind: str, **payload) -> None:
+		"""Отправка события. Внутри транзакции оно уйдет только при фиксации"""
+		message = json.dumps({'kind': kind, 'from': self.instance, **payload})
+		try:
+			await self._execute("SELECT pg_notify($1, $2)", self.CHANNEL, message)
+		except Exception as e:
+			logger.warning(f"Не удалось отправить событие {kind}: {e}")
+
+	def publish_soon(self, kind: str, **payload) -> None:
+		"""Отправка из синхронного кода: отдельной задачей, вне транзакции вызывающего"""
+		try:
+			loop = asyncio.get_running_loop()
+		except RuntimeError:
+			return
+		# Пустой контекст: задача не должна использовать закрепленное соединение транзакции
+		self._spawn(contextvars.Context().run(loop.create_task, self.publish(kind, **payload)))
+
+	def _cache_invalidated(self, name: str, keys: Optional[List[Hashable]]) -> None:
+		if keys is not None and len(keys) > self.MAX_KEYS:
+			keys = None
+		self.publish_soon('cache', name=name, keys=keys)
+
+	async def start(self) -> None:
+		if self._task is None:
+			self._task = asyncio.create_task(self._listen())
+
+	async def stop(self) -> None:
+		if self._task is not None:
+			self._task.cancel()
+			try:
+				await self._task
+			except asyncio.CancelledError:
+				pass
+			self._task = None
+		# Дожидаемся уже запущенных публикаций
+		if self._pending:
+			await asyncio.gather(*self._pending, return_exceptions=True)
+
+	async def _listen(self) -> None:
+		while True:
+			try:
+				async with self.pool.acquire() as conn:
+					lost = asyncio.Event()
+					on_lost = lambda _: lost.set()
+					conn.add_termination_listener(on_lost)
+					await conn.add_listener(self.CHANNEL, self._on_message)
+					try:
+						# Пока никто не слушал, события могли потеряться
+						self._resync()
+						await lost.wait()
+					finally:
+						conn.remove_termination_listener(on_lost)
+						if not conn.is_closed():
+							await conn.remove_listener(self.CHANNEL, self._on_message)
+				logger.warning("Соединение для событий потеряно, переподключение")
+			except asyncio.CancelledError:
+				raise
+			except Exception as e:
+				logger.warning(f"Ошибка подписки на события: {e}")
+			await asyncio.sleep(self.RECONNECT_DELAY)
+
+	def _resync(self) -> None:
+		for cache in self._caches.values():
+			cache.drop(None)
+		self._dispatch({'kind': 'resync'})
+
+	def _on_message(self, conn: asyncpg.Connection, pid: int, channel: str, payload: str) -> None:
+		try:
+			event = json.loads(payload)
+		except ValueError:
+			logger.warning(f"Некорректное событие: {payload[:100]}")
+			return
+		if event.get('from') == self.instance:
+			return
+
+		if event['kind'] == 'cache':
+			cache = self._caches.get(event['name'])
+			if cache is not None:
+				keys = event['keys']
+				# Составные ключи (кортежи) приходят из JSON списками
+				cache.drop(None if keys is None else [tuple(k) if isinstance(k, list) else k for k in keys])
+		self._dispatch(event)
+
+	def _dispatch(self, event: dict) -> None:
+		for handler in self._handlers.get(event['kind'], ()):
+			try:
+				result = handler(event)
+				if inspect.isawaitable(result):
+					self._spawn(asyncio.ensure_future(result))
+			except Exception as e:
+				logger.exception(f"Ошибка обработки события {event['kind']}: {e}")
+
+	def _spawn(self, task: asyncio.Future) -> None:
+		self._pending.add(task)
+		task.add_done_callback(self._pending.discard)
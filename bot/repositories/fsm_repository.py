@@ -0,0 +1,71 @@
+from typing import Optional, Tuple
+
+import asyncpg
+
+from .base_repository import BaseRepository
+
+
+class FSMRepository(BaseRepository[dict]):
+	"""Хранение состояний FSM (состояние + данные в JSONB)"""
+
+	def __init__(self, pool: asyncpg.Pool):
+		super().__init__(pool, 'fsm_state', dict)
+
+	async def create_table(self) -> None:
+		"""Создание таблицы состояний FSM"""
+		query = """
+        CREATE TABLE IF NOT EXISTS fsm_state (
+            key TEXT PRIMARY KEY,
+            state TEXT,
+            data JSONB NOT NULL DEFAULT '{}',
+            updated_at TIMESTAMP DEFAULT NOW()
+        );
+        CREATE INDEX IF NOT EXISTS idx_fsm_state_updated ON fsm_state(updated_at);
+        """
+		await self._execute(query)
+
+	async def get(self, key: str) -> Optional[Tuple[Optional[str], str]]:
+		"""Состояние и данные (JSON-строка) по ключу"""
+		query = f"SELECT state, data::text AS data FROM {self.table_name} WHERE key = $1"
+		record = await self._fetch(query, key)
+		return (record['state'], record['data']) if record else None
+
+	async def set_state(self, key: str, state: Optional[str]) -> Tuple[Optional[str], str]:
+		"""Запись состояния (данные не трогаются). Возвращает строку целиком после записи"""
+		query = f"""
+        INSERT INTO {self.table_name} (key, state, updated_at)
+        VALUES ($1, $2, NOW())
+        ON CONFLICT (key) DO UPDATE SET
+            state = EXCLUDED.state,
+            updated_at = EXCLUDED.updated_at
+        RETURNING state, data::text AS data
+        """
+		record = await self._fetch(query, key, state)
+		return record['state'], record['data']
+
+	async def set_data(self, key: str, data: str) -> Tuple[Optional[str], str]:
+		"""Запись данных (состояние не трогается). Возвращает строку целиком после записи"""
+		query = f"""
+        INSERT INTO {self.table_name} (key, data, updated_at)
+        VALUES ($1, $2::jsonb, NOW())
+        ON CONFLICT (key) DO UPDATE SET
+            data = EXCLUDED.data,
+            updated_at = EXCLUDED.updated_at
+        RETURNING state, data::text AS data
+        """
+		record = await self._fetch(query, key, data)
+		return record['state'], record['data']
+
+	async def delete_empty(self, key: str) -> None:
+		"""Удаление строки без состояния и данных"""
+		query = f"DELETE FROM {self.table_name} WHERE key = $1 AND state IS NULL AND data = '{{}}'::jsonb"
+		await self._execute(query, key)
+
+	async def delete_expired(self, ttl_days: int) -> int:
+		"""Удаление давно не изменявшихся состояний"""
+		query = f"""
+        DELETE FROM {self.table_name}
+        WHERE updated_at < NOW() - make_interval(days => $1)
+        """
+		result = await self._execute(query, ttl_days)
+		return int(result.split()[-1])
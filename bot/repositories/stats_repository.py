@@ -0,0 +1,108 @@
+from datetime import date
+from typing import Dict, List, Optional
+
+import asyncpg
+
+from .base_repository import BaseRepository
+
+
+class StatsRepository(BaseRepository[dict]):
+	"""Сводная статистика: общие счетчики одним запросом и дневные агрегаты в user_stats_daily"""
+
+	def __init__(self, pool: asyncpg.Pool):
+		super().__init__(pool, 'user_stats_daily', dict)
+
+	async def create_table(self) -> None:
+		"""Создание таблицы дневных агрегатов и индексов по датам пользователей"""
+		query = """
+        CREATE TABLE IF NOT EXISTS user_stats_daily (
+            day DATE PRIMARY KEY,
+            new_users INTEGER NOT NULL DEFAULT 0,
+            active_users INTEGER NOT NULL DEFAULT 0,
+            banned_users INTEGER NOT NULL DEFAULT 0,
+            refreshed_at TIMESTAMP DEFAULT NOW()
+        );
+        CREATE INDEX IF NOT EXISTS idx_users_join_date ON users(join_date);
+        CREATE INDEX IF NOT EXISTS idx_users_banned_when ON users(banned_when) WHERE banned_when IS NOT NULL;
+        """
+		await self._execute(query)
+
+	async def get_totals(self) -> Dict[str, int]:
+		"""Все счетчики пользователей и каналов за один проход по таблице"""
+		query = """
+        SELECT
+            COUNT(*) AS total_users,
+            COUNT(*) FILTER (WHERE is_active = TRUE AND is_banned = FALSE) AS active_users,
+            COUNT(*) FILTER (WHERE is_banned = TRUE) AS banned_users,
+            COUNT(*) FILTER (
+                WHERE is_active = TRUE AND is_banned = FALSE AND should_notify = TRUE AND captcha_passed = TRUE
+            ) AS notifiable_users,
+            (SELECT COUNT(*) FROM channels) AS channels_count
+        FROM users
+        """
+		return dict(await self._fetch(query))
+
+	async def count_channels(self) -> int:
+		return await self._fetchval("SELECT COUNT(*) FROM channels")
+
+	async def refresh(self, start: date, end: date) -> None:
+		"""Пересчет агрегатов за дни с start по end включительно (по индексам дат, без полного прохода)"""
+		query = f"""
+        WITH days AS (
+            SELECT generate_series($1::date, $2::date, interval '1 day')::date AS day
+        ),
+        joined AS (
+            SELECT join_date::date AS day,
+                COUNT(*) AS new_users,
+                COUNT(*) FILTER (WHERE is_active = TRUE) AS active_users
+            FROM users
+            WHERE join_date >= $1::date AND join_date < $2::date + 1
+            GROUP BY 1
+        ),
+        banned AS (
+            SELECT banned_when::date AS day, COUNT(*) AS banned_users
+            FROM users
+            WHERE is_banned = TRUE AND banned_when >= $1::date AND banned_when < $2::date + 1
+            GROUP BY 1
+        )
+        INSERT INTO {self.table_name} (day, new_users, active_users, banned_users, refreshed_at)
+        SELECT days.day, COALESCE(j.new_users, 0), COALESCE(j.active_users, 0), COALESCE(b.banned_users, 0), NOW()
+        FROM days
+        LEFT JOIN joined j USING (day)
+        LEFT JOIN banned b USING (day)
+        ON CONFLICT (day) DO UPDATE SET
+            new_users = EXCLUDED.new_users,
+            active_users = EXCLUDED.active_users,
+            banned_users = EXCLUDED.banned_users,
+            refreshed_at = EXCLUDED.refreshed_at
+        """
+		await self._execute(query, start, end)
+
+	async def get_first_day(self) -> Optional[date]:
+		"""Дата регистрации первого пользователя"""
+		return await self._fetchval("SELECT MIN(join_date)::date FROM users")
+
+	async def get_last_refreshed_day(self) -> Optional[date]:
+		return await self._fetchval(f"SELECT MAX(day) FROM {self.table_name}")
+
+	async def sum_period(self, start: date, end: date) -> Dict[str, int]:
+		"""Сумма агрегатов за дни с start по end (не включая end)"""
+		query = f"""
+        SELECT
+            COALESCE(SUM(new_users), 0)::int AS new_users,
+            COALESCE(SUM(active_users), 0)::int AS active_users,
+            COALESCE(SUM(banned_users), 0)::int AS banned_users
+        FROM {self.table_name}
+        WHERE day >= $1 AND day < $2
+        """
+		return dict(await self._fetch(query, start, end))
+
+	async def get_days(self, start: date, end: date) -> List[asyncpg.Record]:
+		"""Агрегаты по дням с start по end (не включая end)"""
+		query = f"""
+        SELECT day, new_users, active_users, banned_users
+        FROM {self.table_name}
+        WHERE day >= $1 AND day < $2
+        ORDER BY day
+        """
+		return await self._fetch_all(query, start, end)
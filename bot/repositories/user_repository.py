@@ -1,15 +1,29 @@
+import re
 from datetime import datetime
-from typing import Optional, List
+from typing import AsyncIterator, Optional, List, Tuple
 
 import asyncpg
 
 from .base_repository import BaseRepository
+from ..config import Config
 from ..models import User
+from ..utils.cache import TTLCache
+from ..utils.columns import USER_FLAGS, UserColumns
+from ..utils.counters import FlagChange
+from ..utils.loggers import main_bot as logger
+
+
+# Позиция в выдаче поиска: (ранг, user_id) последнего показанного пользователя
+SearchCursor = Tuple[float, int]
 
 
 class UserRepository(BaseRepository[User]):
+	SEARCH_FIELDS = ('username', 'full_name')
+
 	def __init__(self, pool: asyncpg.Pool):
 		super().__init__(pool, 'users', User)
+		self.cache: TTLCache[Optional[User]] = TTLCache(Config.CACHE_SIZE, Config.CACHE_TTL)
+		self.trigram = False  # Есть ли триграммные индексы (выясняется в create_table)
 
 	async def create_table(self) -> None:
 		"""Создание таблицы пользователей"""
@@ -27,37 +41,111 @@ class UserRepository(BaseRepository[User]):
         );
         CREATE INDEX IF NOT EXISTS idx_users_active ON users(is_active);
         CREATE INDEX IF NOT EXISTS idx_users_banned ON users(is_banned);
+        CREATE INDEX IF NOT EXISTS idx_users_notify ON users(user_id)
+            WHERE is_active = TRUE AND is_banned = FALSE AND should_notify = TRUE AND captcha_passed = TRUE;
         """
 		await self._execute(query)
+		await self._create_search_indexes()
+
+	async def _create_search_indexes(self) -> None:
+		"""Индексы для поиска: триграммные GIN (pg_trgm), а без расширения - по префиксу username и словам имени"""
+		try:
+			await self._execute("""
+            CREATE EXTENSION IF NOT EXISTS pg_trgm;
+            CREATE INDEX IF NOT EXISTS idx_users_username_trgm ON users USING GIN (LOWER(username) gin_trgm_ops);
+            CREATE INDEX IF NOT EXISTS idx_users_full_name_trgm ON users USING GIN (LOWER(full_name) gin_trgm_ops);
+            """)
+			self.trigram = True
+		except asyncpg.PostgresError as e:
+			# Расширение мог одновременно создавать другой воркер
+			self.trigram = await self._fetchval("SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')")
+			if self.trigram:
+				return
+			# Например, нет прав на CREATE EXTENSION: ищутся только префиксы username и начала слов имени
+			logger.warning(f"pg_trgm is unavailable, falling back to prefix indexes: {e}")
+			await self._execute("""
+            CREATE INDEX IF NOT EXISTS idx_users_username_lower ON users(LOWER(username) text_pattern_ops);
+            DROP INDEX IF EXISTS idx_users_full_name_lower;
+            CREATE INDEX IF NOT EXISTS idx_users_full_name_words ON users USING GIN (to_tsvector('simple', full_name));
+            """)
 
 	async def get_by_id(self, user_id: int) -> Optional[User]:
-		"""Получение пользователя по ID"""
+		"""Получение пользователя по ID (через кэш)"""
+		return await self.cache.get_or_load(user_id, lambda: self._load(user_id))
+
+	async def _load(self, user_id: int) -> Optional[User]:
 		query = f"SELECT * FROM {self.table_name} WHERE user_id = $1"
 		record = await self._fetch(query, user_id)
 		return await self._record_to_model(record)
 
-	async def get_by_username(self, query: str, limit: int = 12) -> List[User]:
-		"""Поиск пользователей по username (без @)"""
-		query = query.lower().strip()
-		sql = f"""
-	    SELECT * FROM {self.table_name}
-	    WHERE username IS NOT NULL 
-	    AND LOWER(username) LIKE $1 || '%'
-	    LIMIT $2
-	    """
-		records = await self._fetch_all(sql, query, limit)
-		return await self._records_to_models(records)
+	async def search(
+			self,
+			field: str,
+			query: str,
+			limit: int = 10,
+			after: Optional[SearchCursor] = None
+	) -> Tuple[List[User], Optional[SearchCursor]]:
+		"""Поиск по username или full_name с ранжированием и постраничной выдачей
+
+		Сначала совпадения с начала строки, затем по похожести (pg_trgm). Возвращает страницу
+		и курсор следующей страницы (None, если она последняя). Курсор (ранг, user_id) только
+		отсекает показанное: ранг вычисляется в запросе, поэтому каждая страница заново
+		ранжирует и сортирует все совпадения.
+		"""
+		if field not in self.SEARCH_FIELDS:
+			raise ValueError(f"Unknown search field: {field}")
+		sql, args = self._search_query(field, query, limit, after)
+		if sql is None:
+			return [], None
+		records = await self._fetch_all(sql, *args)
+
+		model_class = self.model_class
+		users = [model_class(**{k: v for k, v in record.items() if k != 'rank'}) for record in records[:limit]]
+		cursor = (records[limit - 1]['rank'], records[limit - 1]['user_id']) if len(records) > limit else None
+		return users, cursor
 
-	async def get_by_nickname(self, query: str, limit: int = 12) -> List[User]:
-		"""Поиск пользователей по nickname (имя + фамилия)"""
+	def _search_query(
+			self,
+			field: str,
+			query: str,
+			limit: int,
+			after: Optional[SearchCursor]
+	) -> Tuple[Optional[str], list]:
+		"""SQL и параметры страницы поиска (None, если искать нечего)"""
+		column = f"LOWER({field})"
 		query = query.lower().strip()
+		pattern = query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+		last_rank, last_id = after if after else (None, 0)
+		args = [last_rank, last_id, limit + 1, pattern]
+
+		if self.trigram:
+			# Вхождение и похожесть (оператор %) проверяются по GIN-индексу
+			rank = f"(({column} LIKE $4 || '%')::int + similarity({column}, $5))::real"
+			condition = f"({column} LIKE '%' || $4 || '%' OR {column} % $5)"
+			args.append(query)
+		elif field == 'username':
+			rank = f"({column} LIKE $4 || '%')::int::real"
+			# По username ищется только префикс - его покрывает индекс text_pattern_ops
+			condition = f"{column} LIKE $4 || '%'"
+		else:
+			# По имени - начала слов в любом порядке ("петр", "мария кузн") по GIN-индексу tsvector
+			words = re.findall(r'[^\W_]+', query)
+			if not words:
+				return None, []
+			rank = f"({column} LIKE $4 || '%')::int::real"
+			condition = f"to_tsvector('simple', {field}) @@ to_tsquery('simple', $5)"
+			args.append(" & ".join(f"{word}:*" for word in words))
+
 		sql = f"""
-	    SELECT * FROM {self.table_name}
-	    WHERE LOWER(full_name) LIKE '%' || $1 || '%'
-	    LIMIT $2
-	    """
-		records = await self._fetch_all(sql, query, limit)
-		return await self._records_to_models(records)
+        SELECT * FROM (
+            SELECT *, {rank} AS rank FROM {self.table_name}
+            WHERE {field} IS NOT NULL AND {condition}
+        ) found
+        WHERE $1::real IS NULL OR rank < $1 OR (rank = $1 AND user_id > $2)
+        ORDER BY rank DESC, user_id
+        LIMIT $3
+        """
+		return sql, args
 
 	async def create(self, user: User) -> None:
 		"""Создание нового пользователя"""
@@ -71,6 +159,7 @@ class UserRepository(BaseRepository[User]):
 			user.user_id, user.username, user.full_name, user.is_active,
 			user.is_banned, user.captcha_passed, user.should_notify, user.join_date
 		)
+		self.cache.pop(user.user_id)
 
 	async def update(self, user: User) -> None:
 		"""Обновление данных пользователя"""
@@ -89,6 +178,7 @@ class UserRepository(BaseRepository[User]):
 			user.user_id, user.username, user.full_name, user.is_active,
 			user.is_banned, user.captcha_passed, user.should_notify
 		)
+		self.cache.pop(user.user_id)
 
 	async def get_all(self) -> List[User]:
 		"""Получение всех пользователей"""
@@ -96,6 +186,102 @@ class UserRepository(BaseRepository[User]):
 		records = await self._fetch_all(query)
 		return await self._records_to_models(records)
 
+	async def iter_pages(self, batch_size: int = 1000) -> AsyncIterator[List[User]]:
+		"""Постраничное чтение всех пользователей (keyset-пагинация по user_id)"""
+		query = f"SELECT * FROM {self.table_name} WHERE user_id > $1 ORDER BY user_id LIMIT $2"
+		last_id = -(2 ** 63)
+		while True:
+			records = await self._fetch_all(query, last_id, batch_size)
+			if records:
+				yield await self._records_to_models(records)
+			if len(records) < batch_size:
+				return
+			last_id = records[-1]['user_id']
+
+	async def iter_names(self, batch_size: int = 10_000) -> AsyncIterator[List[asyncpg.Record]]:
+		"""Постраничное чтение (user_id, username, full_name, join_date) всех пользователей - для поискового индекса"""
+		query = f"""
+        SELECT user_id, username, full_name, join_date FROM {self.table_name}
+        WHERE user_id > $1
+        ORDER BY user_id
+        LIMIT $2
+        """
+		last_id = -(2 ** 63)
+		while True:
+			records = await self._fetch_all(query, last_id, batch_size)
+			if records:
+				yield records
+			if len(records) < batch_size:
+				return
+			last_id = records[-1]['user_id']
+
+	async def get_names_since(self, since: datetime) -> List[asyncpg.Record]:
+		"""(user_id, username, full_name, join_date) пользователей, пришедших начиная с since"""
+		query = f"""
+        SELECT user_id, username, full_name, join_date FROM {self.table_name}
+        WHERE join_date >= $1
+        """
+		return await self._fetch_all(query, since)
+
+	def copy_csv(self) -> AsyncIterator[bytes]:
+		"""Все пользователи в CSV, сформированном самим PostgreSQL (COPY)"""
+		query = f"""
+        SELECT
+            user_id AS "ID",
+            full_name AS "Full Name",
+            COALESCE('@' || username, '') AS "Username",
+            to_char(join_date, 'YYYY-MM-DD HH24:MI') AS "Registration Date",
+            CASE WHEN is_active THEN 'Yes' ELSE 'No' END AS "Is Active",
+            CASE WHEN should_notify THEN 'Yes' ELSE 'No' END AS "Notifications"
+        FROM {self.table_name}
+        ORDER BY user_id
+        """
+		return self._copy_out(query, format='csv', header=True)
+
+	def copy_jsonl(self) -> AsyncIterator[bytes]:
+		"""Все пользователи в JSON Lines (объект на строку) через COPY"""
+		query = f"""
+        SELECT json_build_object(
+            'user_id', user_id,
+            'username', username,
+            'full_name', full_name,
+            'join_date', join_date,
+            'banned_when', banned_when,
+            'is_active', is_active,
+            'is_banned', is_banned,
+            'captcha_passed', captcha_passed,
+            'should_notify', should_notify
+        )::text
+        FROM {self.table_name}
+        ORDER BY user_id
+        """
+		# В JSON нет переводов строк и управляющих символов, поэтому при таких кавычке и
+		# разделителе CSV-режим выводит строки как есть (текстовый режим удвоил бы обратные слэши)
+		return self._copy_out(query, format='csv', quote='\x01', delimiter='\x02')
+
+	async def get_columns(self, batch_size: int = 10_000) -> UserColumns:
+		"""Все пользователи в колоночном виде (без создания объекта на каждого)
+
+		Флаги упаковываются в одно число на стороне БД, страницы читаются по user_id,
+		поэтому одновременно в памяти не больше batch_size записей asyncpg.
+		"""
+		flags = " | ".join(f"(({name} IS TRUE)::int << {bit})" for bit, name in enumerate(USER_FLAGS))
+		query = f"""
+        SELECT user_id, EXTRACT(EPOCH FROM join_date)::float8, {flags}
+        FROM {self.table_name}
+        WHERE user_id > $1
+        ORDER BY user_id
+        LIMIT $2
+        """
+		columns = UserColumns()
+		last_id = -(2 ** 63)
+		while True:
+			records = await self._fetch_all(query, last_id, batch_size)
+			columns.extend(records)
+			if len(records) < batch_size:
+				return columns
+			last_id = columns.user_ids[-1]
+
 	async def get_active_users(self) -> List[User]:
 		"""Получение активных пользователей"""
 		query = f"""
@@ -114,47 +300,95 @@ class UserRepository(BaseRepository[User]):
 		records = await self._fetch_all(query)
 		return await self._records_to_models(records)
 
-	async def ban_user(self, user_id: int) -> None:
-		"""Блокировка пользователя"""
+	async def iter_notification_ids(self, batch_size: int = 1000) -> AsyncIterator[int]:
+		"""Потоковое получение ID пользователей для уведомлений (keyset-пагинация по user_id)"""
 		query = f"""
-        UPDATE {self.table_name} 
-        SET is_banned = TRUE, is_active = FALSE, banned_when = now()
-        WHERE user_id = $1
+        SELECT user_id FROM {self.table_name}
+        WHERE is_active = TRUE AND is_banned = FALSE AND should_notify = TRUE AND captcha_passed = TRUE
+            AND user_id > $1
+        ORDER BY user_id
+        LIMIT $2
         """
-		await self._execute(query, user_id)
+		last_id = -(2 ** 63)
+		while True:
+			user_ids = [record['user_id'] for record in await self._fetch_all(query, last_id, batch_size)]
+			if not user_ids:
+				return
+			for user_id in user_ids:
+				yield user_id
+			if len(user_ids) < batch_size:
+				return
+			last_id = user_ids[-1]
 
-	async def unban_user(self, user_id: int) -> None:
-		"""Разблокировка пользователя"""
+	async def count_users_for_notification(self) -> int:
+		"""Количество пользователей, которым нужно отправлять уведомления"""
 		query = f"""
-        UPDATE {self.table_name} 
-        SET is_banned = FALSE, is_active = TRUE, banned_when = null;
-        WHERE user_id = $1
+		SELECT COUNT(*) FROM {self.table_name}
+		WHERE is_active = TRUE AND is_banned = FALSE AND should_notify = TRUE AND captcha_passed = TRUE
+		"""
+		return await self._fetchval(query)
+
+	def _flags_update(self, assignments: str) -> str:
+		"""UPDATE пользователей из $1, возвращающий флаги до и после изменения (для счетчиков)"""
+		return f"""
+        UPDATE {self.table_name} u SET {assignments}
+        FROM (
+            SELECT user_id, {", ".join(USER_FLAGS)} FROM {self.table_name}
+            WHERE user_id = ANY($1::bigint[])
+            FOR UPDATE
+        ) old
+        WHERE u.user_id = old.user_id
+        RETURNING {", ".join(f"old.{name}" for name in USER_FLAGS)}, {", ".join(f"u.{name}" for name in USER_FLAGS)}
         """
-		await self._execute(query, user_id)
 
-	async def set_notification_status(self, user_id: int, status: bool) -> None:
+	@staticmethod
+	def _flag_changes(records: List[asyncpg.Record]) -> List[FlagChange]:
+		size = len(USER_FLAGS)
+		changes = []
+		for record in records:
+			values = tuple(record)
+			changes.append((values[:size], values[size:]))
+		return changes
+
+	async def ban_user(self, user_id: int) -> List[FlagChange]:
+		"""Блокировка пользователя"""
+		query = self._flags_update("is_banned = TRUE, is_active = FALSE, banned_when = now()")
+		records = await self._fetch_all(query, [user_id])
+		self.cache.pop(user_id)
+		return self._flag_changes(records)
+
+	async def ban_users(self, user_ids: List[int]) -> List[FlagChange]:
+		"""Блокировка пользователей, недоступных для отправки (одним запросом)"""
+		query = self._flags_update("should_notify = FALSE, is_banned = TRUE, is_active = FALSE, banned_when = now()")
+		records = await self._fetch_all(query, user_ids)
+		self.cache.pop_many(user_ids)
+		return self._flag_changes(records)
+
+	async def unban_user(self, user_id: int) -> List[FlagChange]:
+		"""Разблокировка пользователя"""
+		query = self._flags_update("is_banned = FALSE, is_active = TRUE, banned_when = null")
+		records = await self._fetch_all(query, [user_id])
+		self.cache.pop(user_id)
+		return self._flag_changes(records)
+
+	async def set_notification_status(self, user_id: int, status: bool) -> List[FlagChange]:
 		"""Установка статуса уведомлений для пользователя"""
-		query = f"""
-        UPDATE {self.table_name} 
-        SET should_notify = $2 
-        WHERE user_id = $1
-        """
-		await self._execute(query, user_id, status)
+		query = self._flags_update("should_notify = $2")
+		records = await self._fetch_all(query, [user_id], status)
+		self.cache.pop(user_id)
+		return self._flag_changes(records)
 
-	async def mark_captcha_passed(self, user_id: int) -> None:
+	async def mark_captcha_passed(self, user_id: int) -> List[FlagChange]:
 		"""Отметка прохождения капчи пользователем"""
-		query = f"""
-        UPDATE {self.table_name} 
-        SET captcha_passed = TRUE 
-        WHERE user_id = $1
-        """
-		await self._execute(query, user_id)
+		query = self._flags_update("captcha_passed = TRUE")
+		records = await self._fetch_all(query, [user_id])
+		self.cache.pop(user_id)
+		return self._flag_changes(records)
 
 	async def count_users(self) -> int:
 		"""Получение общего количества пользователей"""
 		query = f"SELECT COUNT(*) FROM {self.table_name}"
-		async with self.pool.acquire() as conn:
-			return await conn.fetchval(query)
+		return await self._fetchval(query)
 
 	async def count_active_users(self) -> int:
 		"""Получение активных пользователей"""
@@ -162,58 +396,4 @@ class UserRepository(BaseRepository[User]):
 		SELECT COUNT(*) FROM {self.table_name} 
 		WHERE is_active = TRUE AND is_banned = FALSE
 		"""
-		async with self.pool.acquire() as conn:
-			return await conn.fetchval(query)
-
-	async def count_banned_users(self) -> List[User]:
-		async with self.pool.acquire() as conn:
-			return await conn.fetchval(
-				f"SELECT COUNT(*) FROM {self.table_name} WHERE is_banned = TRUE"
-			)
-
-	async def count_users_period(self, start_date: datetime, end_date: datetime) -> int:
-		"""Количество новых пользователей за период"""
-		async with self.pool.acquire() as conn:
-			return await conn.fetchval(
-				f"SELECT COUNT(*) FROM {self.table_name} WHERE join_date BETWEEN $1 AND $2",
-				start_date, end_date
-			)
-
-	async def count_active_period(self, start_date: datetime, end_date: datetime) -> int:
-		"""Количество активных пользователей за период"""
-		async with self.pool.acquire() as conn:
-			return await conn.fetchval(
-				f"SELECT COUNT(*) FROM {self.table_name} WHERE is_active = TRUE AND join_date BETWEEN $1 AND $2",
-				start_date, end_date
-			)
-
-	async def count_banned_period(self, start_date: datetime, end_date: datetime) -> int:
-		"""Количество забаненных пользователей за период"""
-		async with self.pool.acquire() as conn:
-			return await conn.fetchval(
-				f"SELECT COUNT(*) FROM {self.table_name} WHERE is_banned = TRUE AND banned_when BETWEEN $1 AND $2",
-				start_date, end_date
-			)
-	
-	async def get_all_users_formatted(self) -> str:
-		"""Получение всех пользователей в формате для TXT файла"""
-		query = f"SELECT * FROM {self.table_name}"
-		records = await self._fetch_all(query)
-		
-		if not records:
-			return ""
-		
-		result = []
-		for record in records:
-			user = await self._record_to_model(record)
-			result.append(
-				f"ID: {user.user_id}\n"
-				f"Username: @{user.username if user.username else 'нет'}\n"
-				f"Имя: {user.full_name}\n"
-				f"Дата регистрации: {user.join_date.strftime('%d.%m.%Y %H:%M')}\n"
-				f"Активен: {'🟢 Да' if user.is_active else '🔴 Нет'}\n"
-				f"Уведомления: {'🟢 Включены' if user.should_notify else '🔴 Выключены'}\n"
-				"----------------------------------------"
-			)
-		
-		return "\n\n".join(result)
\ No newline at end of file
+		return await self._fetchval(query)
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from aiogram import Bot
 
 from .admin_service import AdminService
@@ -5,12 +7,20 @@ from .broadcast_service import BroadcastService
 from .captcha_service import CaptchaService
 from .channel_service import ChannelService
 from .chat_service import ChatService
+from .executor_service import ExecutorService
+from .export_service import ExportService
 from .message_service import MessageService
 from .notifier_service import NotificationService
+from .sender_service import SenderService
+from .stats_service import StatsService
 from .subscriber_service import SubscriptionService
 from .user_service import UserService
 from .welcome_service import WelcomeService
+from ..config import Config
 from ..repositories import Repositories
+from ..storages import create_captcha_store
+from ..utils.counters import UserCounters
+from ..utils.search_index import UserSearchIndex
 from .chat_service import ChatService
 
 
@@ -18,14 +28,23 @@ class Services:
 	"""Контейнер для всех сервисов"""
 
 	def __init__(self, bot: Bot, repos: Repositories):
-		self.captcha: CaptchaService = CaptchaService(repos.captcha)
+		self.executor: ExecutorService = ExecutorService()
+		# Счетчики пользователей общие для всех сервисов, которые меняют пользователей
+		self.counters: UserCounters = UserCounters()
+		self.search_index: Optional[UserSearchIndex] = UserSearchIndex() if Config.SEARCH_INDEX else None
+		# Рассылки и уведомления отправляет только воркер доставки (WORKER_ID 0), поэтому лимит целиком его
+		self.sender: SenderService = SenderService(rate=Config.BROADCAST_RATE)
+		self.captcha: CaptchaService = CaptchaService(create_captcha_store(), self.executor)
 		self.channel: ChannelService = ChannelService(bot, repos.channel)
-		self.notification: NotificationService = NotificationService(bot, repos)
-		self.subscriber: SubscriptionService = SubscriptionService(bot, repos.user, repos.channel)
-		self.user: UserService = UserService(repos.user, admin_repo=repos.admin)
+		repos.events.share('subscriptions', self.channel.subscriptions)
+		self.notification: NotificationService = NotificationService(bot, repos, self.sender, self.counters, repos.events)
+		self.subscriber: SubscriptionService = SubscriptionService(bot, repos.user, self.channel, self.counters, self.search_index)
+		self.user: UserService = UserService(repos.user, admin_repo=repos.admin, counters=self.counters, search_index=self.search_index)
 		self.admin: AdminService = AdminService(repos.admin, repos.user, repos.channel)
 		self.welcome: WelcomeService = WelcomeService(bot, repos)
-		self.broadcast: BroadcastService = BroadcastService(repos.broadcast, repos.admin)
+		self.broadcast: BroadcastService = BroadcastService(bot, repos.broadcast, repos.admin, repos.user, self.sender, self.counters, repos.events)
+		self.stats: StatsService = StatsService(repos.stats, repos.channel, self.counters)
+		self.export: ExportService = ExportService(repos.user, self.counters, self.executor)
 		self.chat: ChatService = ChatService(bot, repos.chat, repos.admin, repos.user)
 
 
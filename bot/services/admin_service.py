@@ -1,14 +1,12 @@
 import io
 import os
-from datetime import datetime, timedelta
 from pathlib import Path
-from typing import List, Optional, Tuple, Dict
+from typing import List, Optional, Tuple
 
 from ..models import Admin
 from ..repositories import UserRepository, ChannelRepository
 from ..repositories.admin_repository import AdminRepository
 from ..utils.loggers import services as logger
-from ..utils.work_with_date import get_datetime_now
 
 
 class AdminService:
@@ -74,53 +72,6 @@ class AdminService:
 			logger.error(f"Error listing admins: {e}")
 			return [], []
 
-	async def get_stats(self) -> dict:
-		"""Получение статистики бота"""
-		total_users = await self.user_repo.count_users()
-		active_users = await self.user_repo.count_active_users()
-		banned_users = await self.user_repo.count_banned_users()
-		channels_count = await self.channel_repo.count_channels()
-
-		main_channel = await self.channel_repo.get_main_channel()
-		backup_channel = await self.channel_repo.get_backup_channel()
-
-		return {
-			'total_users': total_users,
-			'active_users': active_users,
-			'banned_users': banned_users,
-			'channels_count': channels_count,
-			'main_channel': f"<a href='{main_channel.link}'>{main_channel.title}</a>" if main_channel else "Не установлен",
-			'backup_channel': f"<a href='{backup_channel.link}'>{backup_channel.title}</a>" if backup_channel else "Не установлен"
-		}
-
-	async def get_period_stats(self, start_date: datetime, end_date: datetime) -> Dict[str, any]:
-		"""Получение статистики за указанный период"""
-		return {
-			'new_users': await self.user_repo.count_users_period(start_date, end_date),
-			'active_users': await self.user_repo.count_active_period(start_date, end_date),
-			'banned_users': await self.user_repo.count_banned_period(start_date, end_date),
-		}
-
-	async def get_daily_stats(self, days: int = 7) -> List[Dict[str, any]]:
-		"""Получение статистики по дням"""
-		stats = []
-		today = get_datetime_now().date()
-
-		for i in range(days, 0, -1):
-			date = today - timedelta(days=i)
-			start = datetime(date.year, date.month, date.day)
-			end = start + timedelta(days=1)
-
-			day_stats = await self.get_period_stats(start, end)
-			stats.append({
-				'date': date.strftime("%Y-%m-%d"),
-				'new_users': day_stats['new_users'],
-				'active_users': day_stats['active_users'],
-				'banned_users': day_stats['banned_users']
-			})
-
-		return stats
-
 	@staticmethod
 	async def get_logs() -> List | None:
 		"""Получение файла логов"""
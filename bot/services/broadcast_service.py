@@ -1,16 +1,57 @@
-from datetime import datetime
-from typing import List, Tuple, Optional, Dict
+import asyncio
+import uuid
+from datetime import timedelta
+from typing import AsyncIterator, List, Tuple, Optional, Dict
 
-from ..repositories import AdminRepository
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest
+
+from .sender_service import SenderService, DeliveryJob, DeliveryResult, FailureBuffer, is_permanent_failure
+from ..config import Config
+from ..keyboards.admin_keyboard import BroadCastKeyboards
+from ..repositories import AdminRepository, EventBus, UserRepository
 from ..repositories.broadcast_repository import BroadcastRepository
 from ..models import BroadcastMessage, Button
+from ..utils.counters import UserCounters
+from ..utils.loggers import services as logger
+from ..utils.payload import MessagePayload, build_keyboard
 from ..utils.work_with_date import get_datetime_now
 
 
 class BroadcastService:
-	def __init__(self, broadcast_repository: BroadcastRepository, admin_repository: AdminRepository):
+	PROGRESS_INTERVAL = 5  # Как часто обновлять сообщение с прогрессом (секунды)
+	CLAIM_BATCH_SIZE = 200  # Сколько получателей захватывать из очереди за раз
+	OWNER_TIMEOUT = 60  # Через сколько секунд без отметки жизни рассылку может забрать другой процесс
+	RESUME_INTERVAL = 30  # Как часто воркер доставки ищет рассылки без владельца (секунды)
+
+	def __init__(
+			self,
+			bot: Bot,
+			broadcast_repository: BroadcastRepository,
+			admin_repository: AdminRepository,
+			user_repository: UserRepository,
+			sender: SenderService,
+			counters: UserCounters,
+			events: EventBus
+	):
+		self.bot = bot
 		self.repository = broadcast_repository
 		self.admin_repository = admin_repository
+		self.user_repository = user_repository
+		self.sender = sender
+		self.counters = counters
+		self.events = events
+		self.jobs: Dict[int, DeliveryJob] = {}
+		self.owner = uuid.uuid4().hex  # Владелец рассылок этого процесса в таблице broadcasts
+		# Рассылки отправляет один воркер с полным лимитом Telegram, остальные передают их через события
+		self.delivers = Config.WORKER_ID == 0
+		self._progress_messages: Dict[int, Tuple[int, int]] = {}  # broadcast_id -> (chat_id, message_id)
+		self._launch_lock = asyncio.Lock()
+		self._resumer: Optional[asyncio.Task] = None
+		events.subscribe('broadcast_status', self._on_status_event)
+		if self.delivers:
+			events.subscribe('broadcast_start', self._on_start_event)
+			events.subscribe('resync', self._on_start_event)
 	
 	async def save_broadcast(
 			self,
@@ -21,7 +62,7 @@ class BroadcastService:
 			sent_by: int,
 			total_users: int
 	) -> int:
-		"""Сохранение информации о рассылке"""
+		"""Сохранение рассылки и постановка получателей в очередь (одной транзакцией)"""
 		broadcast = BroadcastMessage(
 			text=text,
 			media_type=media_type,
@@ -31,7 +72,11 @@ class BroadcastService:
 			sent_by=sent_by,
 			total_users=total_users
 		)
-		return await self.repository.create(broadcast)
+		# Без транзакции сбой между запросами оставил бы рассылку без очереди доставки
+		async with self.repository.transaction():
+			broadcast_id = await self.repository.create(broadcast)
+			await self.repository.enqueue_recipients(broadcast_id)
+		return broadcast_id
 	
 	async def update_broadcast_stats(
 			self,
@@ -77,6 +122,276 @@ class BroadcastService:
 		return text
 	
 	
+	async def start(self, broadcast_id: int, chat_id: int) -> Optional[DeliveryJob]:
+		"""Запуск сохраненной рассылки (очередь доставки заполняется в save_broadcast).
+		Не на воркере доставки рассылка передается ему, прогресс придет в чат автора (sent_by)"""
+		if not self.delivers:
+			await self.events.publish('broadcast_start', id=broadcast_id)
+			return None
+		async with self._launch_lock:
+			if broadcast_id in self.jobs:
+				return self.jobs[broadcast_id]
+			if not await self.repository.acquire(broadcast_id, self.owner, self.OWNER_TIMEOUT):
+				return None
+			broadcast = await self.repository.get_by_id(broadcast_id)
+			return await self.launch(broadcast, chat_id)
+
+	async def start_delivery(self) -> None:
+		"""Запуск фонового возобновления рассылок (только на воркере доставки)"""
+		if self.delivers and not self._resumer:
+			self._resumer = asyncio.create_task(self._resume_loop())
+
+	async def _resume_loop(self) -> None:
+		# Подхватывает и рассылки, запущенные, пока этот воркер перезапускался
+		while True:
+			await self.resume_unfinished()
+			await asyncio.sleep(self.RESUME_INTERVAL)
+
+	async def _on_start_event(self, event: dict) -> None:
+		# Новая рассылка с другого воркера или переподключение к событиям (могли пропустить запуск)
+		await self.resume_unfinished()
+
+	async def _on_status_event(self, event: dict) -> None:
+		job = self.jobs.get(event['id'])
+		if not job:
+			return
+		self._apply_status(job, event['status'])
+		chat_id, message_id = self._progress_messages[job.id]
+		await self._edit_progress(job, chat_id, message_id)
+
+	async def resume_unfinished(self) -> None:
+		"""Возобновление рассылок, у которых нет живого владельца (процесс остановлен или упал)"""
+		async with self._launch_lock:
+			await self._resume_unfinished()
+
+	async def _resume_unfinished(self) -> None:
+		try:
+			broadcasts = await self.repository.get_unfinished(self.OWNER_TIMEOUT)
+		except Exception as e:
+			logger.exception(f"Ошибка получения незавершенных рассылок: {e}")
+			return
+
+		for broadcast in broadcasts:
+			if broadcast.id in self.jobs:
+				continue
+			try:
+				status = await self.repository.acquire(broadcast.id, self.owner, self.OWNER_TIMEOUT)
+				if not status:
+					continue  # Забрал другой процесс
+				# Строки, захваченные прошлым владельцем, так и не были доставлены
+				await self.repository.release_claims(broadcast.id)
+				success, failed = await self.repository.sync_stats(broadcast.id)
+				# Рассылка, которую еще никто не отправлял, передана другим воркером
+				resumed = success or failed or status == 'paused'
+				await self.launch(
+					broadcast,
+					broadcast.sent_by,
+					initial=DeliveryResult(success=success, failed=failed),
+					text="🔁 Рассылка возобновляется после перезапуска..." if resumed else "⏳ Рассылка запускается...",
+					paused=status == 'paused'
+				)
+				logger.info(f"Resumed broadcast {broadcast.id}")
+			except Exception as e:
+				logger.exception(f"Ошибка возобновления рассылки {broadcast.id}: {e}")
+
+	async def stop(self) -> None:
+		"""Остановка рассылок этого процесса: они освобождаются для возобновления другим процессом"""
+		if self._resumer:
+			self._resumer.cancel()
+			await asyncio.gather(self._resumer, return_exceptions=True)
+			self._resumer = None
+		jobs = [job for job in self.jobs.values() if job.task]
+		for job in jobs:
+			job.task.cancel()
+		await asyncio.gather(*(job.task for job in jobs), return_exceptions=True)
+
+	async def set_status(self, broadcast_id: int, status: str) -> bool:
+		"""Пауза, продолжение или отмена рассылки. Статус хранится в БД: владелец рассылки
+		в другом процессе получает его событием, а если оно потеряется - при отметке жизни"""
+		if not await self.repository.set_status(broadcast_id, status):
+			return False
+		job = self.jobs.get(broadcast_id)
+		if job:
+			self._apply_status(job, status)
+		else:
+			await self.events.publish('broadcast_status', id=broadcast_id, status=status)
+		return True
+
+	@staticmethod
+	def _apply_status(job: DeliveryJob, status: str) -> None:
+		if status == 'paused':
+			job.pause()
+		elif status == 'running':
+			job.resume()
+		elif status == 'cancelled':
+			job.cancel()
+
+	async def launch(
+			self,
+			broadcast: BroadcastMessage,
+			chat_id: int,
+			initial: Optional[DeliveryResult] = None,
+			text: str = "⏳ Рассылка запускается...",
+			paused: bool = False
+	) -> DeliveryJob:
+		"""Запуск захваченной рассылки из очереди доставки с отображением прогресса в чате администратора
+
+		Доставка "хотя бы один раз": каждая отправка сразу записывается как 'sent'. После падения
+		процесса повторно уйдут только сообщения, отправленные, но еще не записанные (не больше
+		числа одновременных отправок), и те, запись которых не удалась из-за ошибки БД.
+		"""
+		flushed = DeliveryResult(success=initial.success, failed=initial.failed) if initial else DeliveryResult()
+		unsaved: List[int] = []  # Доставки, которые не удалось записать сразу
+		progress_message = await self.bot.send_message(
+			chat_id,
+			text,
+			reply_markup=BroadCastKeyboards.broadcast_progress(broadcast.id, paused=paused)
+		)
+		self._progress_messages[broadcast.id] = (chat_id, progress_message.message_id)
+
+		async def save_sent(user_ids: List[int]):
+			try:
+				await self.repository.mark_sent(broadcast.id, user_ids)
+			except Exception as e:
+				unsaved.extend(user_ids)
+				logger.error(f"Ошибка сохранения доставленных сообщений рассылки {broadcast.id}: {e}")
+
+		async def flush_sent():
+			if unsaved:
+				user_ids = unsaved.copy()
+				unsaved.clear()
+				await save_sent(user_ids)
+
+		payload = self.build_payload(broadcast)
+
+		async def send(user_id: int):
+			await payload.send(user_id)
+			await save_sent([user_id])
+
+		async def flush_failures(items: List[Tuple[int, Exception]]):
+			await self.repository.mark_failed(
+				broadcast.id,
+				[user_id for user_id, _ in items],
+				[str(error) for _, error in items]
+			)
+			blocked = [user_id for user_id, error in items if is_permanent_failure(error)]
+			if blocked:
+				self.counters.apply(await self.user_repository.ban_users(blocked))
+
+		failures = FailureBuffer(flush_failures)
+
+		async def on_progress(job: DeliveryJob):
+			# Отметка жизни заодно приносит паузу/отмену, выставленную из другого процесса
+			status = await self.repository.heartbeat(job.id, self.owner)
+			if status is None:
+				logger.warning(f"Рассылку {job.id} забрал другой процесс, отправка остановлена")
+				job.task.cancel()
+				return
+			self._apply_status(job, status)
+			await flush_sent()
+			await failures.flush()
+			await self._flush_stats(job, flushed)
+			await self._edit_progress(job, chat_id, progress_message.message_id)
+
+		async def on_finish(job: DeliveryJob):
+			self.jobs.pop(job.id, None)
+			self._progress_messages.pop(job.id, None)
+			await flush_sent()
+			await failures.flush()
+			status = await self.repository.finish(job.id, self.owner, job.is_cancelled)
+			if status == 'cancelled':
+				await self.repository.cancel_pending(job.id)
+			await self.repository.sync_stats(job.id)
+			if status not in ('done', 'cancelled'):
+				# Рассылка не закончена (остановка процесса или ошибка) - ее продолжит resume_unfinished
+				return
+			job.status = status
+			await self._edit_progress(job, chat_id, progress_message.message_id)
+
+		job = self.sender.submit(
+			broadcast.id,
+			self._claim_recipients(broadcast.id),
+			send,
+			total=broadcast.total_users,
+			on_error=failures.add,
+			on_progress=on_progress,
+			on_finish=on_finish,
+			progress_interval=self.PROGRESS_INTERVAL,
+			initial=initial
+		)
+		if paused:
+			job.pause()
+		self.jobs[broadcast.id] = job
+		return job
+
+	async def _claim_recipients(self, broadcast_id: int) -> AsyncIterator[int]:
+		"""Получатели из очереди доставки, захватываемые пачками"""
+		while True:
+			user_ids = await self.repository.claim_batch(broadcast_id, self.CLAIM_BATCH_SIZE)
+			if not user_ids:
+				return
+			for user_id in user_ids:
+				yield user_id
+
+	def get_job(self, broadcast_id: int) -> Optional[DeliveryJob]:
+		"""Активная рассылка по ID"""
+		return self.jobs.get(broadcast_id)
+
+	@staticmethod
+	def format_progress(job: DeliveryJob) -> str:
+		"""Форматирование прогресса рассылки"""
+		if job.status == 'done':
+			title = "✅ Рассылка завершена!"
+		elif job.status == 'cancelled':
+			title = "⛔ Рассылка отменена"
+		elif job.status == 'paused':
+			title = "⏸ Рассылка приостановлена"
+		else:
+			title = "📤 Идёт рассылка..."
+
+		text = (
+			f"{title}\n\n"
+			f"• Рассылка: #{job.id}\n"
+			f"• Успешно: {job.success}\n"
+			f"• Ошибок: {job.failed}\n"
+			f"• Осталось: {job.remaining}\n"
+			f"• Всего получателей: {job.total}"
+		)
+		eta = job.eta()
+		if not job.is_finished and eta is not None:
+			text += f"\n• Примерно осталось: {timedelta(seconds=int(eta))}"
+		return text
+
+	async def _edit_progress(self, job: DeliveryJob, chat_id: int, message_id: int) -> None:
+		if job.is_finished:
+			markup = BroadCastKeyboards.back_to_broadcast()
+		else:
+			markup = BroadCastKeyboards.broadcast_progress(job.id, paused=job.status == 'paused')
+		try:
+			await self.bot.edit_message_text(
+				text=self.format_progress(job),
+				chat_id=chat_id,
+				message_id=message_id,
+				reply_markup=markup
+			)
+		except TelegramBadRequest:
+			# Текст не изменился с прошлого обновления
+			pass
+
+	async def _flush_stats(self, job: DeliveryJob, flushed: DeliveryResult) -> None:
+		"""Сохранение прироста статистики в БД"""
+		success, failed = job.success - flushed.success, job.failed - flushed.failed
+		if not success and not failed:
+			return
+		await self.repository.update_stats(job.id, success, failed)
+		flushed.success += success
+		flushed.failed += failed
+
+	def build_payload(self, broadcast: BroadcastMessage) -> MessagePayload:
+		"""Сборка сообщения рассылки один раз на всех получателей"""
+		keyboard = build_keyboard(broadcast.buttons, f"broadcast_textbtn:{broadcast.id}")
+		return MessagePayload.build(self.bot, broadcast.text, broadcast.media_type, broadcast.media_id, keyboard)
+
 	@staticmethod
 	def _delivery_rate(broadcast: BroadcastMessage) -> float:
 		"""Расчет процента доставки"""
@@ -1,17 +1,28 @@
+import asyncio
 import os
 import random
+import time
+from dataclasses import dataclass
 from string import ascii_letters, digits
-from tempfile import NamedTemporaryFile
-from typing import Tuple
+from typing import Dict, Optional, Tuple
 
 from PIL import ImageFont
+from aiogram.types import BufferedInputFile
 from captcha.image import ImageCaptcha
 
+from .executor_service import ExecutorService
+from ..config import Config
 from ..models import Captcha
-from ..repositories import CaptchaRepository
+from ..storages import CaptchaStore
 from ..utils.loggers import services as logger
 
 
+def render_captcha(text: str, width: int, height: int) -> bytes:
+	"""Отрисовка капчи в PNG (выполняется в пуле процессов)"""
+	image = ImageCaptcha(width=width, height=height)
+	return image.generate(text, format='png').getvalue()
+
+
 class TextCaptcha:
 	"""Генератор текстовой капчи"""
 
@@ -23,8 +34,6 @@ class TextCaptcha:
 		self._width = 240
 		self._height = 120
 		self._font_path = self._get_font_path()
-		self._temp_dir = "temp_captchas"
-		os.makedirs(self._temp_dir, exist_ok=True)
 
 
 	@staticmethod
@@ -43,80 +52,152 @@ class TextCaptcha:
 		# Используем дефолтный шрифт
 		return ImageFont.load_default().path
 
-	async def generate(self) -> Tuple[str, str]:
-		"""Генерация капчи и возврат (текст, файл)"""
-		# Генерируем текст
-		text = ''.join(random.choice(self._chars) for _ in range(self._length))
-
-		# Создаем временный файл
-		temp_file = NamedTemporaryFile(
-			dir=self._temp_dir,
-			suffix=".png",
-			delete=False
-		)
-		file_path = temp_file.name
-		temp_file.close()
-
-		# Генерируем изображение
-		image = ImageCaptcha(width=self._width, height=self._height)
-		image.write(text, file_path)
-
-		return text, file_path
-
-	@staticmethod
-	async def cleanup(file_path: str):
-		"""Удаление временного файла"""
-		if file_path and os.path.exists(file_path):
+	def random_text(self) -> str:
+		return ''.join(random.choice(self._chars) for _ in range(self._length))
+
+	async def generate(self, executor: ExecutorService) -> Tuple[str, bytes]:
+		"""Генерация капчи вне event loop и возврат (текст, PNG)"""
+		text = self.random_text()
+		# Пакет captcha искажает символы в основном на Python, поэтому процессы, а не потоки
+		image = await executor.run(render_captcha, text, self._width, self._height, process=True)
+		return text, image
+
+
+@dataclass
+class CaptchaImage:
+	"""Отрисованная капча. Каждая показывается одному пользователю: повторный показ по
+	file_id разным людям позволил бы сопоставить картинку с уже известным ответом"""
+	__slots__ = ('text', 'image')
+
+	text: str
+	image: bytes
+
+	def as_input(self) -> BufferedInputFile:
+		"""PNG из памяти"""
+		return BufferedInputFile(self.image, filename="captcha.png")
+
+
+class CaptchaPool:
+	"""Запас заранее отрисованных капч, пополняемый в фоне"""
+
+	def __init__(
+			self,
+			generator: TextCaptcha,
+			executor: ExecutorService,
+			size: int = Config.CAPTCHA_POOL_SIZE,
+			workers: int = Config.CAPTCHA_WORKERS
+	):
+		self.generator = generator
+		self.executor = executor
+		self.size = size
+		self.workers = workers
+		self._queue: Optional[asyncio.Queue] = None
+		self._producers = []
+		# Метрики
+		self.refill_latency = 0.0  # Среднее время отрисовки одной капчи (секунды, EMA)
+		self.served = 0
+		self.misses = 0  # Выдано в обход пустого пула
+
+	@property
+	def depth(self) -> int:
+		return self._queue.qsize() if self._queue else 0
+
+	def start(self) -> None:
+		"""Запуск фоновых производителей (нужен запущенный event loop)"""
+		if self._producers:
+			return
+		self._queue = asyncio.Queue(maxsize=self.size)
+		self._producers = [asyncio.create_task(self._produce()) for _ in range(self.workers)]
+
+	async def stop(self) -> None:
+		for producer in self._producers:
+			producer.cancel()
+		await asyncio.gather(*self._producers, return_exceptions=True)
+		self._producers = []
+
+	async def get(self) -> CaptchaImage:
+		"""Готовая капча из пула; при пустом пуле отрисовывается сразу (тоже вне event loop)"""
+		self.served += 1
+
+		if self._queue is not None:
 			try:
-				os.unlink(file_path)
+				return self._queue.get_nowait()
+			except asyncio.QueueEmpty:
+				pass
+		self.misses += 1
+		return await self._render()
+
+	async def _render(self) -> CaptchaImage:
+		started = time.monotonic()
+		text, image = await self.generator.generate(self.executor)
+		elapsed = time.monotonic() - started
+		self.refill_latency = elapsed if not self.refill_latency else self.refill_latency * 0.9 + elapsed * 0.1
+		return CaptchaImage(text, image)
+
+	async def _produce(self) -> None:
+		while True:
+			try:
+				item = await self._render()
+			except asyncio.CancelledError:
+				raise
 			except Exception as e:
-				logger.exception(f"Error while deleting file: {file_path}")
+				logger.exception(f"Ошибка отрисовки капчи: {e}")
+				await asyncio.sleep(1)
+				continue
+			await self._queue.put(item)
+
+	def metrics(self) -> Dict[str, float]:
+		return {
+			'depth': self.depth,
+			'size': self.size,
+			'refill_latency_ms': round(self.refill_latency * 1000, 1),
+			'served': self.served,
+			'misses': self.misses,
+		}
 
 
 class CaptchaService:
 	"""Сервис для работы с капчей"""
 
-	def __init__(self, captcha_repo: CaptchaRepository):
-		self.captcha_repo = captcha_repo
+	def __init__(self, store: CaptchaStore, executor: ExecutorService):
+		self.store = store
 		self.text_captcha = TextCaptcha()
+		self.pool = CaptchaPool(self.text_captcha, executor)
+
+	async def start(self) -> None:
+		"""Запуск фоновой отрисовки и очистки просроченных капч"""
+		self.pool.start()
+		await self.store.start()
+
+	async def stop(self) -> None:
+		await self.pool.stop()
+		await self.store.close()
 
-	async def generate_captcha(self, user_id: int, attemps=0) -> Tuple[str, str]:
-		"""Генерация капчи"""
-		answer, image = await self.text_captcha.generate()
+	async def generate_captcha(self, user_id: int, attemps=0) -> Tuple[str, CaptchaImage]:
+		"""Выдача капчи из пула (возвращает ответ и картинку)"""
+		image = await self.pool.get()
+		answer = image.text
 
-		# Сохраняем в базу
-		captcha = Captcha(
+		await self.store.set(Captcha(
 			user_id=user_id,
 			text=str(answer),
 			attempts=attemps
-		)
-		await self.captcha_repo.create(captcha)
+		))
 
 		return str(answer), image
 
 	async def verify_captcha(self, user_id: int, user_input: str) -> Tuple[bool, str, int]:
 		"""Проверка капчи"""
-		captcha = await self.captcha_repo.get(user_id)
-		if not captcha:
+		result = await self.store.check(user_id, user_input)
+		if result is None:
 			return False, "Капча не найдена. Пожалуйста, запросите новую.", 0
 
-		# Увеличиваем счетчик попыток
-		await self.captcha_repo.increment_attempts(user_id)
-
-		if user_input.strip().lower() != captcha.text.lower():
-			attempts = await self.captcha_repo.get_attempts(user_id)
-			remaining = 3 - attempts
-
-			if remaining <= 0:
-				await self.captcha_repo.delete(user_id)
-				return False, "❌ Превышено количество попыток. Вы заблокированы.", 3
-
-			return False, f"❌ Неверно! Осталось попыток: {remaining}", attempts
+		success, attempts = result
+		if success:
+			return True, "✅ Капча успешно пройдена!", 0
 
-		# Капча пройдена
-		await self.captcha_repo.delete(user_id)
-		return True, "✅ Капча успешно пройдена!", 0
+		remaining = self.store.max_attempts - attempts
+		if remaining <= 0:
+			return False, "❌ Превышено количество попыток. Вы заблокированы.", self.store.max_attempts
 
-	async def cleanup(self, file_path: str):
-		"""Очистка временных файлов"""
-		await self.text_captcha.cleanup(file_path)
+		return False, f"❌ Неверно! Осталось попыток: {remaining}", attempts
@@ -1,19 +1,26 @@
 from typing import Optional, List
 
 from aiogram import Bot
-from aiogram.types import Chat
+from aiogram.types import Chat, ChatMemberUpdated
 
+from ..config import Config
 from ..models import Channel
 from ..repositories.channel_repository import ChannelRepository
+from ..utils.cache import MISSING, TTLCache
 from ..utils.loggers import services as logger
 
 
+SUBSCRIBED_STATUSES = ('member', 'administrator', 'creator')
+
+
 class ChannelService:
 	"""Сервис для работы с каналами"""
 
 	def __init__(self, bot: Bot, channel_repo: ChannelRepository):
 		self.bot = bot
 		self.channel_repo = channel_repo
+		# (user_id, channel_id) -> подписан ли пользователь
+		self.subscriptions: TTLCache[bool] = TTLCache(Config.CACHE_SIZE, Config.SUBSCRIPTION_TTL)
 
 	async def get_main_channel(self) -> Optional[Channel]:
 		"""Получение основного канала"""
@@ -75,6 +82,18 @@ class ChannelService:
 			logger.exception(f"Error setting main channel {channel_id}: {e}")
 			return False
 
+	async def promote_backup_channel(self, channel: Channel, backup_channel: Channel) -> bool:
+		"""Замена удаленного основного канала резервным (одной транзакцией)"""
+		try:
+			async with self.channel_repo.transaction():
+				await self.channel_repo.set_main_channel(backup_channel.channel_id)
+				await self.channel_repo.delete(channel.channel_id)
+			logger.info(f"Backup channel {backup_channel.channel_id} promoted instead of {channel.channel_id}")
+			return True
+		except Exception as e:
+			logger.exception(f"Error promoting backup channel {backup_channel.channel_id}: {e}")
+			return False
+
 	async def set_backup_channel(self, channel_id: int) -> bool:
 		"""Установка резервного канала"""
 		try:
@@ -107,7 +126,7 @@ class ChannelService:
 			return []
 
 	async def check_subscription(self, user_id: int) -> bool:
-		"""Проверяет подписку пользователя на резервный канал"""
+		"""Проверяет подписку пользователя на резервный канал (через кэш)"""
 		try:
 			# Получаем резервный канал
 			backup_channel = await self.channel_repo.get_backup_channel()
@@ -115,13 +134,36 @@ class ChannelService:
 				logger.warning("Backup channel not set")
 				return True  # Если канал не настроен, пропускаем проверку
 
+			key = (user_id, backup_channel.channel_id)
+			subscribed = self.subscriptions.get(key)
+			if subscribed is not MISSING:
+				return subscribed
+
 			# Проверяем статус подписки
 			member = await self.bot.get_chat_member(
 				chat_id=backup_channel.channel_id,
 				user_id=user_id
 			)
 
-			return member.status in ['member', 'administrator', 'creator']
+			subscribed = member.status in SUBSCRIBED_STATUSES
+			self.remember_subscription(user_id, backup_channel.channel_id, subscribed)
+			return subscribed
 		except Exception as e:
 			logger.exception(f"Subscription check failed for user {user_id}: {str(e)}")
 			return False
+
+	def remember_subscription(self, user_id: int, channel_id: int, subscribed: bool) -> None:
+		"""Запись статуса подписки в кэш (отписка хранится меньше, чтобы быстрее заметить подписку)"""
+		ttl = Config.SUBSCRIPTION_TTL if subscribed else Config.SUBSCRIPTION_NEGATIVE_TTL
+		self.subscriptions.set((user_id, channel_id), subscribed, ttl=ttl)
+
+	async def on_member_update(self, update: ChatMemberUpdated) -> None:
+		"""Обновление кэша подписок по событию chat_member из резервного канала"""
+		backup_channel = await self.get_backup_channel()
+		if not backup_channel or backup_channel.channel_id != update.chat.id:
+			return
+
+		user_id = update.new_chat_member.user.id
+		# Другие процессы перепроверят подписку, этот сразу знает новый статус
+		self.subscriptions.pop((user_id, update.chat.id))
+		self.remember_subscription(user_id, update.chat.id, update.new_chat_member.status in SUBSCRIBED_STATUSES)
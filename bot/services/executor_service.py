@@ -0,0 +1,94 @@
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Dict, List, Optional, TypeVar
+
+from ..config import Config
+from ..utils.loggers import services as logger
+
+
+T = TypeVar('T')
+
+
+class TaskStats:
+	"""Время выполнения задач одного вида"""
+
+	__slots__ = ('name', 'calls', 'total', 'max')
+
+	def __init__(self, name: str):
+		self.name = name
+		self.calls = 0
+		self.total = 0.0  # Секунды, включая ожидание свободного воркера
+		self.max = 0.0
+
+	def record(self, elapsed: float) -> None:
+		self.calls += 1
+		self.total += elapsed
+		self.max = max(self.max, elapsed)
+
+
+class ExecutorService:
+	"""Общие пулы для тяжелой работы вне event loop
+
+	Потоки - для кода, отпускающего GIL (PIL, NumPy, zlib, ввод-вывод),
+	процессы - для форматирования на чистом Python. В процесс передаются функции
+	уровня модуля и аргументы, которые можно сериализовать pickle.
+	"""
+
+	def __init__(
+			self,
+			threads: int = Config.EXECUTOR_THREADS,
+			processes: int = Config.EXECUTOR_PROCESSES,
+			slow_ms: float = Config.EXECUTOR_SLOW_MS
+	):
+		self.threads = threads
+		self.processes = processes
+		self.slow_ms = slow_ms
+		self._thread_pool: Optional[ThreadPoolExecutor] = None
+		self._process_pool: Optional[ProcessPoolExecutor] = None
+		self.stats: Dict[str, TaskStats] = {}
+
+	def _executor(self, process: bool) -> Executor:
+		# Пулы создаются при первом использовании
+		if process:
+			if self._process_pool is None:
+				# spawn, а не fork: форк процесса с запущенным event loop, потоками и соединениями
+				# asyncpg может получить дочерний процесс с навсегда захваченной блокировкой
+				self._process_pool = ProcessPoolExecutor(
+					max_workers=self.processes,
+					mp_context=multiprocessing.get_context('spawn')
+				)
+			return self._process_pool
+		if self._thread_pool is None:
+			self._thread_pool = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix='bot-executor')
+		return self._thread_pool
+
+	async def run(self, fn: Callable[..., T], *args, process: bool = False, **kwargs) -> T:
+		"""Выполнение fn(*args, **kwargs) в пуле потоков (или процессов при process=True)"""
+		name = getattr(fn, '__qualname__', repr(fn))
+		started = time.perf_counter()
+		try:
+			return await asyncio.get_running_loop().run_in_executor(
+				self._executor(process), partial(fn, *args, **kwargs)
+			)
+		finally:
+			elapsed = time.perf_counter() - started
+			stats = self.stats.get(name)
+			if stats is None:
+				stats = self.stats[name] = TaskStats(name)
+			stats.record(elapsed)
+			if elapsed * 1000 >= self.slow_ms:
+				logger.warning(f"Долгая задача в пуле {name}: {elapsed * 1000:.0f} мс")
+
+	def top(self, limit: int = 10) -> List[TaskStats]:
+		"""Задачи с наибольшим суммарным временем"""
+		return sorted(self.stats.values(), key=lambda s: s.total, reverse=True)[:limit]
+
+	async def stop(self) -> None:
+		for pool in (self._thread_pool, self._process_pool):
+			if pool:
+				pool.shutdown(wait=False, cancel_futures=True)
+		self._thread_pool = None
+		self._process_pool = None
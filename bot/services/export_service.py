@@ -0,0 +1,109 @@
+import io
+from typing import AsyncIterator, List, Tuple
+
+from .executor_service import ExecutorService
+from ..config import Config
+from ..models import User
+from ..repositories.user_repository import UserRepository
+from ..utils.columns import UserColumns
+from ..utils.counters import UserCounters
+from ..utils.export import ChunkWriter, StreamInputFile
+from ..utils.work_with_date import get_datetime_now
+
+
+def format_txt_page(users: List[User], number: int) -> str:
+	"""Страница пользователей в TXT (выполняется в пуле процессов)"""
+	return "".join(
+		"\n\n"
+		f"👤 Пользователь #{i}\n"
+		f"🆔 ID: {user.user_id}\n"
+		f"👤 Имя: {user.full_name}\n"
+		f"📱 Username: @{user.username if user.username else 'N/A'}\n"
+		f"📅 Дата регистрации: {user.join_date.strftime('%d.%m.%Y %H:%M')}\n"
+		f"🔒 Статус: {'🟢 Активен' if user.is_active else '🔴 Заблокирован'}\n"
+		f"🔔 Уведомления: {'🟢 Вкл' if user.should_notify else '🔴 Выкл'}\n\n"
+		+ "⎯" * 30
+		for i, user in enumerate(users, number + 1)
+	)
+
+
+class ExportService:
+	"""Выгрузка списка пользователей: данные из БД сразу пишутся в загружаемый файл"""
+
+	# Формат -> (расширение, подпись)
+	FORMATS = {
+		'txt': ("txt", "📋 Список пользователей (TXT)"),
+		'csv': ("csv", "📊 Список пользователей (CSV)"),
+		'jsonl': ("jsonl", "🧾 Список пользователей (JSON Lines)"),
+		'npz': ("npz", "🧮 Пользователи по колонкам (NumPy .npz)"),
+	}
+
+	def __init__(self, user_repo: UserRepository, counters: UserCounters, executor: ExecutorService):
+		self.user_repo = user_repo
+		self.counters = counters
+		self.executor = executor
+
+	def users_file(self, format_type: str) -> Tuple[StreamInputFile, str]:
+		"""Файл со списком пользователей и подпись к нему
+
+		Большие текстовые выгрузки сжимаются gzip, чтобы уложиться в лимит Telegram на размер файла
+		"""
+		if format_type not in self.FORMATS:
+			raise ValueError("Неизвестный формат")
+
+		extension, caption = self.FORMATS[format_type]
+		# npz уже сжат
+		compress = format_type != 'npz' and self.counters.total >= Config.EXPORT_GZIP_MIN_USERS
+		filename = f"users_{get_datetime_now().strftime('%Y%m%d_%H%M')}.{extension}" + (".gz" if compress else "")
+		caption += " в архиве gzip" if compress else ""
+
+		def chunks() -> AsyncIterator[bytes]:
+			return self._stream(format_type, compress)
+
+		return StreamInputFile(chunks, filename=filename), caption
+
+	def _header(self) -> str:
+		total_users = self.counters.total
+		active_users = self.counters.active
+		return (
+			f"# Всего пользователей: {total_users}\n"
+			f"# Активных: {active_users}\n"
+			f"# Неактивных: {total_users - active_users}\n"
+			f"# Дата генерации: {get_datetime_now().strftime('%d.%m.%Y %H:%M')}"
+		)
+
+	async def _stream(self, format_type: str, compress: bool) -> AsyncIterator[bytes]:
+		writer = ChunkWriter(compress=compress)
+
+		if format_type == 'txt':
+			writer.write(self._header() + "\n\n\n" + "=" * 50 + "\n")
+			number = 0
+			async for users in self.user_repo.iter_pages(Config.EXPORT_BATCH_SIZE):
+				writer.write(await self.executor.run(format_txt_page, users, number, process=True))
+				number += len(users)
+				if writer.ready():
+					yield writer.take()
+
+		elif format_type == 'npz':
+			columns = await self.user_repo.get_columns(Config.EXPORT_BATCH_SIZE * 10)
+			writer.write_bytes(await self.executor.run(self._to_npz, columns))
+
+		else:
+			if format_type == 'csv':
+				writer.write(self._header() + "\n")
+			# Строки формирует PostgreSQL, здесь данные только пересылаются (и сжимаются)
+			copy = self.user_repo.copy_csv() if format_type == 'csv' else self.user_repo.copy_jsonl()
+			async for data in copy:
+				writer.write_bytes(data)
+				if writer.ready():
+					yield writer.take()
+
+		yield writer.close()
+
+	@staticmethod
+	def _to_npz(columns: UserColumns) -> bytes:
+		"""Колонки в архиве NumPy: np.load(file) дает user_id, join_date и флаги"""
+		import numpy as np
+		buffer = io.BytesIO()
+		np.savez_compressed(buffer, **columns.to_numpy())
+		return buffer.getvalue()
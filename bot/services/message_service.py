@@ -1,15 +1,16 @@
 import json
 import uuid
+from dataclasses import asdict
 from pathlib import Path
 from typing import Optional, Tuple, Generic, TypeVar, List
 
 from aiogram import Bot
 from aiogram.types import InlineKeyboardMarkup, Message
-from aiogram.utils.keyboard import InlineKeyboardBuilder
 
 from ..models import MessageTemplate, Button, Channel
 from ..repositories import Repositories
 from ..utils.loggers import services as logger
+from ..utils.payload import MessagePayload, build_keyboard
 
 
 
@@ -57,7 +58,7 @@ class MessageService:
 			"text": temp.text,
 			"media_id": temp.media_id,
 			"media_type": temp.media_type,
-			"buttons": [button.__dict__ for button in temp.buttons] if temp.buttons else []
+			"buttons": [asdict(button) for button in temp.buttons] if temp.buttons else []
 		}
 		with open(self.TEMPLATE_FILE, 'w', encoding='utf-8') as f:
 			json.dump(data, f, ensure_ascii=False, indent=2)
@@ -83,7 +84,7 @@ class MessageService:
 	async def remove_media(self) -> None:
 		"""Удаление медиа-контента"""
 		self.template.media_type = None
-		self.template.media_file_id = None
+		self.template.media_id = None
 		self.save_template()
 	
 	async def add_button(self, button_text: str, button_type: str, button_value: str) -> bool:
@@ -137,59 +138,16 @@ class MessageService:
 	
 	
 	async def format_keyboard(self, buttons: List[Button]) -> Optional[InlineKeyboardMarkup]:
-		keyboard = None
-		if buttons:
-			builder = InlineKeyboardBuilder()
-			for btn in buttons:
-				if btn.button_type == 'url':
-					builder.button(text=btn.text, url=btn.value)
-				else:
-					builder.button(text=btn.text, callback_data=f"{self.callback}_textbtn:{btn.id}")
-			builder.adjust(1)  # 1 кнопка в ряд
-			keyboard = builder.as_markup()
-		return keyboard
-	
+		return build_keyboard(buttons, f"{self.callback}_textbtn")
+
+	def build_payload(self, text: str, media_type: str, media_id: str, keyboard: Optional[InlineKeyboardMarkup]) -> MessagePayload:
+		"""Сборка сообщения один раз для отправки нескольким пользователям"""
+		return MessagePayload.build(self.bot, text, media_type, media_id, keyboard)
+
 	async def send_message(self, user_id: int, text: str, media_type: str, media_id: str, keyboard: Optional[InlineKeyboardMarkup]) -> Optional[Message]:
 		"""Отправка приветственного сообщения пользователю"""
 		try:
-			if media_type and media_id:
-				# Отправка медиа с текстом
-				if media_type == "photo":
-					message = await self.bot.send_photo(
-						chat_id=user_id,
-						photo=media_id,
-						caption=text,
-						reply_markup=keyboard
-					)
-				elif media_type == "video":
-					message = await self.bot.send_video(
-						chat_id=user_id,
-						video=media_id,
-						caption=text,
-						reply_markup=keyboard
-					)
-				elif media_type == "animation":
-					message = await self.bot.send_animation(
-						chat_id=user_id,
-						animation=media_id,
-						caption=text,
-						reply_markup=keyboard
-					)
-				else:
-					message = await self.bot.send_message(
-						chat_id=user_id,
-						text=text,
-						reply_markup=keyboard
-					)
-				return message
-			else:
-				# Отправка только текста
-				message = await self.bot.send_message(
-					chat_id=user_id,
-					text=text,
-					reply_markup=keyboard
-				)
-				return message
+			return await self.build_payload(text, media_type, media_id, keyboard).send(user_id)
 		except Exception as e:
 			logger.exception(f"Ошибка отправки сообщения пользователю {user_id}: {e}")
-			return False
\ No newline at end of file
+			return False
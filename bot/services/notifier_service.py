@@ -1,49 +1,92 @@
 # Система уведомлений
 import json
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
 
-from aiogram import Bot, types
-from aiogram.utils.keyboard import InlineKeyboardBuilder
+from aiogram import Bot
 
 from .message_service import MessageService
+from .sender_service import DeliveryJob, FailureBuffer, SenderService, is_permanent_failure
+from ..config import Config
 from ..models import MessageTemplate, Channel, Button
-from ..repositories import Repositories
+from ..repositories import EventBus, Repositories
+from ..utils.counters import UserCounters
 from ..utils.loggers import services as logger
 
 
 class NotificationService(MessageService):
 	TEMPLATE_FILE = "notification_template.json"
 
-	def __init__(self, bot: Bot, repos: Repositories):
+	def __init__(self, bot: Bot, repos: Repositories, sender: SenderService, counters: UserCounters, events: EventBus):
 		super().__init__(bot, repos, 'notif', '🔔 Основной канал изменен!\n\nНовый канал: &title \nСсылка: &link')
+		self.sender = sender
+		self.counters = counters
+		self.events = events
+		self.jobs: Dict[int, DeliveryJob] = {}
+		# Уведомления, как и рассылки, отправляет только воркер доставки
+		self.delivers = Config.WORKER_ID == 0
+		if self.delivers:
+			events.subscribe('notify_channel_change', self._on_notify_event)
+
+	async def notify_channel_change(self, channel: Channel, report_to: List[int]) -> Optional[DeliveryJob]:
+		"""Запуск фоновой рассылки уведомлений о смене канала, по завершении отчет получат report_to"""
+		if not self.delivers:
+			await self.events.publish('notify_channel_change', channel_id=channel.channel_id, report_to=report_to)
+			return None
 
-	async def notify_channel_change(self, channel: Channel) -> Dict[str, int]:
-		"""Отправка уведомлений о смене канала"""
-		users = await self.repos.user.get_users_for_notification()
 		text, media_type, media_id, buttons = await self.format_message(channel)
 		keyboard = await self.format_keyboard(buttons)
-		
-		text = text.replace('&link', channel.link)
-		text = text.replace('&title', channel.title)
-
-		success = 0
-		failures = 0
-
-		for user in users:
-			try:
-				await self.send_message(user.user_id, text, media_type, media_id, keyboard)
-				await self.bot.send_message(
-					chat_id=user.user_id,
-					text=text,
-					reply_markup=keyboard if keyboard else None,
-					disable_web_page_preview=True
-				)
-				success += 1
-			except Exception as e:
-				logger.error(f"Failed to notify user {user.user_id}: {e}")
-				failures += 1
-				await self.repos.user.set_notification_status(user.user_id, False)
-				await self.repos.user.ban_user(user.user_id)
-
-		return {'success': success, 'failures': failures}
+		payload = self.build_payload(text, media_type, media_id, keyboard)
+
+		failures = FailureBuffer(self._ban_unreachable)
+		total = await self.repos.user.count_users_for_notification()
+
+		async def send(user_id: int):
+			await payload.send(user_id)
+
+		async def finish(job: DeliveryJob):
+			self.jobs.pop(job.id, None)
+			await failures.flush()
+			logger.info(f"Уведомления о смене канала {channel.channel_id}: успешно {job.success}, ошибок {job.failed}")
+			for chat_id in report_to:
+				try:
+					await self.bot.send_message(
+						chat_id,
+						f"📬 Рассылка о смене канала на <a href='{channel.link}'>{channel.title}</a> завершена\n"
+						+ self.format_report(job)
+					)
+				except Exception:
+					continue
+
+		job = self.sender.submit(
+			job_id=channel.channel_id,
+			recipients=self.repos.user.iter_notification_ids(),
+			send=send,
+			total=total,
+			on_error=failures.add,
+			on_finish=finish
+		)
+		self.jobs[job.id] = job
+		return job
+
+	async def _on_notify_event(self, event: dict) -> None:
+		channel = await self.repos.channel.get(event['channel_id'])
+		if channel:
+			await self.notify_channel_change(channel, event['report_to'])
+
+	@staticmethod
+	def format_report(job: DeliveryJob) -> str:
+		"""Отчет о доставке уведомлений с разбивкой ошибок по типам"""
+		lines = [
+			f"Уведомления отправлены <b>{job.success}</b> пользователям",
+			f"Пользователи которым не удалось отправить уведомления: {job.failed}"
+		]
+		for error, count in job.errors.most_common():
+			lines.append(f"  • {error}: {count}")
+		return "\n".join(lines)
+
+	async def _ban_unreachable(self, items: List[Tuple[int, Exception]]) -> None:
+		"""Блокировка пользователей, которые навсегда недоступны для отправки"""
+		blocked = [user_id for user_id, error in items if is_permanent_failure(error)]
+		if blocked:
+			self.counters.apply(await self.repos.user.ban_users(blocked))
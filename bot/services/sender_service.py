@@ -0,0 +1,291 @@
+import asyncio
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterable, Awaitable, Callable, Iterable, List, Optional, Tuple, Union
+
+from aiogram.exceptions import (
+	TelegramBadRequest,
+	TelegramForbiddenError,
+	TelegramNetworkError,
+	TelegramNotFound,
+	TelegramRetryAfter,
+	TelegramServerError,
+)
+
+from ..config import Config
+from ..utils.loggers import services as logger
+from ..utils.rate_limiter import RateLimiter
+
+
+SendFunc = Callable[[int], Awaitable[Any]]
+ErrorFunc = Callable[[int, Exception], Awaitable[None]]
+Recipients = Union[Iterable[int], AsyncIterable[int]]
+FlushFunc = Callable[[List[Tuple[int, Exception]]], Awaitable[None]]
+
+# Ошибки, после которых имеет смысл повторить отправку
+TRANSIENT_ERRORS = (TelegramNetworkError, TelegramServerError, asyncio.TimeoutError)
+
+
+def is_permanent_failure(error: Exception) -> bool:
+	"""Пользователь недоступен навсегда (заблокировал бота, удален, чат не найден)"""
+	if isinstance(error, (TelegramForbiddenError, TelegramNotFound)):
+		return True
+	if isinstance(error, TelegramBadRequest):
+		message = str(error).lower()
+		return 'chat not found' in message or 'user is deactivated' in message
+	return False
+
+
+@dataclass
+class DeliveryResult:
+	success: int = 0
+	failed: int = 0
+	errors: Counter = field(default_factory=Counter)  # Класс ошибки -> количество
+
+
+@dataclass
+class DeliveryJob(DeliveryResult):
+	"""Фоновая отправка с прогрессом, паузой и отменой"""
+	id: int = 0
+	total: int = 0
+	status: str = 'running'  # running, paused, cancelled, done
+	started_at: float = field(default_factory=time.monotonic)
+	task: Optional[asyncio.Task] = field(default=None, repr=False)
+	_started_processed: int = field(default=0, repr=False)
+	_resumed: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+	def __post_init__(self):
+		self._started_processed = self.processed
+		self._resumed.set()
+
+	@property
+	def processed(self) -> int:
+		return self.success + self.failed
+
+	@property
+	def remaining(self) -> int:
+		return max(self.total - self.processed, 0)
+
+	@property
+	def is_cancelled(self) -> bool:
+		return self.status == 'cancelled'
+
+	@property
+	def is_finished(self) -> bool:
+		return self.status in ('cancelled', 'done')
+
+	def eta(self) -> Optional[float]:
+		"""Оценка оставшегося времени в секундах"""
+		elapsed = time.monotonic() - self.started_at
+		processed = self.processed - self._started_processed
+		if not processed or elapsed <= 0:
+			return None
+		return self.remaining / (processed / elapsed)
+
+	def pause(self) -> None:
+		if self.status == 'running':
+			self.status = 'paused'
+			self._resumed.clear()
+
+	def resume(self) -> None:
+		if self.status == 'paused':
+			self.status = 'running'
+			self._resumed.set()
+
+	def cancel(self) -> None:
+		if not self.is_finished:
+			self.status = 'cancelled'
+			self._resumed.set()
+
+	async def wait_resumed(self) -> None:
+		await self._resumed.wait()
+
+
+ProgressFunc = Callable[[DeliveryJob], Awaitable[None]]
+
+
+class FailureBuffer:
+	"""Накопление неудачных отправок для записи в БД одной пачкой"""
+
+	def __init__(self, flush: FlushFunc, size: int = Config.FAILURE_FLUSH_SIZE, interval: float = Config.FAILURE_FLUSH_INTERVAL):
+		self._flush = flush
+		self.size = size
+		self.interval = interval
+		self._items: List[Tuple[int, Exception]] = []
+		self._flushed_at = time.monotonic()
+
+	async def add(self, user_id: int, error: Exception) -> None:
+		self._items.append((user_id, error))
+		if len(self._items) >= self.size or time.monotonic() - self._flushed_at >= self.interval:
+			await self.flush()
+
+	async def flush(self) -> None:
+		self._flushed_at = time.monotonic()
+		if not self._items:
+			return
+		items, self._items = self._items, []
+		try:
+			await self._flush(items)
+		except Exception as e:
+			self._items.extend(items)
+			logger.error(f"Ошибка записи неудачных отправок ({len(items)} шт.): {e}")
+
+
+class SenderService:
+	"""Параллельная отправка сообщений с учетом лимитов Telegram"""
+
+	RETRY_BACKOFF = 0.5  # Начальная задержка перед повтором при сетевой ошибке (секунды)
+
+	def __init__(
+			self,
+			workers: int = Config.BROADCAST_WORKERS,
+			rate: float = Config.BROADCAST_RATE,
+			chat_interval: float = Config.BROADCAST_CHAT_INTERVAL,
+			max_retries: int = Config.BROADCAST_MAX_RETRIES
+	):
+		self.workers = workers
+		self.max_retries = max_retries
+		# Лимитер общий для всех рассылок: ограничение Telegram действует на бота целиком
+		self.limiter = RateLimiter(rate, chat_interval)
+
+	def submit(
+			self,
+			job_id: int,
+			recipients: Recipients,
+			send: SendFunc,
+			total: int,
+			on_error: Optional[ErrorFunc] = None,
+			on_progress: Optional[ProgressFunc] = None,
+			on_finish: Optional[ProgressFunc] = None,
+			progress_interval: float = 5.0,
+			initial: Optional[DeliveryResult] = None
+	) -> DeliveryJob:
+		"""Запуск отправки в фоне (initial - уже обработанные получатели при возобновлении)"""
+		initial = initial or DeliveryResult()
+		job = DeliveryJob(success=initial.success, failed=initial.failed, id=job_id, total=total)
+		job.task = asyncio.create_task(
+			self._run_job(job, recipients, send, on_error, on_progress, on_finish, progress_interval)
+		)
+		return job
+
+	async def send_many(
+			self,
+			recipients: Recipients,
+			send: SendFunc,
+			on_error: Optional[ErrorFunc] = None,
+			result: Optional[DeliveryResult] = None
+	) -> DeliveryResult:
+		"""Отправка сообщения всем получателям через пул воркеров"""
+		result = result or DeliveryResult()
+		queue: asyncio.Queue[int] = asyncio.Queue(maxsize=self.workers * 2)
+		workers = [
+			asyncio.create_task(self._worker(queue, send, on_error, result))
+			for _ in range(self.workers)
+		]
+
+		try:
+			async for chat_id in self._iterate(recipients):
+				if isinstance(result, DeliveryJob) and result.is_cancelled:
+					break
+				await queue.put(chat_id)
+			await queue.join()
+		finally:
+			for worker in workers:
+				worker.cancel()
+			await asyncio.gather(*workers, return_exceptions=True)
+
+		return result
+
+	async def _run_job(
+			self,
+			job: DeliveryJob,
+			recipients: Recipients,
+			send: SendFunc,
+			on_error: Optional[ErrorFunc],
+			on_progress: Optional[ProgressFunc],
+			on_finish: Optional[ProgressFunc],
+			progress_interval: float
+	) -> None:
+		reporter = asyncio.create_task(self._report(job, on_progress, progress_interval)) if on_progress else None
+		try:
+			await self.send_many(recipients, send, on_error, result=job)
+		except Exception as e:
+			logger.exception(f"Рассылка {job.id} прервана: {e}")
+		finally:
+			if not job.is_cancelled:
+				job.status = 'done'
+			if reporter:
+				reporter.cancel()
+			if on_finish:
+				try:
+					await on_finish(job)
+				except Exception as e:
+					logger.exception(f"Ошибка завершения рассылки {job.id}: {e}")
+
+	@staticmethod
+	async def _report(job: DeliveryJob, on_progress: ProgressFunc, interval: float) -> None:
+		while True:
+			await asyncio.sleep(interval)
+			try:
+				await on_progress(job)
+			except Exception as e:
+				logger.error(f"Ошибка обновления прогресса рассылки {job.id}: {e}")
+
+	async def _worker(
+			self,
+			queue: asyncio.Queue,
+			send: SendFunc,
+			on_error: Optional[ErrorFunc],
+			result: DeliveryResult
+	) -> None:
+		job = result if isinstance(result, DeliveryJob) else None
+		while True:
+			chat_id = await queue.get()
+			try:
+				if job:
+					await job.wait_resumed()
+					if job.is_cancelled:
+						continue
+				await self._deliver(chat_id, send)
+				result.success += 1
+			except Exception as e:
+				result.failed += 1
+				result.errors[type(e).__name__] += 1
+				logger.error(f"Ошибка отправки пользователю {chat_id}: {e}")
+				if on_error:
+					try:
+						await on_error(chat_id, e)
+					except Exception as callback_error:
+						logger.exception(f"Ошибка обработки неудачной отправки {chat_id}: {callback_error}")
+			finally:
+				queue.task_done()
+
+	async def _deliver(self, chat_id: int, send: SendFunc) -> Any:
+		"""Отправка одному получателю с повтором после TelegramRetryAfter и сетевых ошибок"""
+		attempt = 0
+		while True:
+			await self.limiter.acquire(chat_id)
+			try:
+				return await send(chat_id)
+			except TelegramRetryAfter as e:
+				attempt += 1
+				if attempt > self.max_retries:
+					raise
+				logger.warning(f"Flood control, пауза {e.retry_after} сек. (чат {chat_id})")
+				self.limiter.pause(e.retry_after)
+			except TRANSIENT_ERRORS as e:
+				attempt += 1
+				if attempt > self.max_retries:
+					raise
+				logger.warning(f"Временная ошибка отправки в чат {chat_id}, повтор #{attempt}: {e}")
+				await asyncio.sleep(self.RETRY_BACKOFF * 2 ** (attempt - 1))
+
+	@staticmethod
+	async def _iterate(recipients: Recipients) -> AsyncIterable[int]:
+		if hasattr(recipients, '__aiter__'):
+			async for chat_id in recipients:
+				yield chat_id
+		else:
+			for chat_id in recipients:
+				yield chat_id
@@ -0,0 +1,129 @@
+import asyncio
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List
+
+from ..config import Config
+from ..repositories.channel_repository import ChannelRepository
+from ..repositories.stats_repository import StatsRepository
+from ..utils.counters import UserCounters
+from ..utils.loggers import services as logger
+from ..utils.work_with_date import get_datetime_now
+
+
+class StatsService:
+	"""Статистика бота: общие счетчики в памяти (со сверкой с БД), периоды - по дневным агрегатам"""
+
+	def __init__(
+			self,
+			stats_repo: StatsRepository,
+			channel_repo: ChannelRepository,
+			counters: UserCounters,
+			refresh_interval: float = Config.STATS_REFRESH_INTERVAL,
+			reconcile_interval: float = Config.STATS_RECONCILE_INTERVAL
+	):
+		self.stats_repo = stats_repo
+		self.channel_repo = channel_repo
+		self.counters = counters
+		self.refresh_interval = refresh_interval
+		self.reconcile_interval = reconcile_interval
+		self._tasks: List[asyncio.Task] = []
+
+	async def start(self, rollups: bool = True) -> None:
+		"""Загрузка счетчиков, досчет пропущенных дней и запуск фоновых задач
+
+		rollups=False - только счетчики (дневные агрегаты пересчитывает один процесс)
+		"""
+		try:
+			self.counters.seed(await self.stats_repo.get_totals())
+		except Exception as e:
+			logger.exception(f"Error loading user counters: {e}")
+		self._tasks.append(asyncio.create_task(self._reconcile_loop()))
+
+		if rollups:
+			try:
+				await self._rebuild(incremental=True)
+			except Exception as e:
+				logger.exception(f"Error building daily stats: {e}")
+			self._tasks.append(asyncio.create_task(self._refresh_loop()))
+
+	async def stop(self) -> None:
+		for task in self._tasks:
+			task.cancel()
+		await asyncio.gather(*self._tasks, return_exceptions=True)
+		self._tasks.clear()
+
+	async def _reconcile_loop(self) -> None:
+		# Счетчики расходятся с БД из-за изменений в других процессах и гонок; сверка это исправляет
+		while True:
+			await asyncio.sleep(self.reconcile_interval)
+			try:
+				drift = self.counters.seed(await self.stats_repo.get_totals())
+				if drift:
+					logger.info(f"User counters reconciled, drift: {drift}")
+			except Exception as e:
+				logger.error(f"Error reconciling user counters: {e}")
+
+	async def _rebuild(self, incremental: bool) -> None:
+		"""Пересчет агрегатов: с последнего посчитанного дня или за всю историю"""
+		today = get_datetime_now().date()
+		start = await self.stats_repo.get_last_refreshed_day() if incremental else None
+		if start is None:
+			start = await self.stats_repo.get_first_day()
+			if start is None:
+				return  # Пользователей еще нет
+		else:
+			start -= timedelta(days=1)
+		await self.stats_repo.refresh(start, today)
+
+	async def _refresh_loop(self) -> None:
+		# Сегодня и вчера пересчитываются постоянно. Раз в сутки пересчитывается вся история:
+		# разбан и смена активности меняют агрегаты прошлых дней
+		rebuilt_on = get_datetime_now().date()
+		while True:
+			await asyncio.sleep(self.refresh_interval)
+			today = get_datetime_now().date()
+			try:
+				if today != rebuilt_on:
+					await self._rebuild(incremental=False)
+					rebuilt_on = today
+				else:
+					await self.stats_repo.refresh(today - timedelta(days=1), today)
+			except Exception as e:
+				logger.error(f"Error refreshing daily stats: {e}")
+
+	async def get_stats(self) -> Dict[str, Any]:
+		"""Общая статистика бота"""
+		if self.counters.seeded:
+			totals = {**self.counters.snapshot(), 'channels_count': await self.stats_repo.count_channels()}
+		else:
+			totals = await self.stats_repo.get_totals()
+		main_channel = await self.channel_repo.get_main_channel()
+		backup_channel = await self.channel_repo.get_backup_channel()
+
+		return {
+			**totals,
+			'main_channel': f"<a href='{main_channel.link}'>{main_channel.title}</a>" if main_channel else "Не установлен",
+			'backup_channel': f"<a href='{backup_channel.link}'>{backup_channel.title}</a>" if backup_channel else "Не установлен"
+		}
+
+	async def get_period_stats(self, start_date: datetime, end_date: datetime) -> Dict[str, int]:
+		"""Статистика за период (дни с start_date по end_date, не включая end_date)"""
+		return await self.stats_repo.sum_period(self._as_date(start_date), self._as_date(end_date))
+
+	async def get_daily_stats(self, days: int = 7) -> List[Dict[str, Any]]:
+		"""Статистика по дням за последние days дней (без сегодняшнего)"""
+		today = get_datetime_now().date()
+		records = await self.stats_repo.get_days(today - timedelta(days=days), today)
+		return [
+			{
+				'date': record['day'].strftime("%Y-%m-%d"),
+				'new_users': record['new_users'],
+				'active_users': record['active_users'],
+				'banned_users': record['banned_users']
+			}
+			for record in records
+		]
+
+	@staticmethod
+	def _as_date(value: datetime | date) -> date:
+		return value.date() if isinstance(value, datetime) else value
@@ -4,35 +4,34 @@ from typing import Optional, Tuple
 
 from aiogram import Bot
 
+from .channel_service import ChannelService
 from ..models import User
-from ..repositories.channel_repository import ChannelRepository
 from ..repositories.user_repository import UserRepository
+from ..utils.counters import UserCounters
 from ..utils.loggers import services as logger
+from ..utils.search_index import UserSearchIndex
 
 
 class SubscriptionService:
 	"""Сервис для работы с подписками"""
 
-	def __init__(self, bot: Bot, user_repo: UserRepository, channel_repo: ChannelRepository):
+	def __init__(
+			self,
+			bot: Bot,
+			user_repo: UserRepository,
+			channel_service: ChannelService,
+			counters: UserCounters,
+			search_index: Optional[UserSearchIndex] = None
+	):
 		self.bot = bot
 		self.user_repo = user_repo
-		self.channel_repo = channel_repo
+		self.counters = counters
+		self.search_index = search_index
+		self.channel_service = channel_service
 
 	async def check_subscription(self, user_id: int) -> bool:
 		"""Проверка подписки пользователя на резервный канал"""
-		try:
-			backup_channel = await self.channel_repo.get_backup_channel()
-			if not backup_channel:
-				return True  # Если резервный канал не установлен, пропускаем проверку
-
-			member = await self.bot.get_chat_member(
-				chat_id=backup_channel.channel_id,
-				user_id=user_id
-			)
-			return member.status in ['member', 'administrator', 'creator']
-		except Exception as e:
-			logger.error(f"Error checking subscription for {user_id}: {e}")
-			return False
+		return await self.channel_service.check_subscription(user_id)
 
 	async def verify_user(self, user_id: int, username: Optional[str], full_name: str) -> Tuple[bool, Optional[User]]:
 		"""
@@ -43,13 +42,17 @@ class SubscriptionService:
 			# Проверяем/создаем пользователя
 			user = await self.user_repo.get_by_id(user_id)
 			if not user:
-				user = await self.user_repo.create(User(
+				user = User(
 					user_id=user_id,
 					username=username,
 					full_name=full_name,
 					is_active=True,
 					should_notify=True
-				))
+				)
+				await self.user_repo.create(user)
+				self.counters.add(user)
+				if self.search_index is not None:
+					self.search_index.add(user.user_id, user.username, user.full_name)
 
 			# Проверяем подписку
 			if not await self.check_subscription(user_id):
@@ -1,21 +1,69 @@
-import csv
-from datetime import datetime
-from io import StringIO
-from typing import List, Optional, Dict, Tuple
+import asyncio
+from datetime import datetime, timedelta
+from typing import AsyncIterator, List, Optional, Dict, Tuple
 
+from ..config import Config
 from ..models import User
 from ..repositories import AdminRepository
-from ..repositories.user_repository import UserRepository
+from ..repositories.user_repository import SearchCursor, UserRepository
+from ..utils.counters import UserCounters
 from ..utils.loggers import services as logger
+from ..utils.search_index import SearchHit, UserSearchIndex
 from ..utils.work_with_date import get_datetime_now
 
 
 class UserService:
 	"""Сервис для работы с пользователями"""
 	
-	def __init__(self, user_repo: UserRepository, admin_repo: AdminRepository):
+	def __init__(
+			self,
+			user_repo: UserRepository,
+			admin_repo: AdminRepository,
+			counters: UserCounters,
+			search_index: Optional[UserSearchIndex] = None,
+			index_refresh_interval: float = Config.SEARCH_INDEX_REFRESH_INTERVAL
+	):
 		self.user_repo = user_repo
 		self.admin_repo = admin_repo
+		self.counters = counters
+		self.search_index = search_index
+		self.index_refresh_interval = index_refresh_interval
+		self._index_task: Optional[asyncio.Task] = None
+	
+	async def start(self) -> None:
+		"""Загрузка поискового индекса в фоне (если он включен)"""
+		if self.search_index is not None:
+			self._index_task = asyncio.create_task(self._index_loop())
+	
+	async def stop(self) -> None:
+		if self._index_task:
+			self._index_task.cancel()
+			await asyncio.gather(self._index_task, return_exceptions=True)
+			self._index_task = None
+	
+	async def _index_loop(self) -> None:
+		index = self.search_index
+		since = get_datetime_now()
+		try:
+			async for records in self.user_repo.iter_names():
+				index.load((r['user_id'], r['username'], r['full_name']) for r in records)
+			index.ready = True
+			logger.info(f"Search index loaded: {len(index)} users")
+		except Exception as e:
+			logger.exception(f"Error loading search index: {e}")
+			return
+		
+		# Пользователей, пришедших через другие воркеры, индекс получает из БД
+		while True:
+			await asyncio.sleep(self.index_refresh_interval)
+			started = get_datetime_now()
+			try:
+				# С запасом: транзакции других воркеров фиксируются с задержкой
+				for record in await self.user_repo.get_names_since(since - timedelta(minutes=1)):
+					index.add(record['user_id'], record['username'], record['full_name'])
+				since = started
+			except Exception as e:
+				logger.error(f"Error refreshing search index: {e}")
 	
 	async def get_user_by_id(self, user_id: int = None) -> Optional[User]:
 		"""Получение пользователя по ID"""
@@ -25,19 +73,32 @@ class UserService:
 			logger.error(f"Error getting user {user_id}: {e}")
 			return None
 	
-	async def search_users(self, search_type: str, query: str) -> List[User]:
-		"""Поиск пользователей по типу поиска"""
+	async def search_users(
+			self,
+			search_type: str,
+			query: str,
+			limit: int = 10,
+			after: Optional[SearchCursor] = None
+	) -> Tuple[List[User | SearchHit], Optional[SearchCursor]]:
+		"""Поиск пользователей по типу поиска (страница и курсор следующей страницы)
+		
+		Из загруженного индекса в памяти возвращаются SearchHit (только ID и имена),
+		иначе - пользователи из БД
+		"""
 		query = query.strip()
+		fields = {"username": "username", "nickname": "full_name"}
 		
-		if search_type == "username":
-			return await self.user_repo.get_by_username(query)
-		elif search_type == "nickname":
-			return await self.user_repo.get_by_nickname(query)
+		if search_type in fields:
+			if search_type == "username":
+				query = query.lstrip('@')
+			if self.search_index is not None and self.search_index.ready:
+				return self.search_index.search(fields[search_type], query, limit, after)
+			return await self.user_repo.search(fields[search_type], query, limit, after)
 		elif search_type == "id":
 			if query.isdigit():
 				user = await self.user_repo.get_by_id(int(query))
-				return [user] if user else []
-		return []
+				return ([user] if user else []), None
+		return [], None
 	
 	async def format_user_info(self, user: User) -> Tuple[str, bool, int]:
 		"""Форматирование информации о пользователе"""
@@ -63,6 +124,9 @@ class UserService:
 		
 		try:
 			await self.user_repo.create(user)
+			self.counters.add(user)
+			if self.search_index is not None:
+				self.search_index.add(user.user_id, user.username, user.full_name)
 			logger.info(f"Created new user: {user.user_id}")
 			return user
 		except Exception as e:
@@ -72,7 +136,7 @@ class UserService:
 	async def ban_user(self, user_id: int) -> bool:
 		"""Блокировка пользователя"""
 		try:
-			await self.user_repo.ban_user(user_id)
+			self.counters.apply(await self.user_repo.ban_user(user_id))
 			logger.info(f"Banned user: {user_id}")
 			return True
 		except Exception as e:
@@ -82,7 +146,7 @@ class UserService:
 	async def unban_user(self, user_id: int) -> bool:
 		"""Разблокировка пользователя"""
 		try:
-			await self.user_repo.unban_user(user_id)
+			self.counters.apply(await self.user_repo.unban_user(user_id))
 			logger.info(f"Unbanned user: {user_id}")
 			return True
 		except Exception as e:
@@ -92,7 +156,7 @@ class UserService:
 	async def mark_captcha_passed(self, user_id: int) -> bool:
 		"""Отметка прохождения капчи"""
 		try:
-			await self.user_repo.mark_captcha_passed(user_id)
+			self.counters.apply(await self.user_repo.mark_captcha_passed(user_id))
 			return True
 		except Exception as e:
 			logger.error(f"Error marking captcha passed for {user_id}: {e}")
@@ -101,19 +165,15 @@ class UserService:
 	async def set_notification_status(self, user_id: int, status: bool) -> bool:
 		"""Установка статуса уведомлений"""
 		try:
-			await self.user_repo.set_notification_status(user_id, status)
+			self.counters.apply(await self.user_repo.set_notification_status(user_id, status))
 			return True
 		except Exception as e:
 			logger.error(f"Error setting notification status for {user_id}: {e}")
 			return False
 	
-	async def get_users_for_notification(self) -> List[User]:
-		"""Получение пользователей для уведомлений"""
-		try:
-			return await self.user_repo.get_users_for_notification()
-		except Exception as e:
-			logger.error(f"Error getting users for notification: {e}")
-			return []
+	def iter_users_for_notification(self) -> AsyncIterator[int]:
+		"""Потоковое получение ID пользователей для уведомлений"""
+		return self.user_repo.iter_notification_ids()
 	
 	async def count_users(self) -> Dict[str, int]:
 		"""Получение статистики пользователей"""
@@ -133,83 +193,3 @@ class UserService:
 			return await self.user_repo.get_all()
 		except Exception as e:
 			logger.exception(f"Error getting all users: {e}")
-	
-	async def get_users_file(self, format_type: str) -> Tuple[str, str, str]:
-		"""
-		Получение списка пользователей в выбранном формате
-		Возвращает: (content, filename, caption)
-		"""
-		try:
-			users = await self.user_repo.get_all()
-			total_users = len(users)
-			active_users = sum(1 for u in users if u.is_active)
-			
-			header_info = (
-				f"# Всего пользователей: {total_users}\n"
-				f"# Активных: {active_users}\n"
-				f"# Неактивных: {total_users - active_users}\n"
-				f"# Дата генерации: {get_datetime_now().strftime('%d.%m.%Y %H:%M')}"
-			)
-			
-			if format_type == "txt":
-				return self._format_txt(users, header_info)
-			elif format_type == "csv":
-				return self._format_csv(users, header_info)
-			else:
-				raise ValueError("Неизвестный формат")
-		
-		except Exception as e:
-			logger.error(f"Ошибка при формировании списка пользователей: {e}")
-			return "❌ Не удалось сформировать список", "error.txt", "Ошибка"
-	
-	def _format_txt(self, users: List[User], header: str) -> Tuple[str, str, str]:
-		"""Форматирование в красивый TXT"""
-		result = [header, "\n" + "=" * 50 + "\n"]
-		
-		for i, user in enumerate(users, 1):
-			user_info = (
-					f"👤 Пользователь #{i}\n"
-					f"🆔 ID: {user.user_id}\n"
-					f"👤 Имя: {user.full_name}\n"
-					f"📱 Username: @{user.username if user.username else 'N/A'}\n"
-					f"📅 Дата регистрации: {user.join_date.strftime('%d.%m.%Y %H:%M')}\n"
-					f"🔒 Статус: {'🟢 Активен' if user.is_active else '🔴 Заблокирован'}\n"
-					f"🔔 Уведомления: {'🟢 Вкл' if user.should_notify else '🔴 Выкл'}\n\n"
-					+ "⎯" * 30
-			)
-			result.append(user_info)
-		
-		filename = f"users_{get_datetime_now().strftime('%Y%m%d_%H%M')}.txt"
-		caption = "📋 Список пользователей (TXT)"
-		return "\n\n".join(result), filename, caption
-	
-	def _format_csv(self, users: List[User], header: str) -> Tuple[str, str, str]:
-		"""Форматирование в CSV"""
-		# Создаем CSV в памяти
-		output = StringIO()
-		writer = csv.writer(output, delimiter=',', quotechar='"', quoting=csv.QUOTE_MINIMAL)
-		
-		# Заголовки CSV
-		writer.writerow([
-			"ID", "Full Name", "Username", "Registration Date",
-			"Is Active", "Notifications"
-		])
-		
-		# Данные пользователей
-		for user in users:
-			writer.writerow([
-				user.user_id,
-				user.full_name,
-				f"@{user.username}" if user.username else "",
-				user.join_date.strftime('%Y-%m-%d %H:%M'),
-				"Yes" if user.is_active else "No",
-				"Yes" if user.should_notify else "No"
-			])
-		
-		# Добавляем header как комментарий
-		csv_data = output.getvalue().replace('\r\n', '\n').replace('\r', '\n')
-		csv_content = f"{header}\n{csv_data}"
-		
-		filename = f"users_{get_datetime_now().strftime('%Y%m%d_%H%M')}.csv"
-		caption = "📊 Список пользователей (CSV)"
-		return csv_content, filename, caption
@@ -0,0 +1,2 @@
+from .captcha_store import CaptchaStore, MemoryCaptchaStore, RedisCaptchaStore, create_captcha_store
+from .fsm_storage import PostgresStorage
@@ -0,0 +1,143 @@
+import asyncio
+import time
+from typing import Dict, Optional, Tuple
+
+from ..config import Config
+from ..models import Captcha
+from ..utils.loggers import services as logger
+
+
+# Результат проверки: (угадал ли, число попыток) или None, если капчи нет
+CheckResult = Optional[Tuple[bool, int]]
+
+
+class CaptchaStore:
+	"""Хранилище временного состояния капчи"""
+
+	def __init__(self, ttl: int = Config.CAPTCHA_TTL, max_attempts: int = Config.CAPTCHA_MAX_ATTEMPTS):
+		self.ttl = ttl
+		self.max_attempts = max_attempts
+
+	async def set(self, captcha: Captcha) -> None:
+		raise NotImplementedError
+
+	async def check(self, user_id: int, answer: str) -> CheckResult:
+		"""Атомарная проверка ответа с увеличением счетчика попыток.
+		Капча удаляется при верном ответе и при исчерпании попыток"""
+		raise NotImplementedError
+
+	async def start(self) -> None:
+		pass
+
+	async def close(self) -> None:
+		pass
+
+
+class MemoryCaptchaStore(CaptchaStore):
+	"""Капчи в памяти процесса с истечением по TTL"""
+
+	SWEEP_INTERVAL = 60
+
+	def __init__(self, ttl: int = Config.CAPTCHA_TTL, max_attempts: int = Config.CAPTCHA_MAX_ATTEMPTS):
+		super().__init__(ttl, max_attempts)
+		self._items: Dict[int, Tuple[float, Captcha]] = {}
+		self._sweeper: Optional[asyncio.Task] = None
+
+	async def set(self, captcha: Captcha) -> None:
+		self._items[captcha.user_id] = (time.monotonic() + self.ttl, captcha)
+
+	async def check(self, user_id: int, answer: str) -> CheckResult:
+		# Без await внутри: между чтением и записью не может вклиниться другой обработчик
+		item = self._items.get(user_id)
+		if not item or item[0] <= time.monotonic():
+			self._items.pop(user_id, None)
+			return None
+
+		captcha = item[1]
+		captcha.attempts += 1
+		if answer.strip().lower() == captcha.text.lower():
+			del self._items[user_id]
+			return True, captcha.attempts
+
+		if captcha.attempts >= self.max_attempts:
+			del self._items[user_id]
+		return False, captcha.attempts
+
+	async def start(self) -> None:
+		if not self._sweeper:
+			self._sweeper = asyncio.create_task(self._sweep())
+
+	async def close(self) -> None:
+		if self._sweeper:
+			self._sweeper.cancel()
+			self._sweeper = None
+
+	async def _sweep(self) -> None:
+		"""Периодическое удаление просроченных капч"""
+		while True:
+			await asyncio.sleep(self.SWEEP_INTERVAL)
+			now = time.monotonic()
+			expired = [user_id for user_id, (expires_at, _) in self._items.items() if expires_at <= now]
+			for user_id in expired:
+				self._items.pop(user_id, None)
+			if expired:
+				logger.debug(f"Удалено просроченных капч: {len(expired)}")
+
+
+class RedisCaptchaStore(CaptchaStore):
+	"""Капчи в Redis (или совместимом сервере): общие для нескольких процессов, TTL средствами сервера"""
+
+	# KEYS[1] - ключ капчи, ARGV[1] - ответ в нижнем регистре, ARGV[2] - лимит попыток
+	CHECK_SCRIPT = """
+	local text = redis.call('HGET', KEYS[1], 'text')
+	if not text then
+		return nil
+	end
+	local attempts = redis.call('HINCRBY', KEYS[1], 'attempts', 1)
+	if string.lower(text) == ARGV[1] then
+		redis.call('DEL', KEYS[1])
+		return {1, attempts}
+	end
+	if attempts >= tonumber(ARGV[2]) then
+		redis.call('DEL', KEYS[1])
+	end
+	return {0, attempts}
+	"""
+
+	def __init__(self, url: str, ttl: int = Config.CAPTCHA_TTL, max_attempts: int = Config.CAPTCHA_MAX_ATTEMPTS):
+		super().__init__(ttl, max_attempts)
+		try:
+			from redis import asyncio as redis
+		except ImportError as e:
+			raise RuntimeError("Для CAPTCHA_STORE=redis установите пакет redis") from e
+
+		self._redis = redis.from_url(url)
+		self._check = self._redis.register_script(self.CHECK_SCRIPT)
+
+	@staticmethod
+	def _key(user_id: int) -> str:
+		return f"captcha:{user_id}"
+
+	async def set(self, captcha: Captcha) -> None:
+		key = self._key(captcha.user_id)
+		async with self._redis.pipeline(transaction=True) as pipe:
+			pipe.hset(key, mapping={'text': captcha.text, 'attempts': captcha.attempts})
+			pipe.expire(key, self.ttl)
+			await pipe.execute()
+
+	async def check(self, user_id: int, answer: str) -> CheckResult:
+		result = await self._check(keys=[self._key(user_id)], args=[answer.strip().lower(), self.max_attempts])
+		if result is None:
+			return None
+		success, attempts = result
+		return bool(success), int(attempts)
+
+	async def close(self) -> None:
+		await self._redis.aclose()
+
+
+def create_captcha_store() -> CaptchaStore:
+	"""Хранилище капч по настройке CAPTCHA_STORE"""
+	if Config.CAPTCHA_STORE == 'redis':
+		return RedisCaptchaStore(Config.REDIS_URL)
+	return MemoryCaptchaStore()
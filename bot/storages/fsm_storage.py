@@ -0,0 +1,124 @@
+import asyncio
+import json
+from dataclasses import asdict
+from datetime import date, datetime
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, KeyBuilder, StateType, StorageKey
+
+from ..config import Config
+from ..models import Button
+from ..repositories.fsm_repository import FSMRepository
+from ..utils.cache import TTLCache
+from ..utils.loggers import services as logger
+
+
+# Состояние и данные в виде JSON-строки
+Entry = Tuple[Optional[str], str]
+
+EMPTY: Entry = (None, '{}')
+
+
+def _encode(value: Any) -> Any:
+	if isinstance(value, datetime):
+		return {'__datetime__': value.isoformat()}
+	if isinstance(value, date):
+		return {'__date__': value.isoformat()}
+	if isinstance(value, Button):
+		return {'__button__': asdict(value)}
+	raise TypeError(f"Тип {type(value).__name__} нельзя сохранить в состоянии FSM")
+
+
+def _decode(value: Dict[str, Any]) -> Any:
+	if '__datetime__' in value:
+		return datetime.fromisoformat(value['__datetime__'])
+	if '__date__' in value:
+		return date.fromisoformat(value['__date__'])
+	if '__button__' in value:
+		return Button(**value['__button__'])
+	return value
+
+
+def dumps(data: Mapping[str, Any]) -> str:
+	return json.dumps(data, default=_encode, ensure_ascii=False)
+
+
+def loads(data: str) -> Dict[str, Any]:
+	return json.loads(data, object_hook=_decode)
+
+
+class PostgresStorage(BaseStorage):
+	"""FSM-хранилище в PostgreSQL с записью сразу в БД и кэшем горячих ключей в памяти.
+
+	Кэш общий для процессов через EventBus: запись сбрасывает ключ у остальных, а короткий
+	TTL ограничивает устаревание, если событие потерялось.
+	"""
+
+	CLEANUP_INTERVAL = 3600  # Секунды между удалениями устаревших состояний
+
+	def __init__(
+			self,
+			repository: FSMRepository,
+			key_builder: Optional[KeyBuilder] = None,
+			cache_size: int = Config.FSM_CACHE_SIZE,
+			cache_ttl: float = Config.FSM_CACHE_TTL,
+			ttl_days: int = Config.FSM_TTL_DAYS
+	):
+		self.repository = repository
+		self.key_builder = key_builder or DefaultKeyBuilder(with_bot_id=True, with_destiny=True)
+		self.ttl_days = ttl_days
+		self.cache: TTLCache[Entry] = TTLCache(cache_size, cache_ttl)
+		self._cleaner: Optional[asyncio.Task] = None
+
+	def start(self) -> None:
+		"""Запуск фоновой очистки устаревших состояний (нужен запущенный event loop)"""
+		if not self._cleaner:
+			self._cleaner = asyncio.create_task(self._cleanup_loop())
+
+	async def close(self) -> None:
+		if self._cleaner:
+			self._cleaner.cancel()
+			await asyncio.gather(self._cleaner, return_exceptions=True)
+			self._cleaner = None
+
+	async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+		name = self.key_builder.build(key)
+		state = state.state if isinstance(state, State) else state
+		await self._put(name, await self.repository.set_state(name, state))
+
+	async def get_state(self, key: StorageKey) -> Optional[str]:
+		state, _ = await self._get(key)
+		return state
+
+	async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+		name = self.key_builder.build(key)
+		await self._put(name, await self.repository.set_data(name, dumps(data)))
+
+	async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+		_, data = await self._get(key)
+		return loads(data)
+
+	async def _get(self, key: StorageKey) -> Entry:
+		name = self.key_builder.build(key)
+		return await self.cache.get_or_load(name, lambda: self._load(name))
+
+	async def _load(self, name: str) -> Entry:
+		return await self.repository.get(name) or EMPTY
+
+	async def _put(self, name: str, entry: Entry) -> None:
+		"""Запись уже в БД: сбрасываем ключ у других процессов и запоминаем у себя"""
+		if entry == EMPTY:
+			await self.repository.delete_empty(name)
+		self.cache.pop(name)
+		self.cache.set(name, entry)
+
+	async def _cleanup_loop(self) -> None:
+		while True:
+			await asyncio.sleep(self.CLEANUP_INTERVAL)
+			try:
+				removed = await self.repository.delete_expired(self.ttl_days)
+				if removed:
+					logger.info(f"Удалено устаревших состояний FSM: {removed}")
+			except Exception as e:
+				logger.error(f"Ошибка очистки состояний FSM: {e}")
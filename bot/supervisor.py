@@ -0,0 +1,159 @@
+# Режим нескольких процессов: супервизор получает обновления и раздает их воркерам по user_id
+
+import asyncio
+import multiprocessing
+import queue
+import signal
+from typing import List, Optional
+
+from aiogram import Bot, Dispatcher
+from aiogram.exceptions import TelegramNetworkError, TelegramServerError
+from aiogram.types import Update
+from aiohttp import web
+
+from .config import Config
+from .handlers import register_handlers
+from .main import create_bot, create_dispatcher
+from .utils.loggers import main_bot as logger
+from .webhook import UpdateFeeder, WebhookHandler, serve_webhook, update_key
+
+
+QUEUE_SIZE = 1000  # Обновлений в очереди одного воркера
+WATCH_INTERVAL = 5  # Как часто в режиме webhook проверять, живы ли воркеры (секунды)
+
+
+def shard_of(update: Update, workers: int) -> int:
+	"""Номер воркера для обновления: все обновления одного пользователя попадают в один процесс,
+	а там UpdateFeeder обрабатывает их по очереди"""
+	key = update_key(update)
+	return key % workers if key is not None else 0
+
+
+def run_worker(worker_id: int, updates: multiprocessing.Queue) -> None:
+	"""Точка входа процесса-воркера"""
+	# Остановку воркера выполняет супервизор через очередь
+	signal.signal(signal.SIGINT, signal.SIG_IGN)
+	Config.WORKER_ID = worker_id
+	asyncio.run(_worker(updates))
+
+
+async def _worker(updates: multiprocessing.Queue) -> None:
+	bot = create_bot()
+	dp, pool = await create_dispatcher(bot)
+	feeder = UpdateFeeder(bot, dp)
+	loop = asyncio.get_running_loop()
+
+	await dp.emit_startup(bot=bot)
+	logger.info(f"Воркер {Config.WORKER_ID} запущен")
+	try:
+		while True:
+			raw = await loop.run_in_executor(None, updates.get)
+			if raw is None:
+				break
+			await feeder.feed(Update.model_validate(raw, context={"bot": bot}))
+	finally:
+		await feeder.wait_closed()
+		await dp.emit_shutdown(bot=bot)
+		await bot.session.close()
+		await pool.close()
+
+
+class Supervisor:
+	"""Получение обновлений (long polling или webhook, по BOT_MODE) и распределение их по процессам"""
+
+	def __init__(self, workers: int = Config.WORKERS):
+		self.workers = workers
+		self._context = multiprocessing.get_context('spawn')
+		self._queues: List[multiprocessing.Queue] = [self._context.Queue(QUEUE_SIZE) for _ in range(workers)]
+		self._processes: List[Optional[multiprocessing.Process]] = [None] * workers
+
+	def _start_worker(self, worker_id: int) -> None:
+		process = self._context.Process(
+			target=run_worker,
+			args=(worker_id, self._queues[worker_id]),
+			name=f"bot-worker-{worker_id}"
+		)
+		process.start()
+		self._processes[worker_id] = process
+
+	def _check_workers(self) -> None:
+		"""Перезапуск упавших воркеров (очередь сохраняется, обновления не теряются)"""
+		for worker_id, process in enumerate(self._processes):
+			if process and not process.is_alive():
+				logger.error(f"Воркер {worker_id} завершился с кодом {process.exitcode}, перезапуск")
+				self._start_worker(worker_id)
+
+	async def run(self) -> None:
+		for worker_id in range(self.workers):
+			self._start_worker(worker_id)
+
+		bot = create_bot()
+		try:
+			if Config.BOT_MODE == 'webhook':
+				await self._serve(bot)
+			else:
+				await bot.delete_webhook()
+				await self._poll(bot)
+		finally:
+			await bot.session.close()
+			self._stop_workers()
+
+	@staticmethod
+	def _allowed_updates() -> List[str]:
+		# Типы обновлений берем из зарегистрированных обработчиков, как это делает start_polling
+		dp = Dispatcher()
+		register_handlers(dp)
+		return dp.resolve_used_update_types()
+
+	async def _dispatch(self, update: Update) -> None:
+		shard = shard_of(update, self.workers)
+		raw = update.model_dump(mode='json', exclude_unset=True, by_alias=True)
+		# Очередь ограничена: если воркер не успевает, супервизор ждет
+		await asyncio.get_running_loop().run_in_executor(None, self._queues[shard].put, raw)
+
+	async def _serve(self, bot: Bot) -> None:
+		"""Прием обновлений по webhook с тем же распределением по воркерам"""
+		async def watch():
+			while True:
+				await asyncio.sleep(WATCH_INTERVAL)
+				self._check_workers()
+
+		watcher = asyncio.create_task(watch())
+		try:
+			await serve_webhook(bot, web.Application(), WebhookHandler(bot, self._dispatch), self._allowed_updates())
+		finally:
+			watcher.cancel()
+
+	async def _poll(self, bot: Bot) -> None:
+		allowed_updates = self._allowed_updates()
+		offset = None
+		while True:
+			try:
+				updates = await bot.get_updates(offset=offset, timeout=30, allowed_updates=allowed_updates)
+			except (TelegramNetworkError, TelegramServerError) as e:
+				logger.warning(f"Ошибка получения обновлений: {e}")
+				await asyncio.sleep(1)
+				continue
+
+			for update in updates:
+				await self._dispatch(update)
+				offset = update.update_id + 1
+
+			self._check_workers()
+
+	def _stop_workers(self) -> None:
+		for updates in self._queues:
+			try:
+				updates.put(None, timeout=5)
+			except queue.Full:
+				pass
+		for process in self._processes:
+			if process:
+				process.join(timeout=30)
+				if process.is_alive():
+					process.terminate()
+
+
+async def supervise() -> None:
+	logger.info(f"Запуск в режиме {Config.WORKERS} воркеров")
+	await Supervisor().run()
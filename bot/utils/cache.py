@@ -0,0 +1,92 @@
+import copy
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Generic, Hashable, Iterable, List, Optional, Tuple, TypeVar
+
+
+V = TypeVar('V')
+
+MISSING = object()
+
+
+class TTLCache(Generic[V]):
+	"""LRU-кэш ограниченного размера с временем жизни записей"""
+
+	def __init__(self, maxsize: int, ttl: float):
+		self.maxsize = maxsize
+		self.ttl = ttl
+		self._data: OrderedDict[Hashable, Tuple[float, V]] = OrderedDict()
+		self.hits = 0
+		self.misses = 0
+		self._generation = 0  # Растет при каждой инвалидации
+		# Рассылка инвалидации другим процессам (ключи или None - весь кэш), см. EventBus.share
+		self.on_invalidate: Optional[Callable[[Optional[List[Hashable]]], Any]] = None
+
+	def __len__(self) -> int:
+		return len(self._data)
+
+	def get(self, key: Hashable, default: Any = MISSING) -> Any:
+		"""Значение по ключу или default, если записи нет или она устарела"""
+		item = self._data.get(key)
+		if item is None:
+			self.misses += 1
+			return default
+
+		expires_at, value = item
+		if expires_at <= time.monotonic():
+			del self._data[key]
+			self.misses += 1
+			return default
+
+		self._data.move_to_end(key)
+		self.hits += 1
+		return value
+
+	def set(self, key: Hashable, value: V, ttl: Optional[float] = None) -> None:
+		self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+		self._data.move_to_end(key)
+		while len(self._data) > self.maxsize:
+			self._data.popitem(last=False)
+
+	def pop(self, key: Hashable) -> None:
+		self.drop([key])
+		self._notify([key])
+
+	def pop_many(self, keys: Iterable[Hashable]) -> None:
+		keys = list(keys)
+		self.drop(keys)
+		self._notify(keys)
+
+	def clear(self) -> None:
+		self.drop(None)
+		self._notify(None)
+
+	def drop(self, keys: Optional[Iterable[Hashable]]) -> None:
+		"""Инвалидация только в этом процессе (ключи или None - весь кэш)"""
+		self._generation += 1
+		if keys is None:
+			self._data.clear()
+			return
+		for key in keys:
+			self._data.pop(key, None)
+
+	def _notify(self, keys: Optional[List[Hashable]]) -> None:
+		if self.on_invalidate is not None:
+			self.on_invalidate(keys)
+
+	async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[V]]) -> V:
+		"""Read-through: значение из кэша или из loader (None тоже кэшируется).
+		Возвращается копия, чтобы изменения вызывающего кода не попадали в кэш"""
+		value = self.get(key)
+		if value is MISSING:
+			generation = self._generation
+			value = await loader()
+			# Если во время загрузки была инвалидация, значение могло устареть
+			if generation == self._generation:
+				self.set(key, value)
+		return copy.copy(value)
+
+	def stats(self) -> str:
+		total = self.hits + self.misses
+		ratio = self.hits / total * 100 if total else 0
+		return f"{len(self)}/{self.maxsize} записей, попаданий {ratio:.1f}%"
@@ -0,0 +1,93 @@
+# Колоночное представление пользователей для массовых операций (экспорт, статистика)
+
+from array import array
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator
+
+
+# Флаги пользователя в порядке битов (упаковываются в одно число уже в SQL)
+USER_FLAGS = ('is_active', 'is_banned', 'captcha_passed', 'should_notify')
+
+
+class BitArray:
+	"""Массив флагов, упакованных по 8 в байт"""
+
+	__slots__ = ('_bits', '_size')
+
+	def __init__(self):
+		self._bits = bytearray()
+		self._size = 0
+
+	def __len__(self) -> int:
+		return self._size
+
+	def __getitem__(self, index: int) -> bool:
+		if index < 0:
+			index += self._size
+		if not 0 <= index < self._size:
+			raise IndexError(index)
+		return bool(self._bits[index >> 3] >> (index & 7) & 1)
+
+	def __iter__(self) -> Iterator[bool]:
+		for index in range(self._size):
+			yield self[index]
+
+	def append(self, flag: bool) -> None:
+		if self._size & 7 == 0:
+			self._bits.append(0)
+		if flag:
+			self._bits[-1] |= 1 << (self._size & 7)
+		self._size += 1
+
+	def count(self) -> int:
+		"""Количество установленных флагов"""
+		return int.from_bytes(self._bits, 'little').bit_count()
+
+	def nbytes(self) -> int:
+		return len(self._bits)
+
+	def to_numpy(self) -> Any:
+		import numpy as np
+		return np.unpackbits(np.frombuffer(self._bits, dtype=np.uint8), count=self._size, bitorder='little').astype(bool)
+
+
+@dataclass(slots=True)
+class UserColumns:
+	"""Пользователи по колонкам: ID и даты в типизированных массивах, флаги - битами"""
+	user_ids: array = field(default_factory=lambda: array('q'))
+	join_dates: array = field(default_factory=lambda: array('d'))  # POSIX-время
+	is_active: BitArray = field(default_factory=BitArray)
+	is_banned: BitArray = field(default_factory=BitArray)
+	captcha_passed: BitArray = field(default_factory=BitArray)
+	should_notify: BitArray = field(default_factory=BitArray)
+
+	def __len__(self) -> int:
+		return len(self.user_ids)
+
+	def extend(self, rows: Iterable[tuple]) -> None:
+		"""Добавление строк вида (user_id, join_date, flags)"""
+		flags = [getattr(self, name) for name in USER_FLAGS]
+		for user_id, join_date, packed in rows:
+			self.user_ids.append(user_id)
+			self.join_dates.append(join_date or 0.0)
+			for bit, column in enumerate(flags):
+				column.append(packed >> bit & 1)
+
+	def nbytes(self) -> int:
+		"""Объем данных колонок в байтах"""
+		return (
+			self.user_ids.itemsize * len(self.user_ids)
+			+ self.join_dates.itemsize * len(self.join_dates)
+			+ sum(getattr(self, name).nbytes() for name in USER_FLAGS)
+		)
+
+	def to_numpy(self) -> Dict[str, Any]:
+		"""Колонки в виде массивов NumPy (ID и даты без копирования)"""
+		import numpy as np
+		columns = {
+			'user_id': np.frombuffer(self.user_ids, dtype=np.int64),
+			'join_date': np.frombuffer(self.join_dates, dtype=np.float64),
+		}
+		for name in USER_FLAGS:
+			columns[name] = getattr(self, name).to_numpy()
+		return columns
@@ -31,6 +31,7 @@ super_admin_commands = [
 developer_commands = [
 		BotCommand(command='/logs', description='Получить Логи'),
 		BotCommand(command='/backup', description="Сделать бэкап"),
+		BotCommand(command='/metrics', description="Внутренние метрики бота"),
 ]
 
 commands_list = [base_commands, regular_admin_commands, super_admin_commands, developer_commands]
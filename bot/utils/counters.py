@@ -0,0 +1,65 @@
+# Счетчики пользователей в памяти процесса: /stats без запросов к таблице users
+
+from typing import Any, Dict, Iterable, Mapping, Tuple
+
+from .columns import USER_FLAGS
+
+
+# Флаги пользователя в порядке USER_FLAGS: (is_active, is_banned, captcha_passed, should_notify)
+Flags = Tuple[bool, bool, bool, bool]
+FlagChange = Tuple[Flags, Flags]  # (до изменения, после)
+
+
+class UserCounters:
+	"""Общее число, активные, забаненные и получающие уведомления пользователи"""
+
+	__slots__ = ('total', 'active', 'banned', 'notifiable', 'seeded')
+
+	def __init__(self):
+		self.total = 0
+		self.active = 0
+		self.banned = 0
+		self.notifiable = 0
+		self.seeded = False  # Пока счетчики не загружены из БД, им нельзя верить
+
+	def seed(self, totals: Mapping[str, int]) -> Dict[str, int]:
+		"""Загрузка значений из БД, возвращает расхождение с тем, что было насчитано"""
+		drift = {
+			name: totals[name] - value
+			for name, value in self.snapshot().items()
+			if self.seeded and totals[name] != value
+		}
+		self.total = totals['total_users']
+		self.active = totals['active_users']
+		self.banned = totals['banned_users']
+		self.notifiable = totals['notifiable_users']
+		self.seeded = True
+		return drift
+
+	def add(self, user: Any) -> None:
+		"""Новый пользователь"""
+		self.total += 1
+		self._count(tuple(getattr(user, name) for name in USER_FLAGS), 1)
+
+	def apply(self, changes: Iterable[FlagChange]) -> None:
+		"""Изменения флагов, возвращенные репозиторием"""
+		for before, after in changes:
+			self._count(before, -1)
+			self._count(after, 1)
+
+	def _count(self, flags: Flags, sign: int) -> None:
+		is_active, is_banned, captcha_passed, should_notify = flags
+		if is_active and not is_banned:
+			self.active += sign
+			if captcha_passed and should_notify:
+				self.notifiable += sign
+		if is_banned:
+			self.banned += sign
+
+	def snapshot(self) -> Dict[str, int]:
+		return {
+			'total_users': self.total,
+			'active_users': self.active,
+			'banned_users': self.banned,
+			'notifiable_users': self.notifiable
+		}
@@ -0,0 +1,61 @@
+# Потоковая выгрузка файлов: данные формируются частями прямо во время загрузки в Telegram
+
+import zlib
+from typing import TYPE_CHECKING, AsyncGenerator, AsyncIterator, Callable, List, Optional
+
+from aiogram.types.input_file import DEFAULT_CHUNK_SIZE, InputFile
+
+if TYPE_CHECKING:
+	from aiogram import Bot
+
+
+class ChunkWriter:
+	"""Накопление текста и выдача байтов частями заданного размера (с gzip на лету)"""
+
+	def __init__(self, chunk_size: int = DEFAULT_CHUNK_SIZE, compress: bool = False, encoding: str = 'utf-8'):
+		self.chunk_size = chunk_size
+		self.encoding = encoding
+		# wbits=31 - формат gzip (заголовок и контрольная сумма), а не голый deflate
+		self._compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+		self._parts: List[bytes] = []
+		self._size = 0
+
+	def write(self, text: str) -> None:
+		self.write_bytes(text.encode(self.encoding))
+
+	def write_bytes(self, data: bytes) -> None:
+		if self._compressor:
+			data = self._compressor.compress(data)
+		if data:
+			self._parts.append(data)
+			self._size += len(data)
+
+	def ready(self) -> bool:
+		"""Накоплено достаточно для отправки части"""
+		return self._size >= self.chunk_size
+
+	def take(self) -> bytes:
+		chunk = b''.join(self._parts)
+		self._parts.clear()
+		self._size = 0
+		return chunk
+
+	def close(self) -> bytes:
+		"""Остаток данных (и завершение gzip-потока)"""
+		if self._compressor:
+			self._parts.append(self._compressor.flush())
+			self._compressor = None
+		return self.take()
+
+
+class StreamInputFile(InputFile):
+	"""Файл для отправки, который генерируется заново при каждой попытке загрузки"""
+
+	def __init__(self, chunks: Callable[[], AsyncIterator[bytes]], filename: str, chunk_size: int = DEFAULT_CHUNK_SIZE):
+		super().__init__(filename=filename, chunk_size=chunk_size)
+		self._chunks = chunks
+
+	async def read(self, bot: Optional['Bot']) -> AsyncGenerator[bytes, None]:
+		async for chunk in self._chunks():
+			if chunk:
+				yield chunk
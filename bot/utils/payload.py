@@ -0,0 +1,59 @@
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from aiogram import Bot
+from aiogram.types import InlineKeyboardMarkup, Message
+from aiogram.utils.keyboard import InlineKeyboardBuilder
+
+from ..models import Button
+
+
+# media_type -> (метод бота, параметр с file_id)
+MEDIA_METHODS = {
+	'photo': ('send_photo', 'photo'),
+	'video': ('send_video', 'video'),
+	'animation': ('send_animation', 'animation'),
+	'document': ('send_document', 'document'),
+}
+
+
+def build_keyboard(buttons: List[Button], callback_prefix: str) -> Optional[InlineKeyboardMarkup]:
+	"""Клавиатура из кнопок шаблона (текстовые кнопки получают callback_data '<prefix>:<id>')"""
+	if not buttons:
+		return None
+
+	builder = InlineKeyboardBuilder()
+	for btn in buttons:
+		if btn.button_type == 'url':
+			builder.button(text=btn.text, url=btn.value)
+		else:
+			builder.button(text=btn.text, callback_data=f"{callback_prefix}:{btn.id}")
+	builder.adjust(1)  # 1 кнопка в ряд
+	return builder.as_markup()
+
+
+class MessagePayload:
+	"""Сообщение, собранное один раз: метод бота и параметры, остается подставить chat_id"""
+
+	__slots__ = ('method', 'kwargs')
+
+	def __init__(self, method: Callable[..., Awaitable[Message]], kwargs: Dict[str, Any]):
+		self.method = method
+		self.kwargs = kwargs
+
+	@classmethod
+	def build(
+			cls,
+			bot: Bot,
+			text: str,
+			media_type: Optional[str] = None,
+			media_id: Optional[str] = None,
+			keyboard: Optional[InlineKeyboardMarkup] = None
+	) -> 'MessagePayload':
+		if media_id and media_type in MEDIA_METHODS:
+			method_name, media_field = MEDIA_METHODS[media_type]
+			return cls(getattr(bot, method_name), {media_field: media_id, 'caption': text, 'reply_markup': keyboard})
+
+		return cls(bot.send_message, {'text': text, 'reply_markup': keyboard})
+
+	async def send(self, chat_id: int) -> Message:
+		return await self.method(chat_id=chat_id, **self.kwargs)
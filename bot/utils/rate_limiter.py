@@ -0,0 +1,74 @@
+import asyncio
+import time
+from typing import Dict, Optional
+
+
+class TokenBucket:
+	"""Токен-бакет: не более rate событий в секунду с запасом capacity"""
+
+	def __init__(self, rate: float, capacity: Optional[float] = None):
+		self.rate = rate
+		self.capacity = capacity or rate
+		self._tokens = self.capacity
+		self._updated = time.monotonic()
+		self._blocked_until = 0.0
+		self._lock = asyncio.Lock()
+
+	def _refill(self, now: float) -> None:
+		self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+		self._updated = now
+
+	async def acquire(self) -> None:
+		"""Ожидание свободного токена"""
+		async with self._lock:
+			while True:
+				now = time.monotonic()
+				if now < self._blocked_until:
+					await asyncio.sleep(self._blocked_until - now)
+					continue
+
+				self._refill(now)
+				if self._tokens >= 1:
+					self._tokens -= 1
+					return
+
+				await asyncio.sleep((1 - self._tokens) / self.rate)
+
+	def block(self, seconds: float) -> None:
+		"""Остановка выдачи токенов на указанное время"""
+		self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+		self._tokens = 0
+
+
+class RateLimiter:
+	"""Глобальный лимит бота и минимальный интервал между сообщениями в один чат"""
+
+	def __init__(self, rate: float, chat_interval: float):
+		self.bucket = TokenBucket(rate)
+		self.chat_interval = chat_interval
+		self._chat_next: Dict[int, float] = {}
+
+	async def acquire(self, chat_id: int) -> None:
+		"""Ожидание разрешения на отправку в чат"""
+		now = time.monotonic()
+		next_at = self._chat_next.get(chat_id, 0.0)
+		self._chat_next[chat_id] = max(now, next_at) + self.chat_interval
+		if next_at > now:
+			await asyncio.sleep(next_at - now)
+
+		await self.bucket.acquire()
+
+		if len(self._chat_next) > 10_000:
+			self._cleanup()
+
+	def pause(self, seconds: float) -> None:
+		"""Пауза для всех отправок (после TelegramRetryAfter)"""
+		self.bucket.block(seconds)
+
+	def _cleanup(self) -> None:
+		now = time.monotonic()
+		self._chat_next = {
+			chat_id: next_at
+			for chat_id, next_at in self._chat_next.items()
+			if next_at > now
+		}
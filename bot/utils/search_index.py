@@ -0,0 +1,271 @@
+# Поисковый индекс пользователей в памяти процесса: поиск админом без запроса к БД
+
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter
+from dataclasses import dataclass
+from heapq import nsmallest
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+# (ранг, user_id) последнего показанного результата - как курсор поиска в UserRepository
+Cursor = Tuple[float, int]
+
+_EMPTY = 0xFFFFFFFF  # Нет слота
+
+
+@dataclass(slots=True)
+class SearchHit:
+	"""Найденный пользователь: только то, что хранится в индексе"""
+	user_id: int
+	username: Optional[str]
+	full_name: str
+
+
+def trigrams(value: str) -> Set[str]:
+	"""Триграммы строки с отступами по краям, как в pg_trgm (но без разбиения на слова)"""
+	padded = f"  {value} "
+	return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class _FieldIndex:
+	"""Индекс одного поля по различным значениям (одинаковые имена считаются один раз):
+	отсортированный массив для префиксов и триграммы -> номера значений"""
+
+	__slots__ = ('keys', 'values', 'ids', 'first', 'extra', 'postings', 'sizes')
+
+	def __init__(self):
+		self.keys: List[str] = []  # Значения в нижнем регистре по возрастанию
+		self.values: List[str] = []  # Номер значения -> значение
+		self.ids: Dict[str, int] = {}
+		# Слоты пользователей со значением: первый в массиве, остальные (редкие дубли) в словаре
+		self.first = array('I')
+		self.extra: Dict[int, List[int]] = {}
+		self.postings: Dict[str, array] = {}
+		self.sizes = array('H')  # Число триграмм значения
+
+	def add(self, slot: int, value: Optional[str], bulk: bool = False) -> None:
+		"""Добавление значения слота (bulk - без сортировки, см. UserSearchIndex.load)"""
+		if not value:
+			return
+		value = value.lower()
+		value_id = self.ids.get(value)
+		if value_id is not None:
+			if self.first[value_id] == _EMPTY:
+				self.first[value_id] = slot
+			else:
+				self.extra.setdefault(value_id, []).append(slot)
+			return
+
+		value_id = self.ids[value] = len(self.values)
+		self.values.append(value)
+		self.first.append(slot)
+		grams = trigrams(value)
+		for gram in grams:
+			posting = self.postings.get(gram)
+			if posting is None:
+				posting = self.postings[gram] = array('I')
+			posting.append(value_id)
+		self.sizes.append(min(len(grams), 0xFFFF))
+		if bulk:
+			self.keys.append(value)
+		else:
+			insort(self.keys, value)
+
+	def remove(self, slot: int, value: Optional[str]) -> None:
+		# Само значение остается в индексе: без слотов оно просто не попадает в выдачу
+		if not value:
+			return
+		value_id = self.ids[value.lower()]
+		extra = self.extra.get(value_id)
+		if self.first[value_id] == slot:
+			self.first[value_id] = extra.pop(0) if extra else _EMPTY
+		elif extra:
+			extra.remove(slot)
+		if extra is not None and not extra:
+			del self.extra[value_id]
+
+	def slots(self, value_id: int) -> List[int]:
+		first = self.first[value_id]
+		if first == _EMPTY:
+			return []
+		return [first, *self.extra.get(value_id, ())]
+
+
+class UserSearchIndex:
+	"""Поиск по username и full_name с тем же ранжированием, что у UserRepository.search
+
+	Ранг - 1 за совпадение с начала строки плюс похожесть по триграммам. Префиксы ищутся
+	бинарным поиском по отсортированному массиву, вхождения и похожие значения - по
+	инвертированному индексу триграмм. Запрос короче SHORT_QUERY похож лишь на такие же
+	короткие значения: для него выдаются только префиксы по алфавиту, и страница стоит
+	O(log n + limit). Пока индекс не загружен (ready=False), поиск идет в БД.
+	"""
+
+	FIELDS = ('username', 'full_name')
+	SHORT_QUERY = 3  # Запросы короче ищутся только по префиксу, без подсчета похожести
+
+	def __init__(self, similarity: float = 0.3):
+		self.similarity = similarity  # Порог похожести, как pg_trgm.similarity_threshold
+		self.ready = False
+		self.user_ids = array('q')  # Слот -> user_id
+		self.names: List[Tuple[Optional[str], str]] = []  # Слот -> (username, full_name)
+		self._slots: Dict[int, int] = {}
+		self._fields = {name: _FieldIndex() for name in self.FIELDS}
+
+	def __len__(self) -> int:
+		return len(self.names)
+
+	def load(self, rows: Iterable[Tuple[int, Optional[str], str]]) -> None:
+		"""Начальная загрузка (user_id, username, full_name): сортировка один раз в конце"""
+		for user_id, username, full_name in rows:
+			if user_id not in self._slots:
+				self._append(user_id, username, full_name, bulk=True)
+		for field in self._fields.values():
+			field.keys.sort()
+
+	def add(self, user_id: int, username: Optional[str], full_name: str) -> None:
+		"""Новый пользователь или изменение имени"""
+		slot = self._slots.get(user_id)
+		if slot is None:
+			self._append(user_id, username, full_name)
+			return
+		old = self.names[slot]
+		if old == (username, full_name):
+			return
+		for field, old_value, value in zip(self._fields.values(), old, (username, full_name)):
+			if old_value != value:
+				field.remove(slot, old_value)
+				field.add(slot, value)
+		self.names[slot] = (username, full_name)
+
+	def _append(self, user_id: int, username: Optional[str], full_name: str, bulk: bool = False) -> None:
+		slot = len(self.names)
+		self._slots[user_id] = slot
+		self.user_ids.append(user_id)
+		self.names.append((username, full_name))
+		self._fields['username'].add(slot, username, bulk)
+		self._fields['full_name'].add(slot, full_name, bulk)
+
+	def search(
+			self,
+			field: str,
+			query: str,
+			limit: int = 10,
+			after: Optional[Cursor] = None
+	) -> Tuple[List[SearchHit], Optional[Cursor]]:
+		"""Страница результатов и курсор следующей (None, если она последняя)"""
+		index = self._fields[field]
+		query = query.lower().strip()
+		if not query:
+			return [], None
+		if len(query) < self.SHORT_QUERY:
+			return self._search_prefix(field, index, query, limit, after)
+
+		query_grams = trigrams(query)
+		size = len(query_grams)
+		values = index.values
+		sizes = index.sizes
+		ranks: Dict[int, float] = {}  # Номер значения -> ранг
+
+		# Похожесть: сколько триграмм запроса есть у значения. Все найденные ниже значения
+		# делят с запросом хотя бы одну триграмму, поэтому попадают в common
+		common = Counter()
+		for gram in query_grams:
+			posting = index.postings.get(gram)
+			if posting:
+				common.update(posting)
+
+		def similarity(value_id: int) -> float:
+			shared = common[value_id]
+			return shared / (size + sizes[value_id] - shared)
+
+		# Похожесть не выше shared / size: значения с меньшим числом общих триграмм отсекаются без расчета
+		minimum = self.similarity * size
+		for value_id, shared in common.items():
+			if shared >= minimum:
+				value = similarity(value_id)
+				if value >= self.similarity:
+					ranks[value_id] = value
+
+		# Вхождение: у значения есть все триграммы запроса без отступов
+		inner = sorted(
+			(index.postings.get(query[i:i + 3], ()) for i in range(len(query) - 2)),
+			key=len
+		)
+		found = set(inner[0])
+		for posting in inner[1:]:
+			if not found:
+				break
+			found.intersection_update(posting)
+		for value_id in found:
+			if value_id not in ranks and query in values[value_id]:
+				ranks[value_id] = similarity(value_id)
+
+		# Совпадения с начала строки
+		keys = index.keys
+		ids = index.ids
+		position = bisect_left(keys, query)
+		while position < len(keys) and keys[position].startswith(query):
+			value_id = ids[keys[position]]
+			ranks[value_id] = 1 + similarity(value_id)
+			position += 1
+
+		# Различных рангов немного: группы перебираются от лучшей, пока страница не заполнится,
+		# и пользователи разворачиваются только в просмотренных группах
+		groups: Dict[float, List[int]] = {}
+		for value_id, rank in ranks.items():
+			groups.setdefault(rank, []).append(value_id)
+		last_rank, last_id = after if after is not None else (None, 0)
+		user_ids = self.user_ids
+		page: List[Tuple[float, int, int]] = []  # (ранг, user_id, слот)
+		for rank in sorted(groups, reverse=True):
+			if last_rank is not None and rank > last_rank:
+				continue
+			candidates = ((user_ids[slot], slot) for value_id in groups[rank] for slot in index.slots(value_id))
+			if rank == last_rank:
+				candidates = (item for item in candidates if item[0] > last_id)
+			page.extend((rank, user_id, slot) for user_id, slot in nsmallest(limit + 1 - len(page), candidates))
+			if len(page) > limit:
+				break
+
+		hits = [SearchHit(user_id, *self.names[slot]) for _, user_id, slot in page[:limit]]
+		cursor = page[limit - 1][:2] if len(page) > limit else None
+		return hits, cursor
+
+	def _search_prefix(
+			self,
+			field: str,
+			index: _FieldIndex,
+			query: str,
+			limit: int,
+			after: Optional[Cursor]
+	) -> Tuple[List[SearchHit], Optional[Cursor]]:
+		"""Короткий запрос: только совпадения с начала строки, по алфавиту и user_id (ранг у всех 1).
+		Просматривается не больше limit + 1 пользователей, сколько бы значений ни совпало"""
+		keys = index.keys
+		user_ids = self.user_ids
+		last_id = 0
+		start = query
+		if after is not None:
+			# Продолжение - со значения последнего показанного пользователя
+			_, last_id = after
+			slot = self._slots.get(last_id)
+			start = self.names[slot][self.FIELDS.index(field)] if slot is not None else None
+			start = start.lower() if start else None
+			if start is None or not start.startswith(query):
+				return [], None
+
+		page: List[int] = []  # Слоты
+		position = bisect_left(keys, start)
+		while position < len(keys) and keys[position].startswith(query) and len(page) <= limit:
+			value = keys[position]
+			slots = sorted(index.slots(index.ids[value]), key=user_ids.__getitem__)
+			if value == start and after is not None:
+				slots = [slot for slot in slots if user_ids[slot] > last_id]
+			page.extend(slots[:limit + 1 - len(page)])
+			position += 1
+
+		hits = [SearchHit(user_ids[slot], *self.names[slot]) for slot in page[:limit]]
+		cursor = (1.0, user_ids[page[limit - 1]]) if len(page) > limit else None
+		return hits, cursor
@@ -0,0 +1,155 @@
+import asyncio
+import secrets
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Set
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+from aiogram.webhook.aiohttp_server import setup_application
+from aiohttp import web
+
+from .config import Config
+from .utils.loggers import main_bot as logger
+
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+def update_key(update: Update) -> Optional[int]:
+	"""Пользователь (или чат), к которому относится обновление; None - тип без отправителя"""
+	if update.chat_member:
+		# Подписка/отписка пользователя - к самому пользователю, а не к тому, кто его добавил
+		return update.chat_member.new_chat_member.user.id
+
+	try:
+		event = update.event
+	except Exception:
+		return None  # Неизвестный тип обновления
+
+	user = getattr(event, 'from_user', None)
+	if user:
+		return user.id
+	chat = getattr(event, 'chat', None)
+	return chat.id if chat else None
+
+
+class UpdateFeeder:
+	"""Передача обновлений в Dispatcher с ограничением числа одновременно обрабатываемых.
+
+	Обновления разных пользователей обрабатываются параллельно, одного - строго по очереди
+	(иначе, например, два сообщения подряд гоняются за одно состояние FSM).
+	"""
+
+	def __init__(self, bot: Bot, dp: Dispatcher, concurrency: int = Config.WEBHOOK_CONCURRENCY):
+		self.bot = bot
+		self.dp = dp
+		self._semaphore = asyncio.Semaphore(concurrency)
+		self._tasks: Set[asyncio.Task] = set()
+		# Пользователь -> обновления, ждущие окончания обработки текущего
+		self._pending: Dict[int, Deque[Update]] = {}
+
+	async def feed(self, update: Update) -> None:
+		"""Запуск обработки в фоне; ждет, только если все слоты заняты"""
+		key = update_key(update)
+		if key is not None:
+			pending = self._pending.get(key)
+			if pending is not None:
+				# Обновление пользователя уже обрабатывается: это выполнит та же задача следом
+				pending.append(update)
+				return
+			self._pending[key] = deque()
+
+		await self._semaphore.acquire()
+		task = asyncio.create_task(self._process(update, key))
+		self._tasks.add(task)
+		task.add_done_callback(self._tasks.discard)
+
+	async def _process(self, update: Update, key: Optional[int]) -> None:
+		try:
+			while True:
+				try:
+					await self.dp.feed_update(self.bot, update)
+				except Exception as e:
+					logger.exception(f"Ошибка обработки обновления {update.update_id}: {e}")
+				if key is None:
+					return
+				pending = self._pending[key]
+				if not pending:
+					del self._pending[key]
+					return
+				update = pending.popleft()
+		finally:
+			# При отмене очередь пользователя не должна остаться без обработчика
+			if key is not None:
+				self._pending.pop(key, None)
+			self._semaphore.release()
+
+	async def wait_closed(self) -> None:
+		"""Ожидание обновлений, которые еще обрабатываются"""
+		if self._tasks:
+			await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+class WebhookHandler:
+	"""Прием обновлений по webhook: проверенное обновление передается в feed"""
+
+	def __init__(self, bot: Bot, feed: Callable[[Update], Awaitable[None]], secret: str = Config.WEBHOOK_SECRET):
+		self.bot = bot
+		self.feed = feed
+		self.secret = secret
+
+	async def handle(self, request: web.Request) -> web.Response:
+		if self.secret and not secrets.compare_digest(request.headers.get(SECRET_HEADER, ""), self.secret):
+			return web.Response(status=401)
+
+		try:
+			update = Update.model_validate(await request.json(), context={"bot": self.bot})
+		except Exception as e:
+			logger.warning(f"Некорректное обновление webhook: {e}")
+			return web.Response(status=400)
+
+		# Когда все слоты заняты, ответ задерживается и Telegram сам притормаживает отправку
+		await self.feed(update)
+		return web.Response()
+
+
+async def serve_webhook(bot: Bot, app: web.Application, handler: WebhookHandler, allowed_updates: List[str]) -> None:
+	"""Регистрация webhook и работа aiohttp-сервера до отмены"""
+	app.router.add_post(Config.WEBHOOK_PATH, handler.handle)
+
+	async def register_webhook(_: web.Application) -> None:
+		# Без WEBHOOK_URL сервер работает локально: обновления можно отправлять POST-запросом вручную
+		if Config.WEBHOOK_URL:
+			await bot.set_webhook(
+				url=Config.WEBHOOK_URL.rstrip('/') + Config.WEBHOOK_PATH,
+				secret_token=Config.WEBHOOK_SECRET or None,
+				allowed_updates=allowed_updates,
+				max_connections=min(Config.WEBHOOK_CONCURRENCY, 100)
+			)
+
+	app.on_startup.append(register_webhook)
+
+	runner = web.AppRunner(app)
+	await runner.setup()
+	site = web.TCPSite(runner, Config.WEBHOOK_HOST, Config.WEBHOOK_PORT)
+	await site.start()
+	logger.info(f"Webhook: {Config.WEBHOOK_HOST}:{Config.WEBHOOK_PORT}{Config.WEBHOOK_PATH}")
+
+	try:
+		await asyncio.Event().wait()
+	finally:
+		await runner.cleanup()
+
+
+async def run_webhook(bot: Bot, dp: Dispatcher) -> None:
+	"""Запуск aiohttp-сервера для приема обновлений вместо long polling"""
+	feeder = UpdateFeeder(bot, dp)
+
+	app = web.Application()
+	setup_application(app, dp, bot=bot)
+
+	async def drain(_: web.Application) -> None:
+		await feeder.wait_closed()
+
+	app.on_shutdown.insert(0, drain)
+	await serve_webhook(bot, app, WebhookHandler(bot, feeder.feed), dp.resolve_used_update_types())
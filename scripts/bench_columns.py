@@ -0,0 +1,83 @@
+# Память на пользователей: обычные dataclass, dataclass(slots=True) и UserColumns
+#
+# Запуск из корня репозитория (нужен .env, как для бота): python scripts/bench_columns.py [--users 100000]
+# Считаются только сами объекты: строки общие с исходными строками выборки, как у записей asyncpg
+
+import argparse
+import sys
+import time
+import tracemalloc
+from dataclasses import fields, make_dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bot.models import User  # noqa: E402
+from bot.utils.columns import USER_FLAGS, UserColumns  # noqa: E402
+
+
+# Та же модель без __slots__ - как до перехода на slots
+PlainUser = make_dataclass('PlainUser', [field.name for field in fields(User)])
+
+
+def make_rows(count: int) -> List[tuple]:
+	start = datetime(2024, 1, 1)
+	return [
+		(
+			user_id,
+			f"user{user_id}" if user_id % 5 else None,
+			f"Пользователь {user_id}",
+			user_id % 10 != 0,  # is_active
+			user_id % 50 == 0,  # is_banned
+			user_id % 3 != 0,  # captcha_passed
+			True,  # should_notify
+			start + timedelta(seconds=user_id),
+			None,
+		)
+		for user_id in range(1, count + 1)
+	]
+
+
+def measure(build: Callable[[], object]) -> float:
+	"""Прирост памяти (МБ, 10^6 байт), пока результат build жив"""
+	tracemalloc.start()
+	before = tracemalloc.get_traced_memory()[0]
+	result = build()
+	after = tracemalloc.get_traced_memory()[0]
+	tracemalloc.stop()
+	del result
+	return (after - before) / 1e6
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description="Память на пользователей в разных представлениях")
+	parser.add_argument('--users', type=int, default=100_000)
+	args = parser.parse_args()
+
+	rows = make_rows(args.users)
+	# Так строки приходят из UserRepository.get_columns: флаги упакованы в одно число
+	positions = [[field.name for field in fields(User)].index(name) for name in USER_FLAGS]
+	packed = [
+		(row[0], row[7].timestamp(), sum(row[position] << bit for bit, position in enumerate(positions)))
+		for row in rows
+	]
+
+	def build_columns() -> UserColumns:
+		columns = UserColumns()
+		columns.extend(packed)
+		return columns
+
+	print(f"Пользователей: {args.users}")
+	print(f"  dataclass User         {measure(lambda: [PlainUser(*row) for row in rows]):6.1f} МБ")
+	print(f"  dataclass(slots) User  {measure(lambda: [User(*row) for row in rows]):6.1f} МБ")
+	print(f"  UserColumns            {measure(build_columns):6.1f} МБ")
+
+	started = time.perf_counter()
+	columns = build_columns()
+	print(f"Заполнение UserColumns: {time.perf_counter() - started:.2f} с ({columns.nbytes() / 1e6:.1f} МБ данных)")
+
+
+if __name__ == '__main__':
+	main()
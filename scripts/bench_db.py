@@ -0,0 +1,78 @@
+# Общая часть бенчмарков с БД: синтетические пользователи в отдельной схеме, которая удаляется в конце
+
+import sys
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator, Iterator, Optional, Tuple
+
+import asyncpg
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bot.repositories.user_repository import UserRepository  # noqa: E402
+
+
+FIRST_NAMES = (
+	'Александр', 'Мария', 'Дмитрий', 'Анна', 'Сергей', 'Елена', 'Андрей', 'Ольга', 'Алексей', 'Татьяна',
+	'Иван', 'Наталья', 'Михаил', 'Ирина', 'Никита', 'Светлана', 'Павел', 'Юлия', 'Артем', 'Дарья',
+)
+LAST_NAMES = (
+	'Иванов', 'Смирнов', 'Кузнецов', 'Попов', 'Васильев', 'Петров', 'Соколов', 'Михайлов', 'Новиков', 'Федоров',
+	'Морозов', 'Волков', 'Алексеев', 'Лебедев', 'Семенов', 'Егоров', 'Павлов', 'Козлов', 'Степанов', 'Николаев',
+)
+NICKNAMES = (
+	'alex', 'maria', 'dima', 'anna', 'sergey', 'lena', 'andrew', 'olga', 'lesha', 'tanya',
+	'ivan', 'natasha', 'misha', 'ira', 'nikita', 'sveta', 'pavel', 'julia', 'artem', 'dasha',
+)
+
+
+def _array(values) -> str:
+	return "ARRAY[" + ", ".join(f"'{value}'" for value in values) + "]"
+
+
+# Имена повторяются, как у настоящих пользователей (все сочетания имени и фамилии); у каждого пятого нет username
+FILL_QUERY = f"""
+INSERT INTO users (user_id, username, full_name, is_active, is_banned, captcha_passed, should_notify, join_date)
+SELECT
+    i,
+    CASE WHEN i % 5 <> 0 THEN ({_array(NICKNAMES)})[1 + (i / 5) % {len(NICKNAMES)}] || '_' || (i % 100000) END,
+    ({_array(FIRST_NAMES)})[1 + i % {len(FIRST_NAMES)}] || ' ' || ({_array(LAST_NAMES)})[1 + (i / {len(FIRST_NAMES)}) % {len(LAST_NAMES)}],
+    i % 10 <> 0,
+    i % 50 = 0,
+    i % 3 <> 0,
+    TRUE,
+    TIMESTAMP '2024-01-01' + i * INTERVAL '1 second'
+FROM generate_series(1, $1::bigint) AS i
+"""
+
+
+def synthetic_names(count: int) -> Iterator[Tuple[int, Optional[str], str]]:
+	"""(user_id, username, full_name) - те же значения, что FILL_QUERY пишет в БД"""
+	for i in range(1, count + 1):
+		username = f"{NICKNAMES[(i // 5) % len(NICKNAMES)]}_{i % 100000}" if i % 5 else None
+		yield i, username, f"{FIRST_NAMES[i % len(FIRST_NAMES)]} {LAST_NAMES[(i // len(FIRST_NAMES)) % len(LAST_NAMES)]}"
+
+
+@asynccontextmanager
+async def scratch_users(dsn: str, count: int, schema: str = 'bench') -> AsyncIterator[UserRepository]:
+	"""UserRepository над схемой schema с count пользователями (таблица и индексы - как у бота)"""
+	pool = await asyncpg.create_pool(
+		dsn,
+		min_size=1,
+		max_size=4,
+		server_settings={'search_path': f'{schema},public'},
+	)
+	try:
+		await pool.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE; CREATE SCHEMA {schema}")
+		repo = UserRepository(pool)
+		await repo.create_table()
+
+		started = time.perf_counter()
+		await pool.execute(FILL_QUERY, count)
+		await pool.execute("VACUUM ANALYZE users")
+		print(f"Схема {schema}: {count} пользователей за {time.perf_counter() - started:.1f} с, pg_trgm: {repo.trigram}")
+		yield repo
+	finally:
+		await pool.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+		await pool.close()
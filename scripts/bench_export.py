@@ -0,0 +1,162 @@
+# Скорость выгрузки пользователей по форматам
+#
+# Запуск из корня репозитория (нужен .env, как для бота):
+#   python scripts/bench_export.py [--users 200000]        - форматирование в процессе на синтетических данных
+#   python scripts/bench_export.py --dsn postgresql://...  - то же плюс COPY из PostgreSQL (во временной схеме)
+
+import argparse
+import asyncio
+import csv
+import sys
+import time
+from datetime import datetime, timedelta
+from io import StringIO
+from pathlib import Path
+from typing import Callable, List, Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bot.config import Config  # noqa: E402
+from bot.models import User  # noqa: E402
+from bot.services.export_service import ExportService, format_txt_page  # noqa: E402
+from bot.utils.columns import USER_FLAGS, UserColumns  # noqa: E402
+from bot.utils.export import ChunkWriter  # noqa: E402
+
+
+def make_users(count: int) -> List[User]:
+	start = datetime(2024, 1, 1)
+	return [
+		User(
+			user_id=user_id,
+			username=f"user{user_id}" if user_id % 5 else None,
+			full_name=f"Пользователь {user_id}",
+			is_active=user_id % 10 != 0,
+			is_banned=user_id % 50 == 0,
+			captcha_passed=user_id % 3 != 0,
+			join_date=start + timedelta(seconds=user_id),
+		)
+		for user_id in range(1, count + 1)
+	]
+
+
+def pages(users: List[User]) -> List[List[User]]:
+	size = Config.EXPORT_BATCH_SIZE
+	return [users[i:i + size] for i in range(0, len(users), size)]
+
+
+def write_csv_page(users: List[User]) -> str:
+	"""CSV через csv.writer, как выгрузка работала до перехода на COPY"""
+	output = StringIO()
+	rows = csv.writer(output, delimiter=',', quotechar='"', quoting=csv.QUOTE_MINIMAL, lineterminator='\n')
+	for user in users:
+		rows.writerow([
+			user.user_id,
+			user.full_name,
+			f"@{user.username}" if user.username else "",
+			user.join_date.strftime('%Y-%m-%d %H:%M'),
+			"Yes" if user.is_active else "No",
+			"Yes" if user.should_notify else "No"
+		])
+	return output.getvalue()
+
+
+def report(name: str, count: int, elapsed: float, size: Optional[int] = None) -> None:
+	line = f"  {name:<34} {count / elapsed / 1000:7.0f}k строк/с  ({elapsed:.2f} с)"
+	if size is not None:
+		line += f", {size / 1e6:.1f} МБ"
+	print(line)
+
+
+def timed(build: Callable[[], bytes]) -> tuple:
+	started = time.perf_counter()
+	data = build()
+	return time.perf_counter() - started, len(data)
+
+
+def bench_in_process(count: int) -> None:
+	users = make_users(count)
+	batches = pages(users)
+	print(f"В процессе, {count} пользователей:")
+
+	elapsed, size = timed(lambda: "".join(write_csv_page(page) for page in batches).encode())
+	report("CSV, csv.writer (до COPY)", count, elapsed, size)
+
+	number = 0
+
+	def txt() -> bytes:
+		nonlocal number
+		parts = []
+		for page in batches:
+			parts.append(format_txt_page(page, number))
+			number += len(page)
+		return "".join(parts).encode()
+
+	elapsed, size = timed(txt)
+	report("TXT, format_txt_page", count, elapsed, size)
+
+	def npz() -> bytes:
+		columns = UserColumns()
+		columns.extend(
+			(user.user_id, user.join_date.timestamp(), sum(getattr(user, name) << bit for bit, name in enumerate(USER_FLAGS)))
+			for user in users
+		)
+		return ExportService._to_npz(columns)
+
+	elapsed, size = timed(npz)
+	report("npz, колонки + savez_compressed", count, elapsed, size)
+
+	# gzip включается для больших выгрузок (EXPORT_GZIP_MIN_USERS) и тратит CPU даже при COPY
+	data = "".join(write_csv_page(page) for page in batches).encode()
+
+	def gzip() -> bytes:
+		writer = ChunkWriter(compress=True)
+		writer.write_bytes(data)
+		return writer.close()
+
+	elapsed, size = timed(gzip)
+	report("gzip готового CSV", count, elapsed, size)
+
+
+async def bench_copy(dsn: str, count: int) -> None:
+	from bench_db import scratch_users
+
+	async with scratch_users(dsn, count) as repo:
+		print(f"Из PostgreSQL, {count} пользователей:")
+
+		async def relay(chunks) -> int:
+			size = 0
+			async for chunk in chunks:
+				size += len(chunk)
+			return size
+
+		for name, copy in (("CSV, COPY", repo.copy_csv), ("JSON Lines, COPY", repo.copy_jsonl)):
+			started = time.perf_counter()
+			size = await relay(copy())
+			report(name, count, time.perf_counter() - started, size)
+
+		started = time.perf_counter()
+		size = len(ExportService._to_npz(await repo.get_columns(Config.EXPORT_BATCH_SIZE * 10)))
+		report("npz, get_columns + savez_compressed", count, time.perf_counter() - started, size)
+
+		started = time.perf_counter()
+		number = 0
+		size = 0
+		async for page in repo.iter_pages(Config.EXPORT_BATCH_SIZE):
+			size += len(format_txt_page(page, number).encode())
+			number += len(page)
+		report("TXT, iter_pages + format_txt_page", count, time.perf_counter() - started, size)
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description="Скорость выгрузки пользователей по форматам")
+	parser.add_argument('--users', type=int, default=200_000)
+	parser.add_argument('--dsn', help="PostgreSQL для замера COPY (данные пишутся во временную схему bench)")
+	args = parser.parse_args()
+
+	bench_in_process(args.users)
+	if args.dsn:
+		asyncio.run(bench_copy(args.dsn, args.users))
+
+
+if __name__ == '__main__':
+	main()
@@ -0,0 +1,113 @@
+# Задержка поиска пользователей: UserRepository.search (PostgreSQL) и UserSearchIndex (в памяти)
+#
+# Запуск из корня репозитория (нужен .env, как для бота):
+#   python scripts/bench_search.py [--users 1000000]        - только индекс в памяти
+#   python scripts/bench_search.py --dsn postgresql://...   - плюс SQL во временной схеме (с EXPLAIN)
+
+import argparse
+import asyncio
+import os
+import resource
+import statistics
+import sys
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bench_db import scratch_users, synthetic_names  # noqa: E402
+from bot.utils.search_index import UserSearchIndex  # noqa: E402
+
+
+# (поле, запрос, что проверяется)
+QUERIES = (
+	('username', 'a', "1 символ"),
+	('username', 'al', "префикс, 2 символа"),
+	('username', 'alex', "префикс"),
+	('username', 'alex_4201', "точный username"),
+	('username', 'sha_77', "вхождение"),
+	('full_name', 'ива', "начало имени"),
+	('full_name', 'петров', "фамилия"),
+	('username', 'natsha', "опечатка"),
+	('full_name', 'смирнв', "опечатка"),
+	('full_name', 'мария кузнецов', "имя целиком"),
+)
+PAGE_SIZE = 10
+
+
+def rss_mb() -> float:
+	"""Текущий RSS процесса (МБ); без /proc - пиковый"""
+	try:
+		with open('/proc/self/statm') as statm:
+			return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1e6
+	except OSError:
+		return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3
+
+
+async def timed(call: Callable[[], Awaitable], runs: int) -> Tuple[float, object]:
+	"""Медиана времени вызова (мс) и результат последнего"""
+	times: List[float] = []
+	result = None
+	for _ in range(runs):
+		started = time.perf_counter()
+		result = await call()
+		times.append((time.perf_counter() - started) * 1000)
+	return statistics.median(times), result
+
+
+async def bench_queries(search, runs: int) -> None:
+	print(f"  {'запрос':<42} {'стр. 1, мс':>10} {'стр. 2, мс':>10}  найдено на стр. 1")
+	for field, query, title in QUERIES:
+		first, (hits, cursor) = await timed(lambda: search(field, query, PAGE_SIZE, None), runs)
+		second = 0.0
+		if cursor:
+			second, _ = await timed(lambda: search(field, query, PAGE_SIZE, cursor), runs)
+		print(f"  {title + ': ' + field + ' ' + repr(query):<42} {first:10.2f} {second:10.2f}  {len(hits)}")
+
+
+def bench_index(count: int, runs: int) -> None:
+	print(f"UserSearchIndex, {count} пользователей:")
+	before = rss_mb()
+	started = time.perf_counter()
+	index = UserSearchIndex()
+	index.load(synthetic_names(count))
+	print(f"  загрузка {time.perf_counter() - started:.1f} с, RSS +{rss_mb() - before:.0f} МБ")
+
+	async def search(field, query, limit, after):
+		return index.search(field, query, limit, after)
+
+	asyncio.run(bench_queries(search, runs))
+
+
+async def explain(repo, field: str, query: str) -> str:
+	"""Узлы плана первой страницы"""
+	sql, args = repo._search_query(field, query, PAGE_SIZE, None)
+	plan = await repo.pool.fetch(f"EXPLAIN (ANALYZE, COSTS OFF) {sql}", *args)
+	lines = [record[0].strip().lstrip('-> ') for record in plan]
+	return "; ".join(line for line in lines if 'Scan' in line or line.startswith('Execution Time'))
+
+
+async def bench_sql(dsn: str, count: int, runs: int) -> None:
+	async with scratch_users(dsn, count) as repo:
+		path = "pg_trgm" if repo.trigram else "без pg_trgm: префикс username и начала слов имени"
+		print(f"UserRepository.search ({path}), {count} пользователей:")
+		await bench_queries(repo.search, runs)
+		for field, query in (('username', 'alex'), ('full_name', 'петров'), ('full_name', 'мария кузнецов')):
+			print(f"  план {field} {query!r}: {await explain(repo, field, query)}")
+
+
+def main() -> None:
+	parser = argparse.ArgumentParser(description="Задержка поиска пользователей")
+	parser.add_argument('--users', type=int, default=1_000_000)
+	parser.add_argument('--runs', type=int, default=5, help="повторов каждого запроса (берется медиана)")
+	parser.add_argument('--dsn', help="PostgreSQL для замера SQL-поиска (данные пишутся во временную схему bench)")
+	args = parser.parse_args()
+
+	bench_index(args.users, args.runs)
+	if args.dsn:
+		asyncio.run(bench_sql(args.dsn, args.users, args.runs))
+
+
+if __name__ == '__main__':
+	main()